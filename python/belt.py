@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Pas planetoid: tysiące do milionów ciał na losowych orbitach Keplera.
+
+Elementy orbit są losowane raz (powtarzalnie, z ziarna). W każdej klatce
+pozycje wszystkich ciał liczymy naraz (kepler_positions) prosto do bufora
+instancji, a całą populację rysujemy jednym wywołaniem instancyjnym
+współdzielonej siatki sfery.
+"""
+import time as timer
+
+import numpy as np
+
+from runtime.gl import glDeleteProgram, glFinish, GL_STREAM_DRAW
+
+from kepler import kepler_positions
+from meshes import sphere_mesh
+from gpu_buffers import VertexBuffer, compile_program, draw_instanced
+
+# Planetoidy są małe - wystarczy sfera o niskiej rozdzielczości
+ASTEROID_SPHERE_N = 6
+
+INSTANCE_DTYPE = np.dtype([
+    ('offset', np.float32, (3,)),
+    ('scale', np.float32, (1,)),
+    ('color', np.float32, (3,)),
+])
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+
+attribute vec3 offset;
+attribute float scale;
+attribute vec3 color;
+
+varying vec3 body_color;
+
+void main()
+{
+    body_color = color;
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(position * scale + offset, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 body_color;
+
+void main()
+{
+    gl_FragColor = vec4(body_color, 1.0);
+}
+"""
+
+
+class AsteroidBelt:
+    """ Populacja count ciał o losowych elementach orbit, rysowana instancyjnie """
+
+    def __init__(self, count, seed=0, A_range=(3.0, 11.5), max_eccentricity=0.3,
+                 G_GRAV=1.0, M_SUN=100.0):
+        rng = np.random.default_rng(seed)
+
+        self.count = count
+        self.A = rng.uniform(*A_range, count)
+        self.eccentricity = rng.uniform(0.0, max_eccentricity, count)
+        self.orbit_speed_fac = np.sqrt(G_GRAV * M_SUN / self.A ** 3)  # III prawo Keplera
+        self.time_offset = rng.uniform(0.0, 2 * np.pi, count) / self.orbit_speed_fac
+        self.height = rng.normal(0.0, 0.15, count).astype(np.float32)
+
+        self.instances = np.empty(count, dtype=INSTANCE_DTYPE)
+        self.instances['scale'][:, 0] = rng.uniform(0.03, 0.12, count)
+        grey = rng.uniform(0.35, 0.75, count)
+        self.instances['color'] = grey[:, np.newaxis] * np.array([1.0, 0.9, 0.75])
+
+        self.mesh = sphere_mesh(ASTEROID_SPHERE_N)
+        self.program = compile_program(VERTEX_SHADER, FRAGMENT_SHADER)
+        self.instance_buffer = VertexBuffer(usage=GL_STREAM_DRAW)
+
+        # Czas ostatniej aktualizacji pozycji w ms (do raportu)
+        self.update_ms = 0.0
+
+    def positions(self, time, out):
+        """ Pozycje wszystkich ciał w chwili time zapisane do out (count, 3) """
+        kepler_positions(self.A, self.eccentricity, time + self.time_offset, self.orbit_speed_fac, out=out)
+        out[:, 1] = self.height
+        return out
+
+    def update(self, time, simulation=None, rows=slice(None)):
+        """
+        Wysyła pozycje wszystkich ciał do bufora instancji - liczone od razu
+        albo odczytane (interpolowane) z wierszy rows symulacji w tle
+        """
+        start = timer.perf_counter()
+
+        if simulation is None:
+            self.positions(time, self.instances['offset'])
+        else:
+            simulation.sample(time, self.instances['offset'], rows)
+        self.instance_buffer.upload(self.instances)
+
+        self.update_ms = (timer.perf_counter() - start) * 1000.0
+
+    def draw(self, time, simulation=None, rows=slice(None)):
+        self.update(time, simulation, rows)
+        draw_instanced(self.program, self.mesh.mode, self.mesh.vertex_buffer,
+                       self.instance_buffer, self.mesh.index_buffer)
+
+    def delete(self):
+        self.instance_buffer.delete()
+        glDeleteProgram(self.program)
+
+
+def frame_time_report(scene, counts=(10_000, 100_000, 1_000_000), frames=20):
+    """
+    Raport czasu klatki sceny z pasem planetoid różnej wielkości.
+    scene to moduł sceny z globalną zmienną BELT i funkcją render(time).
+    """
+    print(f"{'ciała':>9} {'klatka [ms]':>12} {'FPS':>8} {'pozycje [ms]':>13}")
+    for count in counts:
+        if scene.BELT is not None:
+            scene.BELT.delete()
+        scene.BELT = AsteroidBelt(count)
+
+        scene.render(0.0)
+        glFinish()
+
+        update_ms = 0.0
+        start = timer.perf_counter()
+        for frame in range(frames):
+            scene.render(frame / 60.0)
+            glFinish()
+            update_ms += scene.BELT.update_ms
+        frame_ms = (timer.perf_counter() - start) / frames * 1000.0
+
+        print(f"{count:>9} {frame_ms:>12.2f} {1000.0 / frame_ms:>8.1f} {update_ms / frames:>13.2f}")
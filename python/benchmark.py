@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Powtarzalny pomiar czasu klatki scen.
+
+Każda scena jest uruchamiana w osobnym procesie, więc czas startu obejmuje
+import modułów i startup(), a stan GL jednej sceny nie wpływa na następną.
+render(time) dostaje syntetyczny zegar frame / clock_fps zamiast
+glfwGetTime(), bez synchronizacji pionowej, a każda klatka kończy się
+glFinish(), żeby mierzyć pełną pracę GPU. Generatory losowe są ziarnowane.
+
+    python benchmark.py zad4.0.py zad4.5.py --frames 300 --output wyniki.json
+    python benchmark.py zad4.0.py --set N=300 --backend glfw
+    python benchmark.py *.py --frames 1 --startup-budget 250     # budżet startu (CI)
+
+Wynik to JSON z czasem startu (import, startup(), pierwsza klatka),
+średnią i percentylami (p50, p95, p99) czasu klatki, FPS oraz opisem
+maszyny, sterownika i wersji kodu - do porównywania przebiegów między
+commitami i maszynami. Z --startup-budget kod wyjścia 1 oznacza, że któraś
+scena przekroczyła budżet czasu do pierwszej klatki.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time as timer
+
+import headless
+
+BACKENDS = headless.BACKENDS + ('glfw',)
+
+
+class WindowContext:
+    """ Ukryte okno GLFW z wyłączoną synchronizacją pionową (glfwSwapInterval(0)) """
+
+    def __init__(self, width=400, height=400):
+        import glfw
+
+        self.glfw = glfw
+        if not glfw.init():
+            raise RuntimeError("Nie udało się zainicjalizować GLFW")
+
+        glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+        self.window = glfw.create_window(width, height, "benchmark", None, None)
+        if not self.window:
+            glfw.terminate()
+            raise RuntimeError("Nie udało się utworzyć okna GLFW")
+
+        glfw.make_context_current(self.window)
+        glfw.swap_interval(0)
+        self.width, self.height = glfw.get_framebuffer_size(self.window)
+
+    def present(self):
+        self.glfw.swap_buffers(self.window)
+        self.glfw.poll_events()
+
+    def destroy(self):
+        self.glfw.terminate()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_assignment(text):
+    """ NAZWA=wartość (literał Pythona) - nadpisanie zmiennej globalnej sceny """
+    name, value = text.split('=', 1)
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def frame_statistics(frame_ms):
+    import numpy as np
+
+    frame_ms = np.asarray(frame_ms)
+    p50, p95, p99 = np.percentile(frame_ms, [50, 95, 99])
+    return {
+        'mean': float(frame_ms.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'min': float(frame_ms.min()),
+        'max': float(frame_ms.max()),
+    }
+
+
+def benchmark_scene(path, width=400, height=400, frames=200, warmup=10, clock_fps=60.0,
+                    backend='egl', overrides=(), seed=0):
+    """ Mierzy jedną scenę w bieżącym procesie i zwraca słownik z wynikami """
+    start = timer.perf_counter()
+
+    if backend == 'glfw':
+        context = WindowContext(width, height)
+        width, height = context.width, context.height
+    else:
+        headless.configure(backend)
+        context = headless.HeadlessContext(width, height, backend)
+
+    from runtime.gl import glFinish, glGetString, GL_RENDERER, GL_VERSION
+
+    context_ms = (timer.perf_counter() - start) * 1000.0
+
+    start = timer.perf_counter()
+    scene = headless.load_scene(path)
+    import_ms = (timer.perf_counter() - start) * 1000.0
+
+    for name, value in overrides:
+        if not hasattr(scene, name):
+            raise AttributeError(f"Scena {path} nie ma zmiennej {name}")
+        setattr(scene, name, value)
+
+    random.seed(seed)
+    import numpy as np
+    np.random.seed(seed)
+
+    try:
+        start = timer.perf_counter()
+        scene.update_viewport(None, width, height)
+        scene.startup()
+        scene.update_viewport(None, width, height)
+        glFinish()
+        startup_ms = (timer.perf_counter() - start) * 1000.0
+
+        frame_ms = []
+        for frame in range(warmup + frames):
+            start = timer.perf_counter()
+            scene.render(frame / clock_fps)
+            if backend == 'glfw':
+                context.present()
+            glFinish()
+            if frame == 0:
+                first_frame_ms = import_ms + startup_ms + (timer.perf_counter() - start) * 1000.0
+            if frame >= warmup:
+                frame_ms.append((timer.perf_counter() - start) * 1000.0)
+
+        statistics = frame_statistics(frame_ms)
+        # Czy scena potrzebowała pełnego OpenGL.GL / GLFW (runtime wczytuje je leniwie)
+        loaded = {module: module in sys.modules for module in ('OpenGL.GL', 'OpenGL.GLU', 'glfw')}
+        result = {
+            'scene': os.path.basename(path),
+            'overrides': {name: value for name, value in overrides},
+            'backend': backend,
+            'renderer': glGetString(GL_RENDERER).decode(),
+            'gl_version': glGetString(GL_VERSION).decode(),
+            'size': [width, height],
+            'frames': frames,
+            'warmup': warmup,
+            'clock_fps': clock_fps,
+            'context_ms': context_ms,
+            'import_ms': import_ms,
+            'startup_ms': startup_ms,
+            'first_frame_ms': first_frame_ms,
+            'loaded': loaded,
+            'frame_ms': statistics,
+            'fps': 1000.0 / statistics['mean'],
+        }
+
+        scene.shutdown()
+        return result
+    finally:
+        context.destroy()
+
+
+def run_isolated(path, args):
+    """ Uruchamia pomiar sceny w nowym procesie i zwraca jego wynik JSON """
+    command = [sys.executable, os.path.abspath(__file__), path, '--single',
+               '--size', f"{args.size[0]}x{args.size[1]}", '--frames', str(args.frames),
+               '--warmup', str(args.warmup), '--clock-fps', str(args.clock_fps),
+               '--backend', args.backend, '--seed', str(args.seed)]
+    for assignment in args.set:
+        command += ['--set', assignment]
+
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'scene': os.path.basename(path), 'error': completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pomiar czasu klatki scen z syntetycznym zegarem")
+    parser.add_argument('scenes', nargs='+', help="skrypty scen, np. zad4.0.py")
+    parser.add_argument('--size', type=headless.parse_size, default=(400, 400), help="SZEROKOŚĆxWYSOKOŚĆ")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10, help="klatki pominięte w statystyce")
+    parser.add_argument('--clock-fps', type=float, default=60.0, help="krok zegara render(time)")
+    parser.add_argument('--backend', choices=BACKENDS, default='egl')
+    parser.add_argument('--set', action='append', default=[], metavar='NAZWA=WARTOŚĆ',
+                        help="nadpisanie zmiennej globalnej sceny przed startup(), np. N=300")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--startup-budget', type=float, metavar='MS',
+                        help="kod wyjścia 1, jeśli import + startup() + pierwsza klatka przekroczy budżet")
+    parser.add_argument('--output', help="plik JSON z wynikami (domyślnie standardowe wyjście)")
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    overrides = [parse_assignment(assignment) for assignment in args.set]
+
+    if args.single:
+        result = benchmark_scene(args.scenes[0], *args.size, args.frames, args.warmup, args.clock_fps,
+                                 args.backend, overrides, args.seed)
+        print(json.dumps(result))
+        return
+
+    if args.backend != 'glfw':
+        # Indeks nazw GL budujemy raz tutaj, żeby nie liczył się do startu pierwszej sceny
+        headless.configure(args.backend)
+        from runtime.gl import load_index
+        load_index()
+
+    results = []
+    over_budget = []
+    for path in args.scenes:
+        result = run_isolated(path, args)
+        results.append(result)
+        if 'error' in result:
+            print(f"{result['scene']:>16}: błąd {result['error']}", file=sys.stderr)
+        else:
+            print(f"{result['scene']:>16}: pierwsza klatka {result['first_frame_ms']:8.1f} ms, "
+                  f"klatka {result['frame_ms']['mean']:8.2f} ms (p95 {result['frame_ms']['p95']:.2f}, "
+                  f"p99 {result['frame_ms']['p99']:.2f}), {result['fps']:.1f} FPS", file=sys.stderr)
+            if args.startup_budget is not None and result['first_frame_ms'] > args.startup_budget:
+                over_budget.append(result['scene'])
+
+    report = {
+        'revision': git_revision(),
+        'machine': {
+            'node': platform.node(),
+            'system': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(),
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+    if args.startup_budget is not None:
+        if over_budget:
+            print(f"Przekroczony budżet startu {args.startup_budget:.0f} ms: {', '.join(over_budget)}",
+                  file=sys.stderr)
+            sys.exit(1)
+        print(f"Wszystkie sceny w budżecie startu {args.startup_budget:.0f} ms", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Kolory wierzchołków liczone jednym przebiegiem NumPy.
+
+Kolory są zapisywane jako RGBA uint8 (4 bajty na wierzchołek zamiast 24
+dla trzech float64) i w tej postaci trafiają do bufora wierzchołków -
+glColorPointer / glVertexAttribPointer z GL_UNSIGNED_BYTE normalizuje je
+do [0, 1]. Schematy:
+
+  - 'random' - losowe kolory z np.random.Generator o podanym ziarnie, więc
+    każde uruchomienie (i benchmark) rysuje te same kolory,
+  - 'height' - gradient PALETTE wzdłuż osi y bryły,
+  - 'normal' - kierunek normalnej jako kolor (0.5 + 0.5 n).
+
+Wynik ma kształt wejścia z ostatnim wymiarem 4, np. (N, N, 4) dla siatki
+(N, N, 3).
+"""
+import numpy as np
+
+# Ziarno generatora kolorów losowych
+SEED = 0
+
+# Gradient schematu 'height': (położenie 0..1, kolor RGB 0..1)
+PALETTE = (
+    (0.0, (0.10, 0.15, 0.60)),
+    (0.35, (0.10, 0.65, 0.55)),
+    (0.65, (0.95, 0.80, 0.25)),
+    (1.0, (0.85, 0.20, 0.15)),
+)
+
+
+def to_rgba8(colors):
+    """ Kolory float RGB lub RGBA w [0, 1] jako RGBA uint8 (alfa 255, jeśli jej nie ma) """
+    colors = np.asarray(colors)
+    rgba = np.full(colors.shape[:-1] + (4,), 255, dtype=np.uint8)
+    rgba[..., :colors.shape[-1]] = np.rint(np.clip(colors, 0.0, 1.0) * 255.0)
+    return rgba
+
+
+def random_colors(vertices, normals=None, seed=SEED):
+    """ Losowe kolory RGB (alfa 255) z generatora o ziarnie seed """
+    rng = np.random.default_rng(seed)
+    rgba = rng.integers(0, 256, size=vertices.shape[:-1] + (4,), dtype=np.uint8)
+    rgba[..., 3] = 255
+    return rgba
+
+
+def height_colors(vertices, normals=None, seed=SEED, axis=1):
+    """ Kolor z PALETTE według współrzędnej axis przeskalowanej do [0, 1] """
+    height = np.asarray(vertices[..., axis], dtype=np.float32)
+    low, high = float(height.min()), float(height.max())
+    t = (height - low) / max(high - low, 1e-12)
+
+    stops = np.array([stop for stop, _ in PALETTE])
+    colors = np.array([color for _, color in PALETTE])
+    rgb = np.stack([np.interp(t, stops, colors[:, channel]) for channel in range(3)], axis=-1)
+    return to_rgba8(rgb)
+
+
+def normal_colors(vertices, normals, seed=SEED):
+    """ Kolor z kierunku normalnej jednostkowej: 0.5 + 0.5 n """
+    if normals is None:
+        raise ValueError("Schemat kolorów 'normal' wymaga normalnych wierzchołków")
+    normals = np.asarray(normals, dtype=np.float32)
+    if normals.shape != np.shape(vertices):
+        raise ValueError(f"Normalne {normals.shape} nie pasują do wierzchołków {np.shape(vertices)}")
+    return to_rgba8(0.5 + 0.5 * normals)
+
+
+SCHEMES = {
+    'random': random_colors,
+    'height': height_colors,
+    'normal': normal_colors,
+}
+
+
+def vertex_colors(scheme, vertices, normals=None, seed=SEED):
+    """ Kolory RGBA uint8 wierzchołków według schematu o nazwie scheme """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Nieznany schemat kolorów {scheme!r} (dostępne: {', '.join(SCHEMES)})")
+    return SCHEMES[scheme](vertices, normals, seed=seed)
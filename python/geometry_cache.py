@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Trwała pamięć podręczna geometrii na dysku.
+
+Wynik generatora (np. siatka jajka dla danego N, poziom piramidy) jest
+zapisywany jako pliki .npy w katalogu CACHE_DIR, a kolejne uruchomienia
+wczytują go przez np.load(mmap_mode='r') - dane są mapowane z pliku bez
+kopiowania i w tej postaci trafiają prosto do glBufferData.
+
+Klucz wpisu to nazwa generatora, skrót jego parametrów oraz skrót kodu
+źródłowego modułów, z których pochodzą użyte funkcje. Inne parametry to po
+prostu inny wpis; po zmianie kodu generatora wpisy z tymi samymi
+parametrami, ale starym skrótem kodu, są usuwane.
+
+Katalog można zmienić zmienną środowiskową GEOMETRY_CACHE_DIR; pusta
+wartość wyłącza pamięć podręczną.
+"""
+import hashlib
+import inspect
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+CACHE_DIR = os.environ.get('GEOMETRY_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), '.geometry_cache'))
+
+# Skróty kodu modułów liczone raz na uruchomienie
+SOURCE_DIGESTS = {}
+
+
+def source_digest(function):
+    """ Skrót kodu źródłowego modułu, w którym zdefiniowano funkcję """
+    module = inspect.getmodule(function)
+    name = module.__name__ if module is not None else function.__qualname__
+    if name not in SOURCE_DIGESTS:
+        try:
+            source = inspect.getsource(module if module is not None else function)
+        except (OSError, TypeError):
+            source = function.__qualname__
+        SOURCE_DIGESTS[name] = hashlib.sha1(source.encode()).hexdigest()
+    return SOURCE_DIGESTS[name]
+
+
+def describe(value, code):
+    """ Stabilny opis parametru do klucza (funkcje po nazwie, tablice po zawartości) """
+    if callable(value):
+        code.update(source_digest(value).encode())
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, np.ndarray):
+        return hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return '(' + ','.join(describe(item, code) for item in value) + ')'
+    return repr(value)
+
+
+def cache_key(name, generator, args, params):
+    """ Zwraca (prefiks nazwa-parametry, pełny klucz z dołączonym skrótem kodu) """
+    code = hashlib.sha1()
+    parts = [describe(generator, code)]
+    parts += [describe(arg, code) for arg in args]
+    parts += [f"{key}={describe(params[key], code)}" for key in sorted(params)]
+
+    prefix = f"{name}-{hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]}"
+    return prefix, f"{prefix}-{code.hexdigest()[:16]}"
+
+
+def load_entry(path):
+    files = sorted(f for f in os.listdir(path) if f.endswith('.npy'))
+    arrays = tuple(np.load(os.path.join(path, f), mmap_mode='r') for f in files)
+    with open(os.path.join(path, 'kind')) as kind:
+        return arrays if kind.read() == 'tuple' else arrays[0]
+
+
+def store_entry(path, result):
+    # Zapis do katalogu tymczasowego i atomowa zmiana nazwy - równoległe
+    # procesy nigdy nie widzą niekompletnego wpisu
+    arrays = result if isinstance(result, tuple) else (result,)
+    staging = tempfile.mkdtemp(prefix='.tmp-', dir=CACHE_DIR)
+    for k, array in enumerate(arrays):
+        np.save(os.path.join(staging, f"{k:02d}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(staging, 'kind'), 'w') as kind:
+        kind.write('tuple' if isinstance(result, tuple) else 'array')
+
+    try:
+        os.rename(staging, path)
+    except OSError:
+        # Inny proces zdążył zapisać ten sam wpis
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def remove_stale(prefix, current):
+    """ Usuwa wpisy o tych samych parametrach policzone starszą wersją kodu """
+    for entry in os.listdir(CACHE_DIR):
+        if entry.rsplit('-', 1)[0] == prefix and entry != current:
+            shutil.rmtree(os.path.join(CACHE_DIR, entry), ignore_errors=True)
+
+
+def cached_geometry(name, generator, *args, **params):
+    """
+    Zwraca generator(*args, **params), wczytując wynik z dysku, jeśli był już
+    policzony dla tych samych parametrów i tego samego kodu.
+
+    Wynik (tablica lub krotka tablic) jest tylko do odczytu (np.memmap).
+    """
+    if not CACHE_DIR:
+        return generator(*args, **params)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    prefix, key = cache_key(name, generator, args, params)
+    path = os.path.join(CACHE_DIR, key)
+
+    if os.path.isdir(path):
+        try:
+            return load_entry(path)
+        except (OSError, ValueError):
+            shutil.rmtree(path, ignore_errors=True)
+
+    result = generator(*args, **params)
+    remove_stale(prefix, key)
+    store_entry(path, result)
+    return load_entry(path)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Bufory wierzchołków przechowywane na GPU (VBO).
+
+Dane są wysyłane do karty graficznej raz (w startup() albo po zmianie
+siatki), a render() rysuje je jednym wywołaniem glDrawArrays, zamiast
+wysyłać każdy wierzchołek osobnym glVertex3f w każdej klatce.
+
+Układ atrybutów jest odczytywany z typu tablicy NumPy:
+  - zwykła tablica (..., 3) float32 to same pozycje,
+  - tablica strukturalna z polami 'position', 'color', 'normal' to
+    atrybuty przeplatane (interleaved) w jednym buforze.
+
+Dla shaderów (rysowanie instancyjne) pola są podpinane jako atrybuty
+wierzchołków o tych samych nazwach co pola tablicy. Położenia atrybutów
+są odczytywane raz, po zlinkowaniu programu (compile_program()), a nie
+przy każdym rysowaniu.
+"""
+import ctypes
+
+import numpy as np
+
+from runtime.gl import (glBindBuffer, glEnable, glDisable, glEnableClientState, glDisableClientState,
+                        glEnableVertexAttribArray, glDisableVertexAttribArray, glVertexAttribDivisor,
+                        glDrawArrays, glDrawArraysInstanced, glPrimitiveRestartIndex, glUseProgram,
+                        GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER, GL_VERTEX_ARRAY, GL_COLOR_ARRAY,
+                        GL_NORMAL_ARRAY, GL_PRIMITIVE_RESTART, GL_STATIC_DRAW, GL_TRIANGLES, GL_FLOAT,
+                        GL_UNSIGNED_BYTE, GL_UNSIGNED_SHORT, GL_UNSIGNED_INT, GL_TRUE, GL_FALSE,
+                        GL_VERTEX_SHADER, GL_FRAGMENT_SHADER, GL_ACTIVE_ATTRIBUTES)
+
+from runtime.counters import counted
+
+# Funkcje, które PyOpenGL opakowuje, w wersji surowej: wskaźniki, rozmiary
+# i tablice podajemy jawnie, więc pełne OpenGL.GL nie jest potrzebne
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_5, GL_2_0, GL_3_1
+
+glVertexPointer = counted(GL_1_1.glVertexPointer, 'glVertexPointer')
+glColorPointer = counted(GL_1_1.glColorPointer, 'glColorPointer')
+glNormalPointer = counted(GL_1_1.glNormalPointer, 'glNormalPointer')
+glDrawElements = counted(GL_1_1.glDrawElements, 'glDrawElements')
+glGenBuffers = counted(GL_1_5.glGenBuffers, 'glGenBuffers')
+glBufferData = counted(GL_1_5.glBufferData, 'glBufferData')
+glDeleteBuffers = counted(GL_1_5.glDeleteBuffers, 'glDeleteBuffers')
+glGetAttribLocation = counted(GL_2_0.glGetAttribLocation, 'glGetAttribLocation')
+glGetActiveAttrib = counted(GL_2_0.glGetActiveAttrib, 'glGetActiveAttrib')
+glGetProgramiv = counted(GL_2_0.glGetProgramiv, 'glGetProgramiv')
+glVertexAttribPointer = counted(GL_2_0.glVertexAttribPointer, 'glVertexAttribPointer')
+glDrawElementsInstanced = counted(GL_3_1.glDrawElementsInstanced, 'glDrawElementsInstanced')
+
+# Nazwa pola -> tablica klienta w potoku stałym
+CLIENT_ARRAYS = {
+    'position': GL_VERTEX_ARRAY,
+    'color': GL_COLOR_ARRAY,
+    'normal': GL_NORMAL_ARRAY,
+}
+
+GL_TYPES = {
+    np.dtype(np.float32): GL_FLOAT,
+    np.dtype(np.uint8): GL_UNSIGNED_BYTE,
+    np.dtype(np.uint16): GL_UNSIGNED_SHORT,
+    np.dtype(np.uint32): GL_UNSIGNED_INT,
+}
+
+
+def attribute_layout(dtype, components=3):
+    """ Zwraca listę (nazwa, liczba składowych, typ GL, przesunięcie) oraz stride """
+    if dtype.names is None:
+        return [('position', components, GL_TYPES[dtype], 0)], 0
+
+    layout = []
+    for name in dtype.names:
+        field_dtype, offset = dtype.fields[name][:2]
+        layout.append((name, field_dtype.shape[0], GL_TYPES[field_dtype.base], offset))
+    return layout, dtype.itemsize
+
+
+def generate_buffer():
+    """ Nowy identyfikator bufora (surowe glGenBuffers zapisuje go do tablicy) """
+    buffer = np.zeros(1, dtype=np.uint32)
+    glGenBuffers(1, buffer)
+    return int(buffer[0])
+
+
+def interleave(position, color=None, normal=None):
+    """ Łączy atrybuty w jedną tablicę strukturalną (jeden wierzchołek = jeden rekord) """
+    fields = [('position', position), ('color', color), ('normal', normal)]
+    fields = [(name, np.asarray(values)) for name, values in fields if values is not None]
+
+    count = fields[0][1].size // fields[0][1].shape[-1]
+    dtype = np.dtype([(name, values.dtype if values.dtype in GL_TYPES else np.float32,
+                       (values.shape[-1],)) for name, values in fields])
+
+    data = np.empty(count, dtype=dtype)
+    for name, values in fields:
+        data[name] = values.reshape(count, -1)
+    return data
+
+
+class VertexBuffer:
+    """ Bufor wierzchołków (GL_ARRAY_BUFFER) z zapamiętanym układem atrybutów """
+
+    def __init__(self, data=None, usage=GL_STATIC_DRAW):
+        self.id = generate_buffer()
+        self.usage = usage
+        self.count = 0
+        self.nbytes = 0
+        self.layout = []
+        self.stride = 0
+        if data is not None:
+            self.upload(data)
+
+    def upload(self, data):
+        """ Wysyła dane na GPU; tablica (N, N, 3) jest spłaszczana do (N*N, 3) """
+        data = np.ascontiguousarray(data)
+        if data.dtype.names is None:
+            components = data.shape[-1]
+            data = data.reshape(-1, components)
+        else:
+            components = None
+            data = data.reshape(-1)
+
+        self.layout, self.stride = attribute_layout(data.dtype, components)
+        self.count = data.shape[0]
+        self.nbytes = data.nbytes
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.id)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, self.usage)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def enable_arrays(self):
+        """ Podpina bufor i ustawia wskaźniki tablic klienta (glVertexPointer itd.) """
+        glBindBuffer(GL_ARRAY_BUFFER, self.id)
+        for name, size, gl_type, offset in self.layout:
+            pointer = ctypes.c_void_p(offset)
+            if name == 'position':
+                glVertexPointer(size, gl_type, self.stride, pointer)
+            elif name == 'color':
+                glColorPointer(size, gl_type, self.stride, pointer)
+            elif name == 'normal':
+                glNormalPointer(gl_type, self.stride, pointer)
+            else:
+                continue
+            glEnableClientState(CLIENT_ARRAYS[name])
+
+    def disable_arrays(self):
+        for name, _, _, _ in self.layout:
+            if name in CLIENT_ARRAYS:
+                glDisableClientState(CLIENT_ARRAYS[name])
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def enable_attributes(self, program, divisor=0):
+        """
+        Podpina pola bufora jako atrybuty shadera o tych samych nazwach.
+        divisor=1 oznacza atrybut instancji (jedna wartość na instancję).
+        """
+        glBindBuffer(GL_ARRAY_BUFFER, self.id)
+        for name, size, gl_type, offset in self.layout:
+            location = program.attributes.get(name, -1)
+            if location < 0:
+                continue
+            normalized = GL_TRUE if gl_type == GL_UNSIGNED_BYTE else GL_FALSE
+            glVertexAttribPointer(location, size, gl_type, normalized, self.stride, ctypes.c_void_p(offset))
+            glVertexAttribDivisor(location, divisor)
+            glEnableVertexAttribArray(location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def disable_attributes(self, program):
+        for name, _, _, _ in self.layout:
+            location = program.attributes.get(name, -1)
+            if location >= 0:
+                glVertexAttribDivisor(location, 0)
+                glDisableVertexAttribArray(location)
+
+    def draw(self, mode, first=0, count=None):
+        """ Rysuje cały bufor (lub jego fragment) jednym glDrawArrays """
+        if count is None:
+            count = self.count - first
+        self.enable_arrays()
+        glDrawArrays(mode, first, count)
+        self.disable_arrays()
+
+    def delete(self):
+        if self.id:
+            glDeleteBuffers(1, [self.id])
+            self.id = 0
+
+
+class IndexBuffer:
+    """
+    Bufor indeksów (GL_ELEMENT_ARRAY_BUFFER) rysowany przez glDrawElements.
+    Jeśli podano restart_index, rysowanie włącza GL_PRIMITIVE_RESTART.
+    """
+
+    def __init__(self, indices=None, usage=GL_STATIC_DRAW, restart_index=None):
+        self.id = generate_buffer()
+        self.usage = usage
+        self.restart_index = restart_index
+        self.count = 0
+        self.nbytes = 0
+        self.gl_type = GL_UNSIGNED_INT
+        if indices is not None:
+            self.upload(indices)
+
+    def upload(self, indices):
+        indices = np.ascontiguousarray(indices).reshape(-1)
+        if indices.dtype not in (np.uint16, np.uint32):
+            indices = indices.astype(np.uint32)
+
+        self.gl_type = GL_TYPES[indices.dtype]
+        self.count = indices.shape[0]
+        self.nbytes = indices.nbytes
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.id)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, self.usage)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw(self, vertex_buffer, mode):
+        """ Rysuje wierzchołki z vertex_buffer w kolejności indeksów (jedno wywołanie) """
+        vertex_buffer.enable_arrays()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.id)
+
+        if self.restart_index is not None:
+            glEnable(GL_PRIMITIVE_RESTART)
+            glPrimitiveRestartIndex(self.restart_index)
+
+        glDrawElements(mode, self.count, self.gl_type, None)
+
+        if self.restart_index is not None:
+            glDisable(GL_PRIMITIVE_RESTART)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        vertex_buffer.disable_arrays()
+
+    def delete(self):
+        if self.id:
+            glDeleteBuffers(1, [self.id])
+            self.id = 0
+
+
+def compile_program(vertex_source, fragment_source):
+    """
+    Kompiluje i linkuje program shaderów (błąd kompilacji zgłasza wyjątek).
+    program.attributes to słownik nazwa atrybutu -> położenie.
+    """
+    # OpenGL.GL.shaders wczytuje całe OpenGL.GL - tylko dla scen z shaderami
+    from OpenGL.GL.shaders import compileProgram, compileShader
+
+    program = compileProgram(compileShader(vertex_source, GL_VERTEX_SHADER),
+                             compileShader(fragment_source, GL_FRAGMENT_SHADER),
+                             validate=False)
+    program.attributes = attribute_locations(program)
+    return program
+
+
+def attribute_locations(program):
+    """ Położenia aktywnych atrybutów zlinkowanego programu (bez wbudowanych gl_*) """
+    count = (ctypes.c_int * 1)()
+    glGetProgramiv(program, GL_ACTIVE_ATTRIBUTES, count)
+
+    name = ctypes.create_string_buffer(256)
+    length, size, gl_type = (ctypes.c_int * 1)(), (ctypes.c_int * 1)(), (ctypes.c_uint * 1)()
+    locations = {}
+    for index in range(count[0]):
+        glGetActiveAttrib(program, index, len(name), length, size, gl_type, name)
+        location = glGetAttribLocation(program, name.value)
+        if location >= 0:
+            locations[name.value.decode()] = location
+    return locations
+
+
+def instancing_supported():
+    """ Rysowanie instancyjne wymaga glDrawArraysInstanced i glVertexAttribDivisor """
+    return bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor)
+
+
+def draw_instanced(program, mode, vertex_buffer, instance_buffer, index_buffer=None, instances=None):
+    """
+    Rysuje siatkę vertex_buffer raz dla każdego rekordu instance_buffer
+    (jedno wywołanie glDrawArraysInstanced / glDrawElementsInstanced).
+    """
+    if instances is None:
+        instances = instance_buffer.count
+
+    glUseProgram(program)
+    vertex_buffer.enable_attributes(program)
+    instance_buffer.enable_attributes(program, divisor=1)
+
+    if index_buffer is None:
+        glDrawArraysInstanced(mode, 0, vertex_buffer.count, instances)
+    else:
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer.id)
+        if index_buffer.restart_index is not None:
+            glEnable(GL_PRIMITIVE_RESTART)
+            glPrimitiveRestartIndex(index_buffer.restart_index)
+
+        glDrawElementsInstanced(mode, index_buffer.count, index_buffer.gl_type, None, instances)
+
+        if index_buffer.restart_index is not None:
+            glDisable(GL_PRIMITIVE_RESTART)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    instance_buffer.disable_attributes(program)
+    vertex_buffer.disable_attributes(program)
+    glUseProgram(0)
+
+
+class Mesh:
+    """
+    Siatka gotowa do rysowania: bufor wierzchołków, opcjonalny bufor indeksów
+    i rodzaj prymitywu. Tworzona raz i rysowana wielokrotnie - każde ciało
+    zmienia tylko macierz i kolor przed draw().
+    """
+
+    def __init__(self, vertices, indices=None, mode=GL_TRIANGLES, restart_index=None):
+        self.mode = mode
+        self.vertex_buffer = VertexBuffer(vertices)
+        self.index_buffer = None
+        if indices is not None:
+            self.index_buffer = IndexBuffer(indices, restart_index=restart_index)
+
+    def draw(self):
+        if self.index_buffer is None:
+            self.vertex_buffer.draw(self.mode)
+        else:
+            self.index_buffer.draw(self.vertex_buffer, self.mode)
+
+    def delete(self):
+        self.vertex_buffer.delete()
+        if self.index_buffer is not None:
+            self.index_buffer.delete()
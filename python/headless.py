@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Uruchamianie scen bez okna (bez GLFW i bez ekranu).
+
+Tworzy pozaekranowy kontekst OpenGL - EGL bez powierzchni okna
+(Mesa "surfaceless", np. llvmpipe) albo OSMesa - i wywołuje istniejące
+funkcje sceny: startup(), update_viewport() i render(time). Kod sceny się
+nie zmienia, wybór trybu odbywa się przy uruchomieniu:
+
+    python zad4.0.py                                  # okno GLFW
+    python headless.py zad4.0.py --size 800x600 --frames 120 --output klatka.ppm
+
+Platformę PyOpenGL trzeba wybrać przed pierwszym importem OpenGL, dlatego
+moduł ustawia PYOPENGL_PLATFORM sam, zanim wczyta scenę.
+"""
+import argparse
+import ctypes
+import importlib.util
+import os
+import sys
+
+from runtime import counters, profiler
+
+BACKENDS = ('egl', 'osmesa')
+
+
+def configure(backend='egl', software=True):
+    """ Wybiera platformę PyOpenGL; musi być wywołane przed importem OpenGL.GL """
+    if backend not in BACKENDS:
+        raise ValueError(f"Nieznany backend {backend!r}, dostępne: {', '.join(BACKENDS)}")
+
+    if 'OpenGL.GL' in sys.modules and os.environ.get('PYOPENGL_PLATFORM') != backend:
+        raise RuntimeError("OpenGL został już zaimportowany z inną platformą - "
+                           "wywołaj configure() przed wczytaniem sceny")
+
+    os.environ['PYOPENGL_PLATFORM'] = backend
+    if backend == 'egl':
+        # Mesa: EGL bez serwera X / Wayland
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+    if software:
+        # Wymusza programowy rasteryzator (llvmpipe) - powtarzalne wyniki na CI
+        os.environ.setdefault('LIBGL_ALWAYS_SOFTWARE', '1')
+
+
+class HeadlessContext:
+    """ Pozaekranowy kontekst OpenGL o zadanym rozmiarze bufora ramki """
+
+    def __init__(self, width=400, height=400, backend='egl'):
+        self.width = width
+        self.height = height
+        self.backend = backend
+
+        if backend == 'egl':
+            self.create_egl()
+        else:
+            self.create_osmesa()
+
+    def create_egl(self):
+        from OpenGL import EGL
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("Nie udało się zainicjalizować EGL")
+
+        config_attributes = (EGL.EGLint * 15)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_RED_SIZE, 8,
+            EGL.EGL_GREEN_SIZE, 8,
+            EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_ALPHA_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_NONE,
+        )
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        EGL.eglChooseConfig(self.display, config_attributes, ctypes.pointer(config), 1, ctypes.pointer(count))
+        if count.value == 0:
+            raise RuntimeError("Brak konfiguracji EGL z buforem pbuffer i OpenGL")
+
+        surface_attributes = (EGL.EGLint * 5)(EGL.EGL_WIDTH, self.width, EGL.EGL_HEIGHT, self.height, EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(self.display, config, surface_attributes)
+
+        # Sceny używają potoku stałego (glBegin, glMatrixMode) - pełne OpenGL, nie ES
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+            raise RuntimeError("Nie udało się aktywować kontekstu EGL")
+
+    def create_osmesa(self):
+        from OpenGL import platform
+        if platform.PLATFORM.GL is None:
+            raise RuntimeError("Brak biblioteki libOSMesa - zainstaluj ją albo użyj --backend egl")
+
+        from OpenGL import GL, arrays, osmesa
+
+        self.context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self.context:
+            raise RuntimeError("Nie udało się utworzyć kontekstu OSMesa")
+
+        self.buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        if not osmesa.OSMesaMakeCurrent(self.context, self.buffer, GL.GL_UNSIGNED_BYTE, self.width, self.height):
+            raise RuntimeError("Nie udało się aktywować kontekstu OSMesa")
+
+    def read_pixels(self):
+        """ Zawartość bufora ramki jako tablica (wysokość, szerokość, 3) uint8, wiersz 0 na górze """
+        import numpy as np
+        from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels
+        from runtime.gl import glFinish, glPixelStorei, GL_PACK_ALIGNMENT, GL_RGB, GL_UNSIGNED_BYTE
+
+        glFinish()
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        pixels = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, pixels)
+        return pixels[::-1].copy()
+
+    def destroy(self):
+        if self.backend == 'egl':
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(self.display, self.surface)
+            EGL.eglDestroyContext(self.display, self.context)
+            EGL.eglTerminate(self.display)
+        else:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self.context)
+
+
+def load_scene(path):
+    """ Wczytuje skrypt sceny (np. zad4.0.py) jako moduł, bez uruchamiania main() """
+    path = os.path.abspath(path)
+    scene_dir = os.path.dirname(path)
+    if scene_dir not in sys.path:
+        sys.path.insert(0, scene_dir)
+
+    name = os.path.splitext(os.path.basename(path))[0].replace('.', '_')
+    spec = importlib.util.spec_from_file_location(name, path)
+    scene = importlib.util.module_from_spec(spec)
+    sys.modules[name] = scene
+    spec.loader.exec_module(scene)
+    return scene
+
+
+def write_ppm(path, pixels):
+    """ Zapisuje obraz (wysokość, szerokość, 3) uint8 jako PPM (bez dodatkowych bibliotek) """
+    height, width = pixels.shape[:2]
+    with open(path, 'wb') as image:
+        image.write(f"P6 {width} {height} 255\n".encode())
+        image.write(pixels.tobytes())
+
+
+def run_scene(path, width=400, height=400, frames=1, fps=60.0, backend='egl', output=None, count_calls=False,
+              profile=False):
+    """
+    Uruchamia scenę bez okna: startup(), rzutnia o zadanym rozmiarze
+    i frames wywołań render(time) z czasem frame / fps. Zwraca ostatnią klatkę.
+    count_calls włącza liczniki wywołań GL na klatkę (runtime.counters),
+    profile - pomiary czasu przebiegów klatki (runtime.profiler).
+    """
+    configure(backend)
+    if count_calls:
+        counters.enable()
+    if profile:
+        profiler.enable()
+    context = HeadlessContext(width, height, backend)
+    scene = load_scene(path)
+
+    try:
+        scene.update_viewport(None, width, height)
+        scene.startup()
+        # startup() ustawia rzutnię dla okna 400x400 - przywracamy rozmiar bufora
+        scene.update_viewport(None, width, height)
+
+        counters.begin_frames()
+        profiler.begin_frames()
+        for frame in range(frames):
+            scene.render(frame / fps)
+            if counters.ENABLED:
+                counters.end_frame()
+            if profiler.ENABLED:
+                profiler.end_frame()
+
+        pixels = context.read_pixels()
+        if output:
+            write_ppm(output, pixels)
+
+        scene.shutdown()
+        return pixels
+    finally:
+        profiler.release()
+        context.destroy()
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uruchamia scenę bez okna (EGL / OSMesa)")
+    parser.add_argument('scene', help="skrypt sceny, np. zad4.0.py")
+    parser.add_argument('--size', type=parse_size, default=(400, 400), help="SZEROKOŚĆxWYSOKOŚĆ")
+    parser.add_argument('--frames', type=int, default=1)
+    parser.add_argument('--fps', type=float, default=60.0, help="krok zegara render(time)")
+    parser.add_argument('--backend', choices=BACKENDS, default='egl')
+    parser.add_argument('--output', help="zapis ostatniej klatki do pliku .ppm")
+    parser.add_argument('--counters', action='store_true', help="tabela wywołań GL, wierzchołków, "
+                        "rysowań i zmian stanu na klatkę")
+    parser.add_argument('--profile', action='store_true', help="czas CPU i GPU przebiegów klatki "
+                        f"(średnio z ostatnich {profiler.FRAMES} klatek)")
+    args = parser.parse_args()
+
+    pixels = run_scene(args.scene, *args.size, args.frames, args.fps, args.backend, args.output, args.counters,
+                       args.profile)
+    print(f"{args.scene}: {args.frames} klatek {args.size[0]}x{args.size[1]}, "
+          f"niepuste piksele: {int((pixels.sum(axis=2) > 0).sum())}")
+    if args.counters:
+        print(counters.frame_table())
+    if args.profile:
+        print(profiler.report())
+
+
+if __name__ == '__main__':
+    main()
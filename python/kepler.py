@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Wektorowe rozwiązanie równania Keplera dla wielu ciał naraz.
+
+Równanie M = E - e*sin(E) rozwiązujemy metodą Newtona dla całych tablic
+(półosie, mimośrody, czynniki prędkości orbitalnej, czasy). Każdy element
+kończy iteracje, gdy jego poprawka spadnie poniżej tolerance - dalsze
+kroki liczone są już tylko dla elementów, które jeszcze nie zbiegły.
+"""
+import numpy as np
+
+
+def solve_kepler(mean_anomaly, eccentricity, tolerance=1e-10, max_iterations=30):
+    """
+    Zwraca anomalię mimośrodową E dla tablic średniej anomalii M i mimośrodu e
+    (rozgłaszanych do wspólnego kształtu).
+    """
+    mean_anomaly, eccentricity = np.broadcast_arrays(np.asarray(mean_anomaly, dtype=np.float64),
+                                                     np.asarray(eccentricity, dtype=np.float64))
+    shape = mean_anomaly.shape
+    M = mean_anomaly.reshape(-1)
+    e = eccentricity.reshape(-1)
+
+    # Dla dużych mimośrodów start z pi zbiega pewniej niż z M
+    E_anomaly = np.where(e > 0.8, np.pi, M)
+    active = np.arange(M.shape[0])
+
+    for _ in range(max_iterations):
+        E_active = E_anomaly[active]
+        e_active = e[active]
+
+        delta = (E_active - e_active * np.sin(E_active) - M[active]) / (1 - e_active * np.cos(E_active))
+        E_anomaly[active] = E_active - delta
+
+        active = active[np.abs(delta) > tolerance]
+        if active.shape[0] == 0:
+            break
+
+    return E_anomaly.reshape(shape)
+
+
+def kepler_positions(A, eccentricity, time, orbit_speed_fac, tolerance=1e-10, max_iterations=30, out=None):
+    """
+    Pozycje ciał na elipsach w czasie time względem ogniska (0, 0, 0).
+
+    Argumenty mogą być tablicami (jedna wartość na ciało) lub liczbami.
+    Zwraca tablicę (liczba ciał, 3) z kolumnami x, y = 0, z; jeśli podano
+    out, wynik jest zapisywany do niej.
+    """
+    A, eccentricity, time, orbit_speed_fac = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (A, eccentricity, time, orbit_speed_fac)))
+
+    M = np.mod(time * orbit_speed_fac, 2 * np.pi)  # Średnia anomalia
+    E_anomaly = solve_kepler(M, eccentricity, tolerance, max_iterations)
+
+    if out is None:
+        out = np.empty((M.size, 3), dtype=np.float64)
+
+    out[:, 0] = (A * (np.cos(E_anomaly) - eccentricity)).reshape(-1)
+    out[:, 1] = 0.0
+    out[:, 2] = (A * np.sqrt(1 - eccentricity ** 2) * np.sin(E_anomaly)).reshape(-1)
+    return out
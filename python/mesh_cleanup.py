@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Czyszczenie siatki przed wysłaniem na GPU.
+
+Siatki z np.linspace(0, 1, N) mają w biegunach N kopii jednego punktu,
+a szew v = 0 / v = 1 powtarza cały rząd wierzchołków. clean_mesh():
+
+  - spawa wierzchołki z tej samej komórki kwantyzacji o boku tolerance
+    (topology.weld_vertices - kwantyzacja i sortowanie, bez porównywania
+    par, więc dokładne kopie biegunów i szwu); scalony wierzchołek
+    zachowuje atrybuty (kolor, normalną) pierwszego wystąpienia,
+  - usuwa z listy trójkątów trójkąty zdegenerowane: z powtórzonym
+    indeksem albo o zerowym polu,
+  - zapisuje indeksy jako uint16, jeśli liczba wierzchołków na to pozwala
+    (znacznik primitive restart staje się wtedy 0xFFFF).
+
+W paskach (GL_TRIANGLE_STRIP) wierzchołki są spawane tak samo, ale
+trójkąty zdegenerowane zostają - pasek potrzebuje ich do przejścia przez
+biegun, a GPU odrzuca je przed rasteryzacją. Raport cleanup_report()
+pokazuje liczby wierzchołków i trójkątów oraz pamięć buforów przed i po.
+"""
+import numpy as np
+
+from topology import sorted_unique, weld_vertices
+
+# Największy indeks uint16; przy primitive restart 0xFFFF jest znacznikiem
+UINT16_LIMIT = 0xFFFF
+
+
+def positions(vertices):
+    """ Pozycje (V, 3) z tablicy wierzchołków (zwykłej lub z interleave()) """
+    if vertices.dtype.names is None:
+        return vertices.reshape(-1, 3)
+    return vertices.reshape(-1)['position']
+
+
+def weld_mesh(vertices, indices, tolerance=1e-5, restart_index=None):
+    """
+    Spawa wierzchołki i przenumerowuje indeksy (znaczniki restart_index
+    zostają bez zmian). Zwraca (wierzchołki, indeksy int64).
+    """
+    flat = vertices.reshape(-1) if vertices.dtype.names is not None else vertices.reshape(-1, 3)
+    _, remap = weld_vertices(positions(vertices), tolerance)
+
+    # Nowe indeksy są numerowane w kolejności pierwszego wystąpienia
+    first = sorted_unique(remap)[1]
+
+    indices = np.asarray(indices).astype(np.int64)
+    welded = indices.copy()
+    keep = indices != restart_index if restart_index is not None else np.ones(indices.shape, dtype=bool)
+    welded[keep] = remap[indices[keep]]
+    return flat[first], welded
+
+
+def degenerate_triangles(points, triangles, tolerance=1e-5):
+    """ Maska trójkątów z powtórzonym indeksem albo o polu nie większym niż tolerance^2 """
+    repeated = ((triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) |
+                (triangles[:, 0] == triangles[:, 2]))
+
+    corners = points[triangles].astype(np.float64)
+    cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    area = 0.5 * np.sqrt((cross ** 2).sum(axis=1))
+    return repeated | (area <= tolerance ** 2)
+
+
+def strip_triangles(strip, restart_index=None):
+    """ Trójkąty (T, 3) paska: okna trzech kolejnych indeksów bez znacznika restart """
+    strip = np.asarray(strip).reshape(-1)
+    if strip.shape[0] < 3:
+        return np.empty((0, 3), dtype=strip.dtype)
+    windows = np.stack([strip[:-2], strip[1:-1], strip[2:]], axis=1)
+    if restart_index is not None:
+        windows = windows[(windows != restart_index).all(axis=1)]
+    return windows
+
+
+def compact_indices(indices, vertex_count, restart_index=None):
+    """
+    Indeksy jako uint16, jeśli wszystkie wierzchołki (i ewentualny znacznik
+    restart 0xFFFF) się mieszczą, inaczej uint32. Zwraca (indeksy, restart_index).
+    """
+    indices = np.asarray(indices)
+    limit = UINT16_LIMIT if restart_index is not None else UINT16_LIMIT + 1
+    if vertex_count > limit:
+        return indices.astype(np.uint32), restart_index
+
+    if restart_index is None:
+        return indices.astype(np.uint16), None
+    compact = np.where(indices == restart_index, UINT16_LIMIT, indices).astype(np.uint16)
+    return compact, UINT16_LIMIT
+
+
+def mesh_stats(vertices, indices, strip=False, restart_index=None):
+    """ Liczby wierzchołków i trójkątów (w tym zdegenerowanych) oraz pamięć buforów """
+    triangles = strip_triangles(indices, restart_index) if strip else np.asarray(indices).reshape(-1, 3)
+    degenerate = degenerate_triangles(positions(vertices), triangles.astype(np.int64))
+    return {
+        'vertices': vertices.size if vertices.dtype.names is not None else vertices.size // 3,
+        'triangles': triangles.shape[0],
+        'degenerate': int(degenerate.sum()),
+        'vertex_bytes': vertices.nbytes,
+        'index_bytes': np.asarray(indices).nbytes,
+    }
+
+
+def clean_mesh(vertices, indices, tolerance=1e-5, strip=False, restart_index=None):
+    """
+    Spawane wierzchołki, lista trójkątów bez zdegenerowanych (lub pasek)
+    i najmniejszy typ indeksów. Zwraca (wierzchołki, indeksy, restart_index,
+    (statystyki przed, statystyki po)).
+    """
+    before = mesh_stats(vertices, indices, strip, restart_index)
+    welded, indices = weld_mesh(vertices, indices, tolerance, restart_index)
+
+    if not strip:
+        triangles = indices.reshape(-1, 3)
+        indices = triangles[~degenerate_triangles(positions(welded), triangles, tolerance)]
+
+    indices, restart_index = compact_indices(indices, welded.shape[0], restart_index)
+    after = mesh_stats(welded, indices, strip, restart_index)
+    return welded, indices, restart_index, (before, after)
+
+
+def cleanup_report(stats, name='siatka'):
+    """ Tabela: wierzchołki, trójkąty (zdegenerowane) i pamięć buforów przed i po czyszczeniu """
+    before, after = stats
+    lines = [f"{name:<10} {'wierzchołki':>12} {'trójkąty':>9} {'zdegen.':>8} "
+             f"{'wierzch. [B]':>13} {'indeksy [B]':>12}"]
+    for label, row in (('przed', before), ('po', after)):
+        lines.append(f"{label:<10} {row['vertices']:>12} {row['triangles']:>9} {row['degenerate']:>8} "
+                     f"{row['vertex_bytes']:>13} {row['index_bytes']:>12}")
+
+    saved = (before['vertex_bytes'] + before['index_bytes']) - (after['vertex_bytes'] + after['index_bytes'])
+    total = before['vertex_bytes'] + before['index_bytes']
+    lines.append(f"oszczędność pamięci: {saved} B ({saved / max(total, 1):.1%}) - "
+                 f"wierzchołki {before['vertex_bytes'] - after['vertex_bytes']} B, "
+                 f"indeksy {before['index_bytes'] - after['index_bytes']} B")
+    return "\n".join(lines)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Współdzielone siatki (zasoby GPU) budowane raz na uruchomienie.
+
+Kilka ciał w scenie (Słońce i planety) korzysta z tej samej sfery: siatka
+jest liczona i wysyłana na GPU przy pierwszym użyciu, a kolejne wywołania
+sphere_mesh(n, radius) z tymi samymi parametrami zwracają ten sam obiekt
+Mesh (MESH_RESOURCES). release_meshes() usuwa wszystkie bufory. Sfera ma
+w buforze także normalne (do oświetlenia). Wierzchołki biegunów i szwu
+są spawane (mesh_cleanup), a statystyki czyszczenia trafiają do MESH_STATS.
+"""
+from runtime.gl import glPrimitiveRestartIndex, GL_TRIANGLE_STRIP
+
+from surface import evaluate_surface_normals, sphere
+from topology import grid_strip
+from geometry_cache import cached_geometry
+from mesh_cleanup import clean_mesh
+from gpu_buffers import Mesh, interleave
+
+# Znacznik primitive restart (największa wartość indeksu uint32)
+RESTART_INDEX = 0xFFFFFFFF
+
+# Klucz -> Mesh
+MESH_RESOURCES = {}
+
+# Klucz -> (statystyki przed, statystyki po) czyszczenia siatki
+MESH_STATS = {}
+
+
+def build_grid_mesh(vertices, normals=None, key=None):
+    """
+    Siatka (N, N, 3) jako jeden GL_TRIANGLE_STRIP po rzędach (jak w draw_sphere_model),
+    z normalnymi (N, N, 3) przeplecionymi z pozycjami, jeśli je podano.
+    Powtórzone wierzchołki są spawane; statystyki trafiają do MESH_STATS[key].
+    """
+    n = vertices.shape[0]
+    if normals is not None:
+        vertices = interleave(vertices, normal=normals)
+    restart_index = RESTART_INDEX if bool(glPrimitiveRestartIndex) else None
+    vertices, strip, restart_index, stats = clean_mesh(vertices, grid_strip(n, restart_index), strip=True,
+                                                       restart_index=restart_index)
+    MESH_STATS[key] = stats
+    return Mesh(vertices, strip, GL_TRIANGLE_STRIP, restart_index)
+
+
+def sphere_mesh(n, radius=1.0):
+    """ Współdzielona sfera o rozdzielczości n x n """
+    key = ('sphere', n, radius)
+    if key not in MESH_RESOURCES:
+        vertices, normals = cached_geometry('sphere-normals', evaluate_surface_normals, sphere, n, radius=radius)
+        MESH_RESOURCES[key] = build_grid_mesh(vertices, normals, key)
+    return MESH_RESOURCES[key]
+
+
+def release_meshes():
+    for mesh in MESH_RESOURCES.values():
+        mesh.delete()
+    MESH_RESOURCES.clear()
+    MESH_STATS.clear()
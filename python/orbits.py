@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Orbity jako gotowe łamane w buforach GPU.
+
+Parametry orbit (A, B, przesunięcie ogniska) się nie zmieniają, więc punkty
+elipsy liczymy raz, wysyłamy na GPU i w każdej klatce rysujemy jednym
+glDrawArrays(GL_LINE_LOOP). Bufory są trzymane w pamięci podręcznej LRU
+kluczowanej parametrami orbity i liczbą segmentów.
+
+Zamiast stałej liczby segmentów można podać dopuszczalny błąd cięciwy
+max_error - liczba segmentów wynika wtedy z błędu (zwykle z błędu
+w pikselach ekranu). Punkty są rozmieszczane adaptacyjnie (gęściej tam,
+gdzie elipsa jest mocno zakrzywiona, rzadziej na bokach) tylko wtedy, gdy
+to wyraźnie zmniejsza liczbę segmentów; dla orbit o małym mimośrodzie
+krzywizna jest prawie stała i równomierny podział jest tak samo dobry.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from runtime.gl import GL_LINE_LOOP
+
+from gpu_buffers import VertexBuffer
+
+# Rozmieszczenie adaptacyjne, jeśli potrzebuje najwyżej tej części
+# segmentów podziału równomiernego o tym samym błędzie
+ADAPTIVE_GAIN = 0.9
+
+
+def orbit_vertices(A, B, x_offset=0.0, segments=200, angle=None):
+    """
+    Punkty elipsy (segments, 3) w płaszczyźnie Y = 0, przesuniętej o x_offset
+    wzdłuż X; równomiernie w kącie albo w podanych kątach angle.
+    """
+    if angle is None:
+        angle = np.arange(segments) / segments * 2 * np.pi
+
+    vertices = np.zeros((angle.shape[0], 3), dtype=np.float32)
+    vertices[:, 0] = A * np.cos(angle) + x_offset
+    vertices[:, 2] = B * np.sin(angle)
+    return vertices
+
+
+def ortho_pixel_scale(width, height, half_extent):
+    """ Pikseli na jednostkę sceny dla glOrtho(+-half_extent) ustawianego w update_viewport() """
+    return min(max(width, 1), max(height, 1)) / (2.0 * half_extent)
+
+
+def segment_density(A, B, max_error, angle):
+    """
+    Liczba segmentów na radian kąta mimośrodowego, przy której strzałka
+    cięciwy nie przekracza max_error. Dla kroku d strzałka wynosi około
+    krzywizna * długość^2 / 8 = A * B * d^2 / (8 * |r'|), gdzie
+    |r'| = sqrt(A^2 sin^2 + B^2 cos^2).
+    """
+    speed = np.sqrt((A * np.sin(angle)) ** 2 + (B * np.cos(angle)) ** 2)
+    return np.sqrt(A * B / (8.0 * max_error * speed))
+
+
+def adaptive_angles(A, B, max_error, min_segments=8, samples=4096):
+    """ Kąty wierzchołków łamanej o błędzie <= max_error (rozkład wg gęstości segmentów) """
+    angle = np.linspace(0.0, 2 * np.pi, samples + 1)
+    density = segment_density(A, B, max_error, angle)
+
+    # Skumulowana "liczba segmentów" wzdłuż orbity (metoda trapezów)
+    cumulative = np.concatenate([[0.0], np.cumsum((density[1:] + density[:-1]) * 0.5 * (angle[1] - angle[0]))])
+
+    segments = max(min_segments, int(np.ceil(cumulative[-1])))
+    targets = np.arange(segments) * (cumulative[-1] / segments)
+    return np.interp(targets, cumulative, angle)
+
+
+def orbit_segments(A, B, max_error, min_segments=8):
+    """ Zwraca (segmenty adaptacyjne, segmenty równomierne) dla tego samego błędu """
+    adaptive = adaptive_angles(A, B, max_error, min_segments).shape[0]
+
+    # Równomierny podział musi spełnić błąd w najbardziej zakrzywionym miejscu
+    angle = np.linspace(0.0, 2 * np.pi, 4097)
+    uniform = int(np.ceil(2 * np.pi * segment_density(A, B, max_error, angle).max()))
+    return adaptive, max(min_segments, uniform)
+
+
+def orbit_angles(A, B, max_error, min_segments=8):
+    """ Kąty wierzchołków łamanej o błędzie <= max_error: adaptacyjne albo równomierne """
+    angle = adaptive_angles(A, B, max_error, min_segments)
+    _, uniform = orbit_segments(A, B, max_error, min_segments)
+    if angle.shape[0] <= ADAPTIVE_GAIN * uniform:
+        return angle
+    return np.arange(uniform) / uniform * 2 * np.pi
+
+
+class OrbitCache:
+    """
+    Bufory orbit kluczowane (A, B, x_offset, segments, max_error), najdawniej
+    użyte usuwane pierwsze. Z max_error liczba segmentów jest adaptacyjna.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.buffers = OrderedDict()
+
+    def get(self, A, B, x_offset=0.0, segments=200, max_error=None):
+        key = (float(A), float(B), float(x_offset), int(segments), max_error)
+        if key in self.buffers:
+            self.buffers.move_to_end(key)
+            return self.buffers[key]
+
+        angle = None if max_error is None else orbit_angles(A, B, max_error)
+        vertex_buffer = VertexBuffer(orbit_vertices(A, B, x_offset, segments, angle))
+        self.buffers[key] = vertex_buffer
+        if len(self.buffers) > self.capacity:
+            _, evicted = self.buffers.popitem(last=False)
+            evicted.delete()
+        return vertex_buffer
+
+    def draw(self, A, B, x_offset=0.0, segments=200, max_error=None):
+        """ Rysuje orbitę jednym wywołaniem GL_LINE_LOOP (kolor ustawia wywołujący) """
+        self.get(A, B, x_offset, segments, max_error).draw(GL_LINE_LOOP)
+
+    def clear(self):
+        for vertex_buffer in self.buffers.values():
+            vertex_buffer.delete()
+        self.buffers.clear()
+
+
+def segment_report(orbits, max_error, fixed_segments=None):
+    """
+    Opis liczby segmentów dla listy orbit (A, B): rysowane (orbit_angles()),
+    adaptacyjnie i równomiernie dla tego samego błędu oraz - jeśli podano
+    fixed_segments - ze stałą liczbą segmentów na orbitę.
+    """
+    drawn = sum(orbit_angles(A, B, max_error).shape[0] for A, B in orbits)
+    counts = [orbit_segments(A, B, max_error) for A, B in orbits]
+    adaptive = sum(count[0] for count in counts)
+    uniform = sum(count[1] for count in counts)
+    report = (f"Orbity: {drawn} segmentów (adaptacyjnie {adaptive}, równomiernie {uniform}, "
+              f"błąd {max_error:.4f})")
+    if fixed_segments is not None:
+        report += f", stała liczba {fixed_segments} na orbitę: {fixed_segments * len(orbits)}"
+    return report
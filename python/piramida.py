@@ -2,14 +2,21 @@
 import sys
 import numpy as np
 import math
+import time as timer
 
-from glfw.GLFW import *
+from sierpinski import build_pyramid, base_pyramid, pyramid_instances, PyramidLOD
+from sierpinski import INSTANCE_VERTEX_SHADER, INSTANCE_FRAGMENT_SHADER
+from geometry_cache import cached_geometry
+from gpu_buffers import VertexBuffer, interleave, compile_program, draw_instanced, instancing_supported
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from runtime import axes, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glDeleteProgram, glEnable, glFlush, glGetFloatv,
+                        glGetIntegerv, glLoadIdentity, glMatrixMode, glRotatef, GL_COLOR_BUFFER_BIT,
+                        GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST, GL_MODELVIEW, GL_MODELVIEW_MATRIX,
+                        GL_PROJECTION_MATRIX, GL_STREAM_DRAW, GL_TRIANGLES, GL_VIEWPORT)
 
 # Parametr programu: Stopień samopodobieństwa (liczba iteracji)
-MAX_RECURSION_LEVEL = 3  # 4 lub 5 też da radę
+MAX_RECURSION_LEVEL = 3  # geometria liczona raz, poziomy 7-8 też działają płynnie
 
 # Globalne definicje 5 wierzchołków i 5 kolorów dla bazowej piramidy
 V_APEX = np.array([0.0, 6.0, 0.0])
@@ -24,30 +31,80 @@ C_B2 = np.array([0.0, 1.0, 0.0])  # Zielony
 C_B3 = np.array([0.0, 0.0, 1.0])  # Niebieski
 C_B4 = np.array([1.0, 1.0, 0.0])  # Żółty
 
+# True - jedna bazowa piramida + bufor instancji (offset, skala, kolory
+# narożników) rysowane jednym glDrawArraysInstanced; False - pełne trójkąty
+INSTANCED = True
+
+# Poziom -> bufor wierzchołków z gotowymi trójkątami fraktala
+LEVEL_BUFFERS = {}
+
+# Poziom -> bufor instancji; program shaderów i bufor bazowej piramidy
+INSTANCE_BUFFERS = {}
+INSTANCE_PROGRAM = None
+BASE_BUFFER = None
+
+# Poziom szczegółowości: głębokość dobierana w każdej klatce osobno dla każdej
+# pod-piramidy (z jej rozmiaru na ekranie) i budżetu czasu klatki.
+# Wymaga instancjonowania; bez niego rysujemy stały MAX_RECURSION_LEVEL.
+LEVEL_OF_DETAIL = True
+LOD_MAX_LEVEL = 8
+LOD_PIXEL_THRESHOLD = 4.0  # pod-piramidy mniejsze niż tyle pikseli nie są dzielone
+LOD_FRAME_BUDGET_MS = 20.0
+
+# True - raport LOD co sekundę (python piramida.py --report)
+LOD_REPORT = False
+
+LOD = None
+LOD_BUFFER = None
+LAST_REPORT = 0.0
+LAST_FRAME = None  # perf_counter() na początku poprzedniej klatki z LOD
+
 
 def startup():
+    global INSTANCED, INSTANCE_PROGRAM, BASE_BUFFER, LEVEL_OF_DETAIL, LOD, LOD_BUFFER
+
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
     glEnable(GL_DEPTH_TEST)
 
+    # Bez wsparcia instancjonowania wracamy do pełnych trójkątów
+    INSTANCED = INSTANCED and instancing_supported()
+    if INSTANCED:
+        INSTANCE_PROGRAM = compile_program(INSTANCE_VERTEX_SHADER, INSTANCE_FRAGMENT_SHADER)
+        BASE_BUFFER = VertexBuffer(base_pyramid([V_APEX, V_B1, V_B2, V_B3, V_B4]))
+    else:
+        get_level_buffer(MAX_RECURSION_LEVEL)
+
+    LEVEL_OF_DETAIL = LEVEL_OF_DETAIL and INSTANCED
+    if LEVEL_OF_DETAIL:
+        LOD = PyramidLOD([V_APEX, V_B1, V_B2, V_B3, V_B4],
+                         [C_APEX, C_B1, C_B2, C_B3, C_B4],
+                         max_level=LOD_MAX_LEVEL,
+                         pixel_threshold=LOD_PIXEL_THRESHOLD,
+                         frame_budget_ms=LOD_FRAME_BUDGET_MS)
+        # Instancje zmieniają się co klatkę
+        LOD_BUFFER = VertexBuffer(usage=GL_STREAM_DRAW)
+    elif INSTANCED:
+        get_instance_buffer(MAX_RECURSION_LEVEL)
+
 
 def shutdown():
-    pass
+    global INSTANCE_PROGRAM, BASE_BUFFER, LAST_FRAME
+
+    LAST_FRAME = None
+
+    for vertex_buffer in list(LEVEL_BUFFERS.values()) + list(INSTANCE_BUFFERS.values()):
+        vertex_buffer.delete()
+    LEVEL_BUFFERS.clear()
+    INSTANCE_BUFFERS.clear()
 
+    if LOD_BUFFER is not None:
+        LOD_BUFFER.delete()
 
-def axes():
-    # ... (funkcja axes bez zmian)
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-7.5, 0.0, 0.0);
-    glVertex3f(7.5, 0.0, 0.0)
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -7.5, 0.0);
-    glVertex3f(0.0, 7.5, 0.0)
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -7.5);
-    glVertex3f(0.0, 0.0, 7.5)
-    glEnd()
+    if BASE_BUFFER is not None:
+        BASE_BUFFER.delete()
+        glDeleteProgram(INSTANCE_PROGRAM)
+        BASE_BUFFER = INSTANCE_PROGRAM = None
 
 
 def spin(angle):
@@ -61,118 +118,56 @@ def spin(angle):
 # NOWE FUNKCJE DLA OCENY 5.0 (Piramida Kwadratowa)
 # =================================================================
 
-def draw_pyramid(v_a, v_b1, v_b2, v_b3, v_b4, c_a, c_b1, c_b2, c_b3, c_b4):
-    """ Rysuje pojedynczą piramidę (4 ściany boczne + 2 trójkąty podstawy) """
-    glBegin(GL_TRIANGLES)
-
-    # Ściana 1 (Tył)
-    glColor3fv(c_a);
-    glVertex3fv(v_a)
-    glColor3fv(c_b1);
-    glVertex3fv(v_b1)
-    glColor3fv(c_b2);
-    glVertex3fv(v_b2)
-
-    # Ściana 2 (Prawa)
-    glColor3fv(c_a);
-    glVertex3fv(v_a)
-    glColor3fv(c_b2);
-    glVertex3fv(v_b2)
-    glColor3fv(c_b3);
-    glVertex3fv(v_b3)
-
-    # Ściana 3 (Przód)
-    glColor3fv(c_a);
-    glVertex3fv(v_a)
-    glColor3fv(c_b3);
-    glVertex3fv(v_b3)
-    glColor3fv(c_b4);
-    glVertex3fv(v_b4)
-
-    # Ściana 4 (Lewa)
-    glColor3fv(c_a);
-    glVertex3fv(v_a)
-    glColor3fv(c_b4);
-    glVertex3fv(v_b4)
-    glColor3fv(c_b1);
-    glVertex3fv(v_b1)
-
-    # Podstawa (dwa trójkąty)
-    glColor3fv(c_b1);
-    glVertex3fv(v_b1)
-    glColor3fv(c_b3);
-    glVertex3fv(v_b3)
-    glColor3fv(c_b2);
-    glVertex3fv(v_b2)
-
-    glColor3fv(c_b1);
-    glVertex3fv(v_b1)
-    glColor3fv(c_b4);
-    glVertex3fv(v_b4)
-    glColor3fv(c_b3);
-    glVertex3fv(v_b3)
-
-    glEnd()
-
-
-def draw_sierpinski_pyramid(v_a, v_b1, v_b2, v_b3, v_b4, c_a, c_b1, c_b2, c_b3, c_b4, level):
-    """ Funkcja rekurencyjna generująca fraktal piramidy """
-
-    # 1. Warunek bazowy (zatrzymania)
-    if level == 0:
-        draw_pyramid(v_a, v_b1, v_b2, v_b3, v_b4, c_a, c_b1, c_b2, c_b3, c_b4)
-        return
-
-    # 2. Obliczanie punktów środkowych
-    # 4 mid-points na krawędziach bocznych (do wierzchołka)
-    m_a1 = (v_a + v_b1) / 2.0;
-    m_a2 = (v_a + v_b2) / 2.0
-    m_a3 = (v_a + v_b3) / 2.0;
-    m_a4 = (v_a + v_b4) / 2.0
-
-    # 4 mid-points na krawędziach podstawy
-    m_b12 = (v_b1 + v_b2) / 2.0;
-    m_b23 = (v_b2 + v_b3) / 2.0
-    m_b34 = (v_b3 + v_b4) / 2.0;
-    m_b41 = (v_b4 + v_b1) / 2.0
-
-    # 1 mid-point w centrum podstawy
-    m_bc = (v_b1 + v_b2 + v_b3 + v_b4) / 4.0
-
-    # Obliczanie kolorów środkowych (interpolacja)
-    mc_a1 = (c_a + c_b1) / 2.0;
-    mc_a2 = (c_a + c_b2) / 2.0
-    mc_a3 = (c_a + c_b3) / 2.0;
-    mc_a4 = (c_a + c_b4) / 2.0
-    mc_b12 = (c_b1 + c_b2) / 2.0;
-    mc_b23 = (c_b2 + c_b3) / 2.0
-    mc_b34 = (c_b3 + c_b4) / 2.0;
-    mc_b41 = (c_b4 + c_b1) / 2.0
-    mc_bc = (c_b1 + c_b2 + c_b3 + c_b4) / 4.0
-
-    new_level = level - 1
-
-    # 3. Wywołania rekurencyjne dla 5 mniejszych piramid
-
-    # Piramida 1 (Górna)
-    draw_sierpinski_pyramid(v_a, m_a1, m_a2, m_a3, m_a4,
-                            c_a, mc_a1, mc_a2, mc_a3, mc_a4, new_level)
-
-    # Piramida 2 (Narożnik 1)
-    draw_sierpinski_pyramid(m_a1, v_b1, m_b12, m_bc, m_b41,
-                            mc_a1, c_b1, mc_b12, mc_bc, mc_b41, new_level)
-
-    # Piramida 3 (Narożnik 2)
-    draw_sierpinski_pyramid(m_a2, m_b12, v_b2, m_b23, m_bc,
-                            mc_a2, mc_b12, c_b2, mc_b23, mc_bc, new_level)
-
-    # Piramida 4 (Narożnik 3)
-    draw_sierpinski_pyramid(m_a3, m_bc, m_b23, v_b3, m_b34,
-                            mc_a3, mc_bc, mc_b23, c_b3, mc_b34, new_level)
-
-    # Piramida 5 (Narożnik 4)
-    draw_sierpinski_pyramid(m_a4, m_b41, m_bc, m_b34, v_b4,
-                            mc_a4, mc_b41, mc_bc, mc_b34, c_b4, new_level)
+def get_level_buffer(level):
+    """ Zwraca bufor GPU z piramidą danego poziomu (liczoną i wysyłaną tylko raz) """
+    if level not in LEVEL_BUFFERS:
+        positions, colors = cached_geometry('pyramid', build_pyramid, level,
+                                            [V_APEX, V_B1, V_B2, V_B3, V_B4],
+                                            [C_APEX, C_B1, C_B2, C_B3, C_B4])
+        LEVEL_BUFFERS[level] = VertexBuffer(interleave(positions, colors))
+    return LEVEL_BUFFERS[level]
+
+
+def get_instance_buffer(level):
+    """ Zwraca bufor instancji (offset, skala, 5 kolorów) dla 5^level liści """
+    if level not in INSTANCE_BUFFERS:
+        instances = cached_geometry('pyramid-instances', pyramid_instances, level,
+                                    [V_APEX, V_B1, V_B2, V_B3, V_B4],
+                                    [C_APEX, C_B1, C_B2, C_B3, C_B4])
+        INSTANCE_BUFFERS[level] = VertexBuffer(instances)
+    return INSTANCE_BUFFERS[level]
+
+
+def draw_sierpinski_pyramid(level):
+    """ Rysuje fraktal: 5^level piramid jednym wywołaniem (instancyjnym lub glDrawArrays) """
+    if INSTANCED:
+        draw_instanced(INSTANCE_PROGRAM, GL_TRIANGLES, BASE_BUFFER, get_instance_buffer(level))
+    else:
+        get_level_buffer(level).draw(GL_TRIANGLES)
+
+
+def draw_level_of_detail(time):
+    """
+    Rysuje fraktal z głębokością dobraną przez LOD. Budżet dostraja
+    rzeczywisty czas poprzedniej klatki - od jednego render() do
+    następnego, czyli razem z pracą GPU i zamianą buforów - a nie krok
+    zegara animacji, który w headless.py i benchmark.py jest stały.
+    """
+    global LAST_REPORT, LAST_FRAME
+
+    now = timer.perf_counter()
+    if LAST_FRAME is not None:
+        LOD.update((now - LAST_FRAME) * 1000.0)
+    LAST_FRAME = now
+
+    mvp = glGetFloatv(GL_MODELVIEW_MATRIX) @ glGetFloatv(GL_PROJECTION_MATRIX)
+    LOD_BUFFER.upload(LOD.select(mvp, glGetIntegerv(GL_VIEWPORT)))
+    draw_instanced(INSTANCE_PROGRAM, GL_TRIANGLES, BASE_BUFFER, LOD_BUFFER)
+
+    if LOD_REPORT and time - LAST_REPORT >= 1.0:
+        LAST_REPORT = time
+        print(f"LOD: poziom {LOD.depth}, piramidy {LOD.pyramids}, trójkąty {LOD.triangles}, "
+              f"próg {LOD.pixel_threshold:.1f} px")
 
 
 def render(time):
@@ -183,49 +178,29 @@ def render(time):
     angle = time * 180 / math.pi
     spin(angle)
 
-    axes()
+    with profiled('osie'):
+        axes(7.5)
 
     # Wywołanie głównej funkcji rysującej fraktal
-    draw_sierpinski_pyramid(V_APEX, V_B1, V_B2, V_B3, V_B4,
-                            C_APEX, C_B1, C_B2, C_B3, C_B4,
-                            MAX_RECURSION_LEVEL)
+    with profiled('piramida'):
+        if LEVEL_OF_DETAIL:
+            draw_level_of_detail(time)
+        else:
+            draw_sierpinski_pyramid(MAX_RECURSION_LEVEL)
 
     glFlush()
 
 
 def update_viewport(window, width, height):
-    # ... (funkcja update_viewport bez zmian, zakres [-10, 10] pasuje)
-    if height == 0: height = 1
-    if width == 0: width = 1
-    aspect_ratio = width / height
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-    if width <= height:
-        glOrtho(-10.0, 10.0, -10.0 / aspect_ratio, 10.0 / aspect_ratio, -15.0, 15.0)
-    else:
-        glOrtho(-10.0 * aspect_ratio, 10.0 * aspect_ratio, -10.0, 10.0, -15.0, 15.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    # Zakres [-10, 10] pasuje do piramidy
+    ortho_viewport(width, height, 10.0, -15.0, 15.0)
 
 
 def main():
-    # ... (funkcja main bez zmian)
-    if not glfwInit(): sys.exit(-1)
-    window = glfwCreateWindow(400, 400, "Lab 3: Piramida Sierpińskiego (5.0)", None, None)
-    if not window: glfwTerminate(); sys.exit(-1)
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
-    startup()
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
-    shutdown()
-    glfwTerminate()
+    global LOD_REPORT
+
+    LOD_REPORT = '--report' in sys.argv
+    run(sys.modules[__name__], "Lab 3: Piramida Sierpińskiego (5.0)")
 
 
 if __name__ == '__main__':
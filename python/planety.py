@@ -3,12 +3,25 @@ import sys
 import numpy as np
 import math
 
-from glfw.GLFW import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from kepler import kepler_positions
+from orbits import OrbitCache, ortho_pixel_scale, segment_report
+from meshes import MESH_STATS, sphere_mesh, release_meshes
+from mesh_cleanup import cleanup_report
+from belt import AsteroidBelt, frame_time_report
+from simulation import FixedStepSimulation
+
+from runtime import axes, light_position, lighting, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glColor3f, glDisable, glEnable, glFlush,
+                        glLoadIdentity, glMatrixMode, glPopMatrix, glPushMatrix, glRotatef, glScalef,
+                        glTranslatef, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST,
+                        GL_LIGHTING, GL_MODELVIEW)
 
 N = 20
-VERTICES = np.zeros((N, N, 3))
+SPHERE_MESH = None  # współdzielona sfera na GPU (Słońce i planety)
+
+# Planety oświetlone ze Słońca (normalne sfery są w jej buforze);
+# samo Słońce i orbity bez oświetlenia
+LIGHTING = True
 
 # Stałe fizyczne
 G_GRAV = 1.0   # stała grawitacji (uproszczona)
@@ -28,100 +41,104 @@ B2 = A2 * math.sqrt(1 - E2 ** 2)
 FOCAL_DIST_2 = A2 * E2
 ORBIT_SPEED_FAC_2 = math.sqrt(G_GRAV * M_SUN / (A2 ** 3))
 
+# Orbity jako bufory na GPU (tworzone przy pierwszym rysowaniu)
+ORBIT_CACHE = None
+
+# Połowa boku rzutni ortogonalnej (glOrtho +-ORTHO_EXTENT) - także skala błędu w pikselach
+ORTHO_EXTENT = 12.0
+
+# Dopuszczalny błąd łamanej orbity w pikselach; w jednostkach sceny
+# przeliczany w update_viewport() z bieżącego rzutowania
+ORBIT_PIXEL_ERROR = 0.5
+ORBIT_MAX_ERROR = 0.05
+
+# True - opis liczby segmentów orbit po każdej zmianie rozmiaru okna (--report)
+ORBIT_REPORT = False
+
+# True - raport czyszczenia siatki sfery w startup() (--report)
+MESH_REPORT = False
+
+# Pas planetoid: liczba ciał o losowych orbitach (0 - wyłączony).
+# python planety.py --belt 100000 albo --belt-report (raport czasu klatki)
+BELT_SIZE = 0
+BELT = None
+
+# Pozycje ciał liczone ze stałym krokiem w osobnym wątku, render() tylko
+# interpoluje (python planety.py --threaded). Domyślnie False - pozycje
+# liczone w render() z czasu klatki, więc headless.py i benchmark.py
+# rysują zawsze to samo
+THREADED_SIMULATION = False
+SIMULATION_DT = 1.0 / 120.0
+SIMULATION = None
+SIMULATION_BELT = None  # pas, dla którego uruchomiono symulację
+
 
 def startup():
-    global VERTICES, N
+    global SPHERE_MESH, ORBIT_CACHE, BELT
 
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
     glEnable(GL_DEPTH_TEST)
+    lighting()
 
-    u_values = np.linspace(0.0, 1.0, N)
-    v_values = np.linspace(0.0, 1.0, N)
-    pi = np.pi
-    radius = 1.0
-
-    for i in range(N):
-        for j in range(N):
-            phi = u_values[i] * pi
-            theta = v_values[j] * 2 * pi
-            x = radius * math.sin(phi) * math.cos(theta)
-            y = radius * math.cos(phi)
-            z = radius * math.sin(phi) * math.sin(theta)
-            VERTICES[i][j] = [x, y, z]
+    SPHERE_MESH = sphere_mesh(N)
+    if MESH_REPORT:
+        print(cleanup_report(MESH_STATS[('sphere', N, 1.0)], 'sfera'))
+    ORBIT_CACHE = OrbitCache()
+    if BELT_SIZE > 0:
+        BELT = AsteroidBelt(BELT_SIZE)
 
 
 def shutdown():
-    pass
+    stop_simulation()
+    if ORBIT_CACHE is not None:
+        ORBIT_CACHE.clear()
+    if BELT is not None:
+        BELT.delete()
+    release_meshes()
 
 
-def axes():
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-12.0, 0.0, 0.0)
-    glVertex3f(12.0, 0.0, 0.0)
+def simulate(time, out, belt):
+    """ Stan ciał w chwili time: wiersze 0-1 to planety, dalej pas planetoid """
+    kepler_positions([A1, A2], [E1, E2], time, [ORBIT_SPEED_FAC_1, ORBIT_SPEED_FAC_2], out=out[:2])
+    if belt is not None:
+        belt.positions(time, out[2:])
 
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -12.0, 0.0)
-    glVertex3f(0.0, 12.0, 0.0)
 
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -12.0)
-    glVertex3f(0.0, 0.0, 12.0)
-    glEnd()
+def start_simulation(time):
+    global SIMULATION, SIMULATION_BELT
 
-
-def rotate_view(angle):
-    glRotatef(30.0, 1.0, 0.0, 0.0)
-    glRotatef(angle, 0.0, 1.0, 0.0)
+    stop_simulation()
+    belt = BELT
+    count = 2 + (belt.count if belt is not None else 0)
+    SIMULATION = FixedStepSimulation(lambda step_time, out: simulate(step_time, out, belt), count, SIMULATION_DT)
+    SIMULATION_BELT = belt
+    SIMULATION.start(time)
 
 
-def draw_sphere_model():
-    global VERTICES, N
-    for i in range(N - 1):
-        glBegin(GL_TRIANGLE_STRIP)
-        for j in range(N):
-            glVertex3fv(VERTICES[i][j])
-            glVertex3fv(VERTICES[i + 1][j])
-        glEnd()
-
+def stop_simulation():
+    global SIMULATION
 
-def get_kepler_position(A, eccentricity, time, orbit_speed_fac):
-    """
-    Oblicza pozycję planety (x, z) na elipsie w czasie 'time' względem ogniska (0,0),
-    zgodnie z równaniami Keplera.
-    """
+    if SIMULATION is not None:
+        SIMULATION.stop()
+        SIMULATION = None
 
-    M = (time * orbit_speed_fac) % (2 * math.pi) # Średnia anomalia
 
-    # Iteracyjne rozwiązanie równania Keplera: M = E - e*sin(E)
-    E_anomaly = M
-    for _ in range(10):
-        E_anomaly = E_anomaly - (E_anomaly - eccentricity * math.sin(E_anomaly) - M) / (1 - eccentricity * math.cos(E_anomaly))
+def rotate_view(angle):
+    glRotatef(30.0, 1.0, 0.0, 0.0)
+    glRotatef(angle, 0.0, 1.0, 0.0)
 
-    # Pozycja planety (ognisko w (0,0))
-    x_pos = A * (math.cos(E_anomaly) - eccentricity)
-    z_pos = A * math.sqrt(1 - eccentricity ** 2) * math.sin(E_anomaly)
 
-    return x_pos, z_pos
+def draw_sphere_model():
+    # Sfera jest już na GPU - ciało zmienia tylko macierz i kolor przed wywołaniem
+    SPHERE_MESH.draw()
 
 
 def draw_orbit(A, B, FOCAL_DIST):
 
-    # Rysuje elipsę z ogniskiem w (0,0)
-    glBegin(GL_LINE_LOOP)
+    # Rysuje elipsę z ogniskiem w (0,0) - gotowy bufor, jedno wywołanie
     glColor3f(0.5, 0.5, 0.5)
-
-    segments = 200
-    for i in range(segments):
-        angle = (i / segments) * 2 * math.pi
-        x_ellip = A * math.cos(angle)
-        z_ellip = B * math.sin(angle)
-        x = x_ellip - FOCAL_DIST
-        z = z_ellip
-        glVertex3f(x, 0.0, z)
-
-    glEnd()
+    ORBIT_CACHE.draw(A, B, -FOCAL_DIST, max_error=ORBIT_MAX_ERROR)
 
 
 def render(time):
@@ -132,80 +149,92 @@ def render(time):
     angle = time * 10.0
     rotate_view(angle)
 
-    axes()
+    with profiled('osie'):
+        axes(12.0)
+
+    # Światło punktowe w środku Słońca (po obrocie widoku, w układzie sceny)
+    light_position((0.0, 0.0, 0.0, 1.0))
 
     # === Słońce ===
     glPushMatrix()
     glColor3f(1.0, 1.0, 0.0)
     glScalef(1.5, 1.5, 1.5)
-    draw_sphere_model()
+    with profiled('Słońce'):
+        draw_sphere_model()
     glPopMatrix()
 
+    # Pozycje obu planet: z symulacji w tle albo jednym wywołaniem tutaj
+    if THREADED_SIMULATION:
+        if SIMULATION is None or SIMULATION_BELT is not BELT:
+            start_simulation(time)
+        positions = SIMULATION.sample(time, rows=slice(0, 2))
+    else:
+        positions = kepler_positions([A1, A2], [E1, E2], time, [ORBIT_SPEED_FAC_1, ORBIT_SPEED_FAC_2])
+
     # === Planeta 1 (niebieska) ===
-    draw_orbit(A1, B1, FOCAL_DIST_1)
-    planet_x_1, planet_z_1 = get_kepler_position(A1, E1, time, ORBIT_SPEED_FAC_1)
+    with profiled('orbita 1'):
+        draw_orbit(A1, B1, FOCAL_DIST_1)
+    planet_x_1, _, planet_z_1 = positions[0]
 
     glPushMatrix()
     glTranslatef(planet_x_1, 0.0, planet_z_1)
     glColor3f(0.2, 0.5, 1.0)
-    draw_sphere_model()
+    if LIGHTING:
+        glEnable(GL_LIGHTING)
+    with profiled('planeta 1'):
+        draw_sphere_model()
+    glDisable(GL_LIGHTING)
     glPopMatrix()
 
     # === Planeta 2 (czerwona) ===
-    draw_orbit(A2, B2, FOCAL_DIST_2)
-    planet_x_2, planet_z_2 = get_kepler_position(A2, E2, time, ORBIT_SPEED_FAC_2)
+    with profiled('orbita 2'):
+        draw_orbit(A2, B2, FOCAL_DIST_2)
+    planet_x_2, _, planet_z_2 = positions[1]
 
     glPushMatrix()
     glTranslatef(planet_x_2, 0.0, planet_z_2)
     glColor3f(1.0, 0.3, 0.2)
     glScalef(0.8, 0.8, 0.8)
-    draw_sphere_model()
+    if LIGHTING:
+        glEnable(GL_LIGHTING)
+    with profiled('planeta 2'):
+        draw_sphere_model()
+    glDisable(GL_LIGHTING)
     glPopMatrix()
 
+    # === Pas planetoid (jedno wywołanie instancyjne) ===
+    if BELT is not None:
+        with profiled('pas planetoid'):
+            BELT.draw(time, SIMULATION, slice(2, None))
+
     glFlush()
 
 
 def update_viewport(window, width, height):
-    if height == 0:
-        height = 1
-    if width == 0:
-        width = 1
-    aspect_ratio = width / height
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-    if width <= height:
-        glOrtho(-12.0, 12.0, -12.0 / aspect_ratio, 12.0 / aspect_ratio, -20.0, 20.0)
-    else:
-        glOrtho(-12.0 * aspect_ratio, 12.0 * aspect_ratio, -12.0, 12.0, -20.0, 20.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    global ORBIT_MAX_ERROR
 
+    max_error = ORBIT_PIXEL_ERROR / ortho_pixel_scale(width, height, ORTHO_EXTENT)
+    if max_error != ORBIT_MAX_ERROR:
+        ORBIT_MAX_ERROR = max_error
+        if ORBIT_REPORT:
+            print(segment_report([(A1, B1), (A2, B2)], ORBIT_MAX_ERROR, fixed_segments=200))
+    ortho_viewport(width, height, ORTHO_EXTENT, -20.0, 20.0)
 
-def main():
-    if not glfwInit():
-        sys.exit(-1)
-
-    window = glfwCreateWindow(400, 400, "Planety, 5.0", None, None)
-    if not window:
-        glfwTerminate()
-        sys.exit(-1)
 
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
+def main():
+    global BELT_SIZE, ORBIT_REPORT, MESH_REPORT, THREADED_SIMULATION
 
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
-    startup()
+    ORBIT_REPORT = MESH_REPORT = '--report' in sys.argv
+    THREADED_SIMULATION = '--threaded' in sys.argv
 
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
+    if '--belt' in sys.argv:
+        BELT_SIZE = int(sys.argv[sys.argv.index('--belt') + 1])
 
-    shutdown()
-    glfwTerminate()
+    scene = sys.modules[__name__]
+    if '--belt-report' in sys.argv:
+        run(scene, "Planety, 5.0", swap_interval=0, task=lambda: frame_time_report(scene))
+    else:
+        run(scene, "Planety, 5.0")
 
 
 if __name__ == '__main__':
@@ -3,46 +3,33 @@ import sys
 import numpy as np
 import math
 
-from glfw.GLFW import *
+from meshes import sphere_mesh, release_meshes
+from orbits import OrbitCache, ortho_pixel_scale
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from runtime import axes, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glColor3f, glEnable, glFlush, glLoadIdentity,
+                        glMatrixMode, glPopMatrix, glPushMatrix, glRotatef, glScalef, glTranslatef,
+                        GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST, GL_MODELVIEW)
 
 N = 20  # Rozdzielczość siatki sfery
-VERTICES = np.zeros((N, N, 3))
+SPHERE_MESH = None  # współdzielona sfera na GPU (Słońce i planety)
+ORBIT_CACHE = None  # bufory orbit na GPU
+ORTHO_EXTENT = 12.0  # glOrtho +-ORTHO_EXTENT, także skala błędu w pikselach
+ORBIT_PIXEL_ERROR = 0.5  # dopuszczalny błąd łamanej orbity w pikselach
+ORBIT_MAX_ERROR = 0.05  # to samo w jednostkach sceny (z update_viewport)
 
 def startup():
-    global VERTICES, N
+    global SPHERE_MESH, ORBIT_CACHE
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
     glEnable(GL_DEPTH_TEST)
-    u_values = np.linspace(0.0, 1.0, N)
-    v_values = np.linspace(0.0, 1.0, N)
-    pi = np.pi
-    radius = 1.0
-    for i in range(N):
-        for j in range(N):
-            phi = u_values[i] * pi
-            theta = v_values[j] * 2 * pi
-            x = radius * math.sin(phi) * math.cos(theta)
-            y = radius * math.cos(phi)
-            z = radius * math.sin(phi) * math.sin(theta)
-            VERTICES[i][j][0] = x
-            VERTICES[i][j][1] = y
-            VERTICES[i][j][2] = z
+    SPHERE_MESH = sphere_mesh(N)
+    ORBIT_CACHE = OrbitCache()
 
 def shutdown():
-    pass
-
-def axes():
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-7.5, 0.0, 0.0); glVertex3f(7.5, 0.0, 0.0)
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -7.5, 0.0); glVertex3f(0.0, 7.5, 0.0)
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -7.5); glVertex3f(0.0, 0.0, 7.5)
-    glEnd()
+    if ORBIT_CACHE is not None:
+        ORBIT_CACHE.clear()
+    release_meshes()
 
 def spin(angle):
     glRotatef(angle, 1.0, 0.0, 0.0)
@@ -50,28 +37,16 @@ def spin(angle):
     glRotatef(angle, 0.0, 0.0, 1.0)
 
 def draw_sphere_model():
-    global VERTICES, N
-    for i in range(N - 1):
-        glBegin(GL_TRIANGLE_STRIP)
-        for j in range(N):
-            glVertex3fv(VERTICES[i][j])
-            glVertex3fv(VERTICES[i + 1][j])
-        glEnd()
+    # Sfera jest już na GPU - ciało zmienia tylko macierz i kolor przed wywołaniem
+    SPHERE_MESH.draw()
 
 def draw_orbit(radius_a, radius_b):
     # Rysuje elipsę w płaszczyźnie XZ (orbita)
-    glBegin(GL_LINE_LOOP)
     glColor3f(0.5, 0.5, 0.5) # Szary
 
-    segments = 100
-    for i in range(segments):
-        angle = (i / segments) * 2 * math.pi
-        # Używam różnych promieni dla X i Z
-        x = radius_a * math.cos(angle)
-        z = radius_b * math.sin(angle)
-        glVertex3f(x, 0.0, z) # Rysujemy na płaszczyźnie Y=0
-
-    glEnd()
+    # Używam różnych promieni dla X i Z; punkty liczone raz i trzymane na GPU,
+    # rozmieszczone tak, by błąd łamanej nie przekraczał ORBIT_PIXEL_ERROR
+    ORBIT_CACHE.draw(radius_a, radius_b, 0.0, max_error=ORBIT_MAX_ERROR)
 
 def render(time):
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -81,13 +56,15 @@ def render(time):
     angle = time * 30.0
     spin(angle)
 
-    axes()
+    with profiled('osie'):
+        axes(7.5)
 
     # Słońce (w centrum)
     glPushMatrix()
     glColor3f(1.0, 1.0, 0.0)
     glScalef(1.5, 1.5, 1.5)
-    draw_sphere_model()
+    with profiled('Słońce'):
+        draw_sphere_model()
     glPopMatrix()
 
     # PLANETA 1 (Niebieska)
@@ -99,7 +76,8 @@ def render(time):
 
     # Orbita eliptyczną 1
     glPushMatrix()
-    draw_orbit(orbit_radius_a_1, orbit_radius_b_1)
+    with profiled('orbita 1'):
+        draw_orbit(orbit_radius_a_1, orbit_radius_b_1)
     glPopMatrix()
 
     # Planetę 1 (ruch po elipsie)
@@ -113,7 +91,8 @@ def render(time):
     glRotatef(time * 100.0, 0.0, 1.0, 0.0)
 
     glColor3f(0.2, 0.5, 1.0)
-    draw_sphere_model()
+    with profiled('planeta 1'):
+        draw_sphere_model()
     glPopMatrix()
 
     # PLANETA 2 (Czerwona)
@@ -124,7 +103,8 @@ def render(time):
 
     # Orbita 2 (eliptyczną)
     glPushMatrix()
-    draw_orbit(orbit_radius_a_2, orbit_radius_b_2)
+    with profiled('orbita 2'):
+        draw_orbit(orbit_radius_a_2, orbit_radius_b_2)
     glPopMatrix()
 
     # Planeta 2 (ruch po elipsie)
@@ -138,44 +118,22 @@ def render(time):
 
     glColor3f(1.0, 0.3, 0.2) # Czerwony/Pomarańczowy
     glScalef(0.7, 0.7, 0.7)  # Mniejsza planeta
-    draw_sphere_model()
+    with profiled('planeta 2'):
+        draw_sphere_model()
     glPopMatrix()
 
     glFlush()
 
 
 def update_viewport(window, width, height):
+    global ORBIT_MAX_ERROR
     # Zwiększam nieco zakres, aby zmieścić większe orbity
-    if height == 0: height = 1
-    if width == 0: width = 1
-    aspect_ratio = width / height
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-    if width <= height:
-        glOrtho(-12.0, 12.0, -12.0 / aspect_ratio, 12.0 / aspect_ratio, -20.0, 20.0)
-    else:
-        glOrtho(-12.0 * aspect_ratio, 12.0 * aspect_ratio, -12.0, 12.0, -20.0, 20.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    ORBIT_MAX_ERROR = ORBIT_PIXEL_ERROR / ortho_pixel_scale(width, height, ORTHO_EXTENT)
+    ortho_viewport(width, height, ORTHO_EXTENT, -20.0, 20.0)
 
 
 def main():
-    if not glfwInit(): sys.exit(-1)
-    window = glfwCreateWindow(400, 400, "Planety", None, None)
-    if not window: glfwTerminate(); sys.exit(-1)
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
-    startup()
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
-    shutdown()
-    glfwTerminate()
+    run(sys.modules[__name__], "Planety")
 
 
 if __name__ == '__main__':
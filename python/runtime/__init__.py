@@ -0,0 +1,31 @@
+"""
+Wspólne środowisko uruchomieniowe scen.
+
+  - runtime.gl - leniwe punkty wejścia OpenGL (wczytywane tylko nazwy
+    użyte przez scenę, zamiast `from OpenGL.GL import *`),
+  - runtime.scene - osie, rzutnia ortogonalna, oświetlenie i pętla okna GLFW,
+  - runtime.counters - opcjonalne liczniki wywołań GL na klatkę,
+  - runtime.profiler - opcjonalne pomiary czasu CPU i GPU przebiegów klatki.
+
+Eksportowane nazwy są wczytywane z modułów przy pierwszym użyciu, żeby
+`from runtime import counters` nie importowało OpenGL przed wyborem
+platformy (headless.configure()).
+"""
+import importlib
+
+# Nazwa -> moduł, z którego pochodzi
+EXPORTS = {
+    'axes': 'runtime.scene',
+    'ortho_viewport': 'runtime.scene',
+    'lighting': 'runtime.scene',
+    'light_position': 'runtime.scene',
+    'run': 'runtime.scene',
+    'profiled': 'runtime.profiler',
+}
+
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(EXPORTS[name]), name)
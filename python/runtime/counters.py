@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Liczniki wywołań OpenGL na klatkę (opcjonalne).
+
+Po włączeniu każda funkcja GL pobrana z runtime.gl (oraz surowe funkcje
+z gpu_buffers) jest opakowana licznikiem. Dla każdej klatki zliczane są:
+
+  - wywołania każdej funkcji,
+  - wierzchołki wysłane do GL (glVertex* oraz count z glDraw*,
+    pomnożone przez liczbę instancji),
+  - wywołania rysujące (glDraw* i pary glBegin/glEnd),
+  - zmiany stanu (glEnable, glBind*, macierze, wskaźniki tablic,
+    glColor* poza glBegin/glEnd, ...).
+
+Liczniki trzeba włączyć przed wczytaniem sceny, bo scena wiąże nazwy GL
+przy imporcie:
+
+    GL_COUNTERS=1 python zad4.0.py         # tabela po zamknięciu okna
+    python headless.py zad4.0.py --frames 3 --counters
+
+Bez GL_COUNTERS funkcje nie są opakowywane i nic nie kosztują.
+"""
+import os
+import sys
+from collections import Counter, deque
+
+ENABLED = os.environ.get('GL_COUNTERS', '') not in ('', '0')
+
+# Liczba ostatnich klatek trzymanych w historii
+HISTORY = 1000
+
+# Funkcja rysująca -> indeks argumentu z liczbą wierzchołków (None - glBegin)
+DRAW_CALLS = {
+    'glBegin': None,
+    'glDrawArrays': 2,
+    'glDrawElements': 1,
+    'glDrawArraysInstanced': 2,
+    'glDrawElementsInstanced': 1,
+}
+
+# Liczba instancji jest ostatnim argumentem
+INSTANCED_CALLS = ('glDrawArraysInstanced', 'glDrawElementsInstanced')
+
+# Atrybuty wierzchołka: wewnątrz glBegin/glEnd należą do wierzchołka,
+# poza nim zmieniają bieżący stan
+VERTEX_ATTRIBUTES = ('glColor', 'glNormal', 'glTexCoord')
+
+STATE_CHANGES = ('glEnable', 'glDisable', 'glBind', 'glUseProgram', 'glMatrixMode', 'glLoadIdentity',
+                 'glLoadMatrix', 'glMultMatrix', 'glPushMatrix', 'glPopMatrix', 'glRotate', 'glTranslate',
+                 'glScale', 'glOrtho', 'glFrustum', 'glViewport', 'glClearColor', 'glPixelStore',
+                 'glPrimitiveRestartIndex', 'glVertexPointer', 'glColorPointer', 'glNormalPointer',
+                 'glVertexAttribPointer', 'glVertexAttribDivisor', 'glUniform', 'glPolygonMode',
+                 'glLineWidth', 'glPointSize', 'glShadeModel', 'glLight', 'glMaterial', 'glBlendFunc',
+                 'glDepthFunc', 'glCullFace')
+
+
+class FrameCounters:
+    """ Liczniki bieżącej klatki i historia zakończonych klatek """
+
+    def __init__(self):
+        self.frames = deque(maxlen=HISTORY)
+        self.reset()
+
+    def reset(self):
+        self.calls = Counter()
+        self.vertices = 0
+        self.draw_calls = 0
+        self.state_changes = 0
+        self.inside_begin = False
+
+    def record(self, name, args):
+        self.calls[name] += 1
+
+        if name in DRAW_CALLS:
+            self.draw_calls += 1
+            argument = DRAW_CALLS[name]
+            if argument is None:
+                self.inside_begin = True
+            else:
+                instances = args[-1] if name in INSTANCED_CALLS else 1
+                self.vertices += int(args[argument]) * int(instances)
+        elif name == 'glEnd':
+            self.inside_begin = False
+        elif name.startswith('glVertex') and not name.startswith(('glVertexAttrib', 'glVertexPointer')):
+            self.vertices += 1
+        elif name.startswith(VERTEX_ATTRIBUTES):
+            if not self.inside_begin:
+                self.state_changes += 1
+        elif name.startswith(STATE_CHANGES):
+            self.state_changes += 1
+
+    def end_frame(self):
+        """ Zamyka bieżącą klatkę: zapisuje jej liczniki i zeruje je """
+        frame = {
+            'calls': sum(self.calls.values()),
+            'draw_calls': self.draw_calls,
+            'vertices': self.vertices,
+            'state_changes': self.state_changes,
+            'functions': dict(self.calls),
+        }
+        self.frames.append(frame)
+        self.reset()
+        return frame
+
+
+COUNTERS = FrameCounters()
+
+
+class Counted:
+    """ Funkcja GL, której każde wywołanie trafia do COUNTERS """
+
+    __slots__ = ('name', 'function')
+
+    def __init__(self, name, function):
+        self.name = name
+        self.function = function
+
+    def __call__(self, *args):
+        COUNTERS.record(self.name, args)
+        return self.function(*args)
+
+    def __bool__(self):
+        # Brakujące funkcje (np. glPrimitiveRestartIndex przed GL 3.1) są fałszywe
+        return bool(self.function)
+
+    def __repr__(self):
+        return f"<Counted {self.name}>"
+
+
+def enable():
+    """ Włącza liczniki; musi być wywołane przed wczytaniem sceny """
+    global ENABLED
+
+    if not ENABLED and 'runtime.gl' in sys.modules:
+        raise RuntimeError("runtime.gl został już zaimportowany bez liczników - "
+                           "wywołaj enable() przed wczytaniem sceny")
+    ENABLED = True
+    # Procesy potomne (benchmark.py) dziedziczą ustawienie
+    os.environ['GL_COUNTERS'] = '1'
+
+
+def counted(function, name=None):
+    """ Opakowuje funkcję GL licznikiem, jeśli liczniki są włączone """
+    if not ENABLED or not callable(function):
+        return function
+    return Counted(name or function.__name__, function)
+
+
+def begin_frames():
+    """ Pomija wywołania sprzed pierwszej klatki (startup(), wysyłanie buforów) """
+    COUNTERS.reset()
+    COUNTERS.frames.clear()
+
+
+def end_frame():
+    return COUNTERS.end_frame()
+
+
+def frame_summary(frame):
+    """ Jednowierszowy opis klatki (np. do tytułu okna) """
+    return (f"{frame['calls']} wywołań GL, {frame['draw_calls']} rysowań, "
+            f"{frame['vertices']} wierzchołków, {frame['state_changes']} zmian stanu")
+
+
+def frame_table(frames=None, top=12, rows=None):
+    """
+    Tabela liczników: wiersz na klatkę (ostatnie rows klatek), a pod nią
+    średnia liczba wywołań na klatkę dla top najczęściej wywoływanych funkcji.
+    """
+    if frames is None:
+        frames = COUNTERS.frames
+    frames = list(frames)
+    if not frames:
+        return "Brak zliczonych klatek"
+
+    first = 0 if rows is None else max(len(frames) - rows, 0)
+    lines = [f"{'klatka':>6} {'wywołania GL':>13} {'rysowania':>10} {'wierzchołki':>12} {'zmiany stanu':>13}"]
+    for index, frame in enumerate(frames[first:], first):
+        lines.append(f"{index:>6} {frame['calls']:>13} {frame['draw_calls']:>10} "
+                     f"{frame['vertices']:>12} {frame['state_changes']:>13}")
+
+    totals = Counter()
+    for frame in frames:
+        totals.update(frame['functions'])
+
+    lines.append("")
+    lines.append(f"{'funkcja':<28} {'wywołania/klatkę':>17}")
+    for name, count in totals.most_common(top):
+        lines.append(f"{name:<28} {count / len(frames):>17.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Leniwe punkty wejścia OpenGL.
+
+`from OpenGL.GL import *` wczytuje wszystkie wersje GL (1.0 - 4.6) razem
+z opakowaniami PyOpenGL, zanim scena narysuje pierwszą klatkę. Ten moduł
+zwraca tylko nazwy, o które scena poprosi jawnie:
+
+    from runtime.gl import glClear, glDrawArrays, GL_LINES
+
+  - funkcje i stałe, które PyOpenGL udostępnia bez zmian, pochodzą prosto
+    z modułów OpenGL.raw.GL.VERSION.GL_x_y - wczytywane są tylko wersje,
+    z których coś jest potrzebne,
+  - glBegin/glEnd są opakowane tak jak w OpenGL.GL.exceptional (między nimi
+    nie wolno wywoływać glGetError),
+  - pozostałe funkcje opakowane przez PyOpenGL (glGenBuffers, glGetFloatv,
+    glVertex3fv, ...) są odraczane: pełne OpenGL.GL jest wczytywane dopiero
+    przy pierwszym wywołaniu którejś z nich.
+
+To, które nazwy PyOpenGL eksportuje bez zmian, zapisuje indeks budowany
+raz (wymaga jednorazowo pełnego OpenGL.GL) w katalogu pamięci podręcznej
+geometrii. Import z gwiazdką nie jest obsługiwany - wczytałby wszystko.
+
+Z włączonymi licznikami (runtime.counters, GL_COUNTERS=1) zwracane funkcje
+są opakowane licznikiem wywołań.
+"""
+import importlib
+import json
+import os
+import pkgutil
+import tempfile
+
+import OpenGL
+from OpenGL.raw.GL.VERSION import GL_1_0
+
+from runtime.counters import counted
+
+CACHE_DIR = os.environ.get('GEOMETRY_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        '.geometry_cache'))
+
+INDEX = None
+
+# Funkcje surowe, które OpenGL.GL modyfikuje w miejscu (restype, errcheck) -
+# ten sam obiekt zachowuje się inaczej przed pełnym importem i po nim
+PATCHED = ('glGetString', 'glGetStringi', 'glCompileShader', 'glLinkProgram')
+
+
+class Deferred:
+    """ Funkcja opakowana przez PyOpenGL, wczytywana z OpenGL.GL przy pierwszym użyciu """
+
+    __slots__ = ('name', 'function')
+
+    def __init__(self, name):
+        self.name = name
+        self.function = None
+
+    def resolve(self):
+        if self.function is None:
+            self.function = getattr(importlib.import_module('OpenGL.GL'), self.name)
+        return self.function
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __bool__(self):
+        return bool(self.resolve())
+
+    def __repr__(self):
+        return f"<Deferred {self.name}>"
+
+
+def error_checker():
+    """
+    Obiekt sprawdzający błędy po każdym wywołaniu GL albo None. PyOpenGL
+    nie udostępnia go publicznie (OpenGL.raw.GL._errors, sprawdzone dla
+    3.1.x), więc brak modułu lub metod onBegin/onEnd oznacza None.
+    """
+    try:
+        from OpenGL.raw.GL._errors import _error_checker
+    except ImportError:
+        return None
+    if all(hasattr(_error_checker, method) for method in ('onBegin', 'onEnd')):
+        return _error_checker
+    return None
+
+
+ERROR_CHECKER = error_checker() if OpenGL.ERROR_CHECKING else None
+
+if ERROR_CHECKER is not None:
+    def glBegin(mode):
+        """ Początek glBegin/glEnd - wyłącza automatyczne sprawdzanie błędów """
+        ERROR_CHECKER.onBegin()
+        return GL_1_0.glBegin(mode)
+
+    def glEnd():
+        """ Koniec glBegin/glEnd - przywraca automatyczne sprawdzanie błędów """
+        ERROR_CHECKER.onEnd()
+        return GL_1_0.glEnd()
+elif OpenGL.ERROR_CHECKING:
+    # Nieznana wersja PyOpenGL - wersje z OpenGL.GL (kosztem pełnego importu)
+    glBegin = Deferred('glBegin')
+    glEnd = Deferred('glEnd')
+else:
+    glBegin = GL_1_0.glBegin
+    glEnd = GL_1_0.glEnd
+
+glBegin = counted(glBegin, 'glBegin')
+glEnd = counted(glEnd, 'glEnd')
+
+
+def index_path():
+    return os.path.join(CACHE_DIR, f"gl-index-{OpenGL.__version__}-2.json")
+
+
+def build_index():
+    """
+    Porównuje nazwy OpenGL.GL z modułami OpenGL.raw.GL i zwraca
+    {'raw': {nazwa: moduł}, 'wrapped': [nazwy funkcji opakowanych]}.
+    """
+    full = importlib.import_module('OpenGL.GL')
+    versions = importlib.import_module('OpenGL.raw.GL.VERSION')
+    modules = ['OpenGL.raw.GL._types'] + [f"OpenGL.raw.GL.VERSION.{info.name}"
+                                          for info in sorted(pkgutil.iter_modules(versions.__path__))]
+
+    raw = {}
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        for name, value in vars(module).items():
+            if name in raw or name in PATCHED or not name.startswith(('gl', 'GL_')) or not hasattr(full, name):
+                continue
+            exported = getattr(full, name)
+            # Stałe są osobnymi obiektami o tej samej wartości, funkcje - tymi samymi obiektami
+            if exported is value or (isinstance(value, int) and isinstance(exported, int) and exported == value):
+                raw[name] = module_name
+
+    wrapped = sorted(name for name in dir(full)
+                     if name.startswith('gl') and name not in raw and callable(getattr(full, name)))
+    return {'raw': raw, 'wrapped': wrapped}
+
+
+def load_index():
+    global INDEX
+
+    if INDEX is not None:
+        return INDEX
+
+    path = index_path()
+    if CACHE_DIR:
+        try:
+            with open(path) as index:
+                INDEX = json.load(index)
+                INDEX['wrapped'] = set(INDEX['wrapped'])
+                return INDEX
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = build_index()
+    if CACHE_DIR:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        handle, staging = tempfile.mkstemp(prefix='.tmp-', dir=CACHE_DIR)
+        with os.fdopen(handle, 'w') as output:
+            json.dump(index, output)
+        os.replace(staging, path)
+
+    index['wrapped'] = set(index['wrapped'])
+    INDEX = index
+    return INDEX
+
+
+def resolve(name):
+    """ Obiekt OpenGL.GL o tej nazwie, wczytując możliwie najmniej modułów """
+    index = load_index()
+    module_name = index['raw'].get(name)
+    if module_name is not None:
+        return getattr(importlib.import_module(module_name), name)
+    if name in index['wrapped']:
+        return Deferred(name)
+    return getattr(importlib.import_module('OpenGL.GL'), name)
+
+
+def __getattr__(name):
+    if not name.startswith(('gl', 'GL_')):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = counted(resolve(name), name)
+    globals()[name] = value
+    return value
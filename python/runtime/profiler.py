@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Profilowanie przebiegów render() (opcjonalne).
+
+Nazwane zakresy mierzą czas CPU (perf_counter) i czas GPU (zapytania
+GL_TIME_ELAPSED) fragmentów klatki:
+
+    with profiled('osie'):
+        axes()
+
+Wyniki zapytań są odczytywane dopiero, gdy GPU je udostępni
+(GL_QUERY_RESULT_AVAILABLE), zwykle klatkę lub dwie później, więc pomiar
+nie wstrzymuje potoku. Obiekty zapytań krążą w puli: odczytane wracają
+do ponownego użycia, a nowe są tworzone tylko wtedy, gdy pula jest pusta.
+Czasy są uśredniane z ostatnich FRAMES klatek i raportowane dla każdego
+zakresu osobno:
+
+    GL_PROFILE=1 python planety.py              # raport co FRAMES klatek
+    python headless.py planety.py --frames 240 --profile
+
+Zakresy GL_TIME_ELAPSED nie mogą się zagnieżdżać - zakres wewnątrz innego
+mierzy tylko czas CPU. Bez GL_PROFILE profiled() zwraca pusty kontekst.
+
+Pierwszy wynik każdego nowego obiektu zapytania jest pomijany - niektóre
+sterowniki (llvmpipe) zwracają dla niego nieustalony znacznik czasu.
+Wszystkie pozostałe wyniki trafiają do średnich, także dłuższe niż czas
+CPU zakresu (zakresy ograniczone przez GPU).
+
+llvmpipe (i inne programowe sterowniki Mesa) rasteryzuje dopiero przy
+glFlush/glFinish, więc zapytanie obejmuje tylko przyjęcie poleceń - na
+takim sterowniku raport zaznacza to pod tabelą.
+"""
+import contextlib
+import ctypes
+import os
+import time as timer
+from collections import deque
+
+ENABLED = os.environ.get('GL_PROFILE', '') not in ('', '0')
+
+# Liczba klatek, z których liczone są średnie w raporcie
+FRAMES = 120
+
+# Najwięcej klatek czekających na wyniki zapytań; starsze są odczytywane
+# z oczekiwaniem, żeby pula zapytań nie rosła bez końca
+MAX_PENDING = 4
+
+DISABLED_SCOPE = contextlib.nullcontext()
+
+# Sterowniki, na których GL_TIME_ELAPSED nie obejmuje rasteryzacji
+SOFTWARE_RENDERERS = ('llvmpipe', 'softpipe', 'swrast')
+
+
+class Scope:
+    """ Jeden pomiar zakresu: zapytanie GPU (lub None) i czas CPU """
+
+    __slots__ = ('profiler', 'name', 'query', 'start', 'cpu')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.query = None
+
+    def __enter__(self):
+        self.query = self.profiler.begin_query()
+        self.start = timer.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.cpu = timer.perf_counter() - self.start
+        self.profiler.end_query(self)
+        return False
+
+
+class PassProfiler:
+    """ Pomiary zakresów bieżącej klatki, klatki czekające na GPU i historia """
+
+    def __init__(self, frames=FRAMES):
+        self.free = []
+        self.queries = []
+        self.fresh = set()  # obiekty zapytań, które nie dały jeszcze wyniku
+        self.current = []
+        self.pending = deque()
+        self.samples = deque(maxlen=frames)
+        self.active = None
+        self.gl = None
+        self.renderer = None
+
+    def timer_queries(self):
+        """ Moduły GL z zapytaniami czasu albo False, jeśli sterownik ich nie ma (GL < 3.3) """
+        if self.gl is None:
+            from OpenGL.raw.GL.VERSION import GL_1_5, GL_3_3
+            self.gl = (GL_1_5, GL_3_3) if bool(GL_3_3.glGetQueryObjectui64v) else False
+            self.renderer = renderer()
+        return self.gl
+
+    def software_renderer(self):
+        """ Czy zapytania obejmują tylko przyjęcie poleceń (programowy sterownik Mesa) """
+        return bool(self.gl) and self.renderer.startswith(SOFTWARE_RENDERERS)
+
+    def begin_query(self):
+        gl = self.timer_queries()
+        if not gl or self.active is not None:
+            return None
+
+        GL_1_5, GL_3_3 = gl
+        if not self.free:
+            ids = (ctypes.c_uint * 8)()
+            GL_1_5.glGenQueries(len(ids), ids)
+            self.free.extend(ids)
+            self.queries.extend(ids)
+            self.fresh.update(ids)
+
+        query = self.free.pop()
+        GL_1_5.glBeginQuery(GL_3_3.GL_TIME_ELAPSED, query)
+        self.active = query
+        return query
+
+    def end_query(self, scope):
+        if scope.query is not None:
+            GL_1_5, GL_3_3 = self.gl
+            GL_1_5.glEndQuery(GL_3_3.GL_TIME_ELAPSED)
+            self.active = None
+        self.current.append(scope)
+
+    def scope(self, name):
+        return Scope(self, name)
+
+    def end_frame(self):
+        """ Zamyka klatkę i zbiera wyniki klatek, dla których GPU już skończyło """
+        self.pending.append(self.current)
+        self.current = []
+
+        while self.pending:
+            wait = len(self.pending) > MAX_PENDING
+            if not self.collect(self.pending[0], wait):
+                break
+            self.pending.popleft()
+
+    def available(self, query):
+        GL_1_5, _ = self.gl
+        result = (ctypes.c_int * 1)()
+        GL_1_5.glGetQueryObjectiv(query, GL_1_5.GL_QUERY_RESULT_AVAILABLE, result)
+        return bool(result[0])
+
+    def collect(self, scopes, wait=False):
+        """ Odczytuje wyniki zapytań klatki; bez wait zwraca False, jeśli nie są gotowe """
+        queries = [scope.query for scope in scopes if scope.query is not None]
+        if queries and not wait and not all(self.available(query) for query in queries):
+            return False
+
+        passes = {}
+        for scope in scopes:
+            gpu = None
+            if scope.query is not None:
+                GL_1_5, GL_3_3 = self.gl
+                result = (ctypes.c_uint64 * 1)()
+                GL_3_3.glGetQueryObjectui64v(scope.query, GL_1_5.GL_QUERY_RESULT, result)
+                gpu = result[0] * 1e-9
+                # Pierwszy wynik nowego obiektu zapytania bywa nieustalony (llvmpipe)
+                if scope.query in self.fresh:
+                    self.fresh.discard(scope.query)
+                    gpu = None
+                self.free.append(scope.query)
+
+            calls, cpu, gpu_total, gpu_calls = passes.get(scope.name, (0, 0.0, 0.0, 0))
+            if gpu is not None:
+                gpu_total += gpu
+                gpu_calls += 1
+            passes[scope.name] = (calls + 1, cpu + scope.cpu, gpu_total, gpu_calls)
+
+        self.samples.append(passes)
+        return True
+
+    def begin_frames(self):
+        """ Pomija pomiary sprzed pierwszej klatki """
+        for scopes in self.pending:
+            self.collect(scopes, wait=True)
+        self.pending.clear()
+        self.current = []
+        self.samples.clear()
+
+    def summary(self):
+        """
+        {nazwa: {'calls', 'cpu_ms', 'gpu_ms'}} - średnio na klatkę z ostatnich
+        klatek; gpu_ms to None, gdy zakres nie ma żadnego wyniku zapytania
+        """
+        frames = len(self.samples)
+        names = []
+        totals = {}
+        for passes in self.samples:
+            for name, (calls, cpu, gpu, gpu_calls) in passes.items():
+                if name not in totals:
+                    names.append(name)
+                    totals[name] = [0, 0.0, 0.0, 0]
+                total = totals[name]
+                total[0] += calls
+                total[1] += cpu
+                total[2] += gpu
+                total[3] += gpu_calls
+
+        result = {}
+        for name in names:
+            calls, cpu, gpu, gpu_calls = totals[name]
+            result[name] = {
+                'calls': calls / frames,
+                'cpu_ms': cpu / frames * 1000.0,
+                # Średnia z pomiarów, które się udały, przeskalowana na wszystkie wywołania
+                'gpu_ms': gpu / gpu_calls * calls / frames * 1000.0 if gpu_calls else None,
+            }
+        return result
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return "Brak zmierzonych klatek"
+
+        lines = [f"Przebiegi klatki (średnio z {len(self.samples)} klatek):",
+                 f"{'zakres':<20} {'wywołania/klatkę':>17} {'CPU [ms]':>10} {'GPU [ms]':>10}"]
+        missing = '-' if self.gl else 'n/d'
+        cpu_total = gpu_total = 0.0
+        for name, timing in summary.items():
+            gpu = missing if timing['gpu_ms'] is None else f"{timing['gpu_ms']:.3f}"
+            lines.append(f"{name:<20} {timing['calls']:>17.1f} {timing['cpu_ms']:>10.3f} {gpu:>10}")
+            cpu_total += timing['cpu_ms']
+            gpu_total += timing['gpu_ms'] or 0.0
+        gpu = f"{gpu_total:.3f}" if self.gl else missing
+        lines.append(f"{'razem':<20} {'':>17} {cpu_total:>10.3f} {gpu:>10}")
+        if not self.gl:
+            lines.append("n/d - czas GPU niedostępny: brak zapytań GL_TIME_ELAPSED (GL < 3.3)")
+        elif self.software_renderer():
+            lines.append(f"GPU - {self.renderer}: rasteryzacja przy glFlush, "
+                         f"czas obejmuje tylko przyjęcie poleceń")
+        return "\n".join(lines)
+
+    def release(self):
+        """ Usuwa obiekty zapytań (przed zniszczeniem kontekstu GL) """
+        if self.queries:
+            GL_1_5, _ = self.gl
+            ids = (ctypes.c_uint * len(self.queries))(*self.queries)
+            GL_1_5.glDeleteQueries(len(ids), ids)
+        self.free = []
+        self.queries = []
+        self.fresh.clear()
+        self.pending.clear()
+        self.current = []
+
+
+def renderer():
+    """ GL_RENDERER bieżącego kontekstu bez wczytywania pełnego OpenGL.GL """
+    from OpenGL.raw.GL.VERSION import GL_1_0
+
+    value = GL_1_0.glGetString(GL_1_0.GL_RENDERER)
+    # Przed importem OpenGL.GL surowa funkcja zwraca wskaźnik, po nim - bajty
+    if not isinstance(value, bytes):
+        value = ctypes.cast(value, ctypes.c_char_p).value or b''
+    return value.decode()
+
+
+PROFILER = PassProfiler()
+
+
+def enable():
+    """ Włącza profilowanie zakresów (procesy potomne dziedziczą ustawienie) """
+    global ENABLED
+
+    ENABLED = True
+    os.environ['GL_PROFILE'] = '1'
+
+
+def profiled(name):
+    """ Zakres pomiaru CPU i GPU o podanej nazwie (pusty, gdy profilowanie jest wyłączone) """
+    if not ENABLED:
+        return DISABLED_SCOPE
+    return PROFILER.scope(name)
+
+
+def begin_frames():
+    PROFILER.begin_frames()
+
+
+def end_frame():
+    PROFILER.end_frame()
+
+
+def report():
+    return PROFILER.report()
+
+
+def release():
+    PROFILER.release()
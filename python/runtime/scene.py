@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Części wspólne scen: osie układu, rzutnia ortogonalna, oświetlenie i pętla
+okna GLFW.
+
+GLFW jest importowane dopiero w run() - uruchomienia bez okna
+(headless.py, benchmark.py) w ogóle go nie wczytują.
+"""
+import ctypes
+import sys
+
+from runtime import counters, profiler
+from runtime.counters import counted
+from runtime.gl import (glBegin, glEnd, glColor3f, glVertex3f, glMatrixMode, glViewport,
+                        glLoadIdentity, glOrtho, glEnable, glColorMaterial, GL_LINES, GL_PROJECTION,
+                        GL_MODELVIEW, GL_LIGHT0, GL_COLOR_MATERIAL, GL_RESCALE_NORMAL, GL_POSITION,
+                        GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+
+# glLightfv w wersji surowej (tablica ctypes zamiast pełnego OpenGL.GL)
+from OpenGL.raw.GL.VERSION import GL_1_0
+
+glLightfv = counted(GL_1_0.glLightfv, 'glLightfv')
+
+
+def axes(extent=5.0):
+    """ Osie X (czerwona), Y (zielona) i Z (niebieska) od -extent do extent """
+    glBegin(GL_LINES)
+
+    glColor3f(1.0, 0.0, 0.0)
+    glVertex3f(-extent, 0.0, 0.0)
+    glVertex3f(extent, 0.0, 0.0)
+
+    glColor3f(0.0, 1.0, 0.0)
+    glVertex3f(0.0, -extent, 0.0)
+    glVertex3f(0.0, extent, 0.0)
+
+    glColor3f(0.0, 0.0, 1.0)
+    glVertex3f(0.0, 0.0, -extent)
+    glVertex3f(0.0, 0.0, extent)
+
+    glEnd()
+
+
+def ortho_viewport(width, height, extent, near, far):
+    """
+    Rzutnia na całe okno i rzut ortogonalny, w którym krótszy bok okna
+    obejmuje [-extent, extent]
+    """
+    if width == 0:
+        width = 1
+    if height == 0:
+        height = 1
+    aspect_ratio = width / height
+
+    glMatrixMode(GL_PROJECTION)
+    glViewport(0, 0, width, height)
+    glLoadIdentity()
+
+    if width <= height:
+        glOrtho(-extent, extent, -extent / aspect_ratio, extent / aspect_ratio, near, far)
+    else:
+        glOrtho(-extent * aspect_ratio, extent * aspect_ratio, -extent, extent, near, far)
+
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+
+
+def lighting(position=(0.3, 0.6, 1.0, 0.0)):
+    """
+    Przygotowuje światło GL_LIGHT0 potoku stałego: kolor materiału jest
+    brany z koloru wierzchołka (GL_COLOR_MATERIAL), a normalne po glScalef
+    są przeskalowywane z powrotem do długości 1 (GL_RESCALE_NORMAL).
+    Samo oświetlenie scena włącza glEnable(GL_LIGHTING) wokół rysowania
+    oświetlonych siatek (osie i orbity zostają bez oświetlenia).
+    """
+    glEnable(GL_LIGHT0)
+    glEnable(GL_COLOR_MATERIAL)
+    glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+    glEnable(GL_RESCALE_NORMAL)
+    light_position(position)
+
+
+def light_position(position):
+    """
+    Położenie GL_LIGHT0 (w = 0 - światło kierunkowe) przekształcone bieżącą
+    macierzą modelu; przy macierzy jednostkowej jest to układ kamery.
+    """
+    glLightfv(GL_LIGHT0, GL_POSITION, (ctypes.c_float * 4)(*position))
+
+
+def run(scene, title, width=400, height=400, swap_interval=1, task=None):
+    """
+    Otwiera okno i rysuje scenę (moduł z startup, render, update_viewport,
+    shutdown) do zamknięcia okna. Jeśli podano task, jest wywoływane po
+    startup() zamiast pętli okna (np. pomiary).
+    """
+    from glfw.GLFW import (glfwInit, glfwTerminate, glfwCreateWindow, glfwMakeContextCurrent,
+                           glfwSetFramebufferSizeCallback, glfwSwapInterval, glfwGetFramebufferSize,
+                           glfwWindowShouldClose, glfwGetTime, glfwSwapBuffers, glfwPollEvents,
+                           glfwSetWindowTitle)
+
+    if not glfwInit():
+        sys.exit(-1)
+
+    window = glfwCreateWindow(width, height, title, None, None)
+    if not window:
+        glfwTerminate()
+        sys.exit(-1)
+
+    glfwMakeContextCurrent(window)
+    glfwSetFramebufferSizeCallback(window, scene.update_viewport)
+    glfwSwapInterval(swap_interval)
+
+    width, height = glfwGetFramebufferSize(window)
+    scene.update_viewport(window, width, height)
+
+    scene.startup()
+
+    if task is not None:
+        task()
+    else:
+        counters.begin_frames()
+        profiler.begin_frames()
+        frame = 0
+        while not glfwWindowShouldClose(window):
+            scene.render(glfwGetTime())
+            frame += 1
+            if counters.ENABLED:
+                # Liczniki ostatniej klatki w tytule okna, odświeżane co pół sekundy
+                summary = counters.end_frame()
+                if frame % 30 == 1:
+                    glfwSetWindowTitle(window, f"{title} | {counters.frame_summary(summary)}")
+            if profiler.ENABLED:
+                profiler.end_frame()
+                if frame % profiler.FRAMES == 0:
+                    print(profiler.report())
+            glfwSwapBuffers(window)
+            glfwPollEvents()
+
+    scene.shutdown()
+    profiler.release()
+    glfwTerminate()
+
+    if counters.ENABLED and task is None:
+        print(counters.frame_table(rows=10))
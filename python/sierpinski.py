@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Geometria piramidy Sierpińskiego liczona iteracyjnie i wektorowo.
+
+Piramida to 5 narożników: wierzchołek i 4 narożniki podstawy (oraz 5
+kolorów). Jeden krok podziału zamienia każdą piramidę na 5 mniejszych;
+zamiast rekurencji z osobnymi tablicami na każdy punkt środkowy liczymy
+wszystkie piramidy poziomu naraz jedną operacją macierzową.
+"""
+import numpy as np
+
+# 14 punktów piramidy jako kombinacje 5 narożników (a, b1, b2, b3, b4):
+# 0-4 narożniki, 5-8 środki krawędzi bocznych m_a1..m_a4,
+# 9-12 środki krawędzi podstawy m_b12, m_b23, m_b34, m_b41, 13 środek podstawy
+POINT_WEIGHTS = np.array([
+    [1.0, 0.0, 0.0, 0.0, 0.0],
+    [0.0, 1.0, 0.0, 0.0, 0.0],
+    [0.0, 0.0, 1.0, 0.0, 0.0],
+    [0.0, 0.0, 0.0, 1.0, 0.0],
+    [0.0, 0.0, 0.0, 0.0, 1.0],
+    [0.5, 0.5, 0.0, 0.0, 0.0],
+    [0.5, 0.0, 0.5, 0.0, 0.0],
+    [0.5, 0.0, 0.0, 0.5, 0.0],
+    [0.5, 0.0, 0.0, 0.0, 0.5],
+    [0.0, 0.5, 0.5, 0.0, 0.0],
+    [0.0, 0.0, 0.5, 0.5, 0.0],
+    [0.0, 0.0, 0.0, 0.5, 0.5],
+    [0.0, 0.5, 0.0, 0.0, 0.5],
+    [0.0, 0.25, 0.25, 0.25, 0.25],
+])
+
+# Narożniki 5 mniejszych piramid (górna i 4 narożne), indeksy do POINT_WEIGHTS
+CHILDREN = np.array([
+    [0, 5, 6, 7, 8],
+    [5, 1, 9, 13, 12],
+    [6, 9, 2, 10, 13],
+    [7, 13, 10, 3, 11],
+    [8, 12, 13, 11, 4],
+])
+
+# Macierz (5, 5, 5): narożniki dziecka c jako kombinacja narożników rodzica
+CHILD_WEIGHTS = POINT_WEIGHTS[CHILDREN].astype(np.float32)
+
+# 4 ściany boczne + 2 trójkąty podstawy (indeksy narożników piramidy)
+FACES = np.array([
+    0, 1, 2,
+    0, 2, 3,
+    0, 3, 4,
+    0, 4, 1,
+    1, 3, 2,
+    1, 4, 3,
+])
+
+# Poziom -> (pozycje, kolory); poziomy liczone raz na uruchomienie
+LEVEL_CACHE = {}
+
+
+def subdivide(corners, colors):
+    """ Jeden krok podziału: (M, 5, 3) -> (5 * M, 5, 3) dla narożników i kolorów """
+    corners = np.einsum('cij,mjk->mcik', CHILD_WEIGHTS, corners).reshape(-1, 5, 3)
+    colors = np.einsum('cij,mjk->mcik', CHILD_WEIGHTS, colors).reshape(-1, 5, 3)
+    return corners, colors
+
+
+def pyramid_corners(level, corners, colors):
+    """ Narożniki i kolory wszystkich 5^level piramid (kolejność jak w rekurencji) """
+    corners = np.asarray(corners, dtype=np.float32).reshape(1, 5, 3)
+    colors = np.asarray(colors, dtype=np.float32).reshape(1, 5, 3)
+    for _ in range(level):
+        corners, colors = subdivide(corners, colors)
+    return corners, colors
+
+
+def pyramid_triangles(corners, colors):
+    """ Rozwija piramidy na trójkąty: 18 wierzchołków (M * 18, 3) na piramidę """
+    positions = corners[:, FACES].reshape(-1, 3)
+    colors = colors[:, FACES].reshape(-1, 3)
+    return positions, colors
+
+
+def build_pyramid(level, corners, colors):
+    """ Zwraca (pozycje, kolory) trójkątów fraktala; wynik jest pamiętany per poziom """
+    key = (level, np.asarray(corners).tobytes(), np.asarray(colors).tobytes())
+    if key not in LEVEL_CACHE:
+        LEVEL_CACHE[key] = pyramid_triangles(*pyramid_corners(level, corners, colors))
+    return LEVEL_CACHE[key]
+
+
+# Rysowanie instancyjne: każdy liść fraktala to kopia bazowej piramidy
+# przeskalowana o 0.5^level i przesunięta; różnią się tylko kolory narożników.
+# Na liść przypada 19 liczb (offset, scale, 5 kolorów) zamiast 18 wierzchołków.
+INSTANCE_DTYPE = np.dtype([
+    ('offset', np.float32, (3,)),
+    ('scale', np.float32, (1,)),
+    ('color0', np.float32, (3,)),
+    ('color1', np.float32, (3,)),
+    ('color2', np.float32, (3,)),
+    ('color3', np.float32, (3,)),
+    ('color4', np.float32, (3,)),
+])
+
+BASE_VERTEX_DTYPE = np.dtype([
+    ('position', np.float32, (3,)),
+    ('corner', np.float32, (1,)),
+])
+
+INSTANCE_VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+attribute float corner;
+
+attribute vec3 offset;
+attribute float scale;
+attribute vec3 color0;
+attribute vec3 color1;
+attribute vec3 color2;
+attribute vec3 color3;
+attribute vec3 color4;
+
+varying vec3 color;
+
+void main()
+{
+    if (corner < 0.5) color = color0;
+    else if (corner < 1.5) color = color1;
+    else if (corner < 2.5) color = color2;
+    else if (corner < 3.5) color = color3;
+    else color = color4;
+
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(position * scale + offset, 1.0);
+}
+"""
+
+INSTANCE_FRAGMENT_SHADER = """
+#version 120
+varying vec3 color;
+
+void main()
+{
+    gl_FragColor = vec4(color, 1.0);
+}
+"""
+
+
+def base_pyramid(corners):
+    """ 18 wierzchołków bazowej piramidy z numerem narożnika (do wyboru koloru) """
+    corners = np.asarray(corners, dtype=np.float32).reshape(5, 3)
+    vertices = np.empty(FACES.shape[0], dtype=BASE_VERTEX_DTYPE)
+    vertices['position'] = corners[FACES]
+    vertices['corner'][:, 0] = FACES
+    return vertices
+
+
+def child_shifts(corners):
+    """ Przesunięcie każdego z 5 dzieci względem piramidy bazowej przeskalowanej o 0.5 """
+    corners = np.asarray(corners, dtype=np.float32).reshape(5, 3)
+    return np.einsum('cij,jk->cik', CHILD_WEIGHTS, corners)[:, 0] - 0.5 * corners[0]
+
+
+def split_pyramids(offsets, scales, colors, shifts):
+    """
+    Dzieli piramidy (scale * bazowa + offset) na 5 mniejszych: przesunięcie
+    dziecka c to offset rodzica + scale rodzica * shifts[c], skala maleje o połowę.
+    """
+    offsets = (offsets[:, np.newaxis, :] + scales[:, np.newaxis, np.newaxis] * shifts).reshape(-1, 3)
+    scales = np.repeat(scales * 0.5, 5)
+    colors = np.einsum('cij,mjk->mcik', CHILD_WEIGHTS, colors).reshape(-1, 5, 3)
+    return offsets, scales, colors
+
+
+def pack_instances(offsets, scales, colors):
+    """ Składa przesunięcia, skale i kolory narożników w tablicę INSTANCE_DTYPE """
+    instances = np.empty(offsets.shape[0], dtype=INSTANCE_DTYPE)
+    instances['offset'] = offsets
+    instances['scale'][:, 0] = scales
+    for k in range(5):
+        instances[f'color{k}'] = colors[:, k]
+    return instances
+
+
+def root_pyramid(colors):
+    """ Piramida bazowa jako (offsets, scales, colors) dla split_pyramids """
+    return (np.zeros((1, 3), dtype=np.float32),
+            np.ones(1, dtype=np.float32),
+            np.asarray(colors, dtype=np.float32).reshape(1, 5, 3))
+
+
+def pyramid_instances(level, corners, colors):
+    """
+    Dane instancji dla wszystkich 5^level liści (tablica INSTANCE_DTYPE).
+
+    Liść to scale * bazowa + offset, więc na każdym kroku liczymy tylko
+    przesunięcia, skale i kolory, bez pełnych współrzędnych narożników.
+    """
+    shifts = child_shifts(corners)
+    offsets, scales, colors = root_pyramid(colors)
+    for _ in range(level):
+        offsets, scales, colors = split_pyramids(offsets, scales, colors, shifts)
+    return pack_instances(offsets, scales, colors)
+
+
+class PyramidLOD:
+    """
+    Poziom szczegółowości fraktala wybierany w każdej klatce.
+
+    Każda pod-piramida jest dzielona dalej tylko wtedy, gdy jej rzut na ekran
+    jest większy niż pixel_threshold pikseli (i nie osiągnięto max_level).
+    Próg jest dostrajany do budżetu czasu klatki: za wolno - rośnie
+    (mniej trójkątów), z zapasem - maleje (więcej szczegółów). Czas klatki
+    jest wygładzany (średnia wykładnicza z wagą smoothing), między 0.75
+    a 1.0 budżetu próg się nie zmienia, a po każdej zmianie przez
+    settle_frames klatek czeka na pomiary z nowym progiem. Próg, przy którym
+    budżet został przekroczony, jest pomijany przez retry_frames klatek -
+    koszt rośnie skokami (kolejny poziom to 5 razy więcej piramid), więc bez
+    tego głębokość przeskakiwałaby między dwoma poziomami.
+    """
+
+    def __init__(self, corners, colors, max_level=8, pixel_threshold=4.0,
+                 frame_budget_ms=20.0, min_threshold=1.0, max_threshold=256.0,
+                 smoothing=0.2, settle_frames=10, retry_frames=300):
+        self.corners = np.asarray(corners, dtype=np.float32).reshape(5, 3)
+        self.colors = colors
+        self.shifts = child_shifts(self.corners)
+        self.max_level = max_level
+        self.pixel_threshold = pixel_threshold
+        self.frame_budget_ms = frame_budget_ms
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.smoothing = smoothing
+        self.settle_frames = settle_frames
+        self.retry_frames = retry_frames
+
+        # Wygładzony czas klatki i klatki do odczekania po zmianie progu
+        self.frame_time_ms = None
+        self.settle = 0
+
+        # Ostatni próg, przy którym klatka przekroczyła budżet (0 - brak),
+        # i liczba klatek, przez które próg nie schodzi do niego z powrotem
+        self.slow_threshold = 0.0
+        self.slow_frames = 0
+
+        # Wynik ostatniego wyboru (do podglądu)
+        self.depth = 0
+        self.pyramids = 0
+        self.triangles = 0
+
+    def projected_size(self, offsets, scales, mvp, viewport):
+        """ Rozmiar rzutu piramid w pikselach (większy bok prostokąta otaczającego) """
+        corners = scales[:, np.newaxis, np.newaxis] * self.corners + offsets[:, np.newaxis, :]
+        clip = corners @ mvp[:3, :] + mvp[3, :]
+        ndc = clip[..., :2] / clip[..., 3:4]
+
+        extent = (ndc.max(axis=1) - ndc.min(axis=1)) * 0.5 * np.asarray(viewport[2:4], dtype=np.float32)
+        return extent.max(axis=1)
+
+    def select(self, mvp, viewport):
+        """
+        Wybiera liście do narysowania dla macierzy mvp (model-widok-rzutowanie,
+        układ jak z glGetFloatv) i rzutni (x, y, szerokość, wysokość).
+        Zwraca tablicę INSTANCE_DTYPE z pod-piramidami różnych poziomów.
+        """
+        offsets, scales, colors = root_pyramid(self.colors)
+        finished = []
+        depth = 0
+
+        for level in range(self.max_level):
+            split = self.projected_size(offsets, scales, mvp, viewport) > self.pixel_threshold
+            if not split.any():
+                break
+
+            finished.append((offsets[~split], scales[~split], colors[~split]))
+            offsets, scales, colors = split_pyramids(offsets[split], scales[split], colors[split], self.shifts)
+            depth = level + 1
+
+        finished.append((offsets, scales, colors))
+        instances = pack_instances(*(np.concatenate(part) for part in zip(*finished)))
+
+        self.depth = depth
+        self.pyramids = instances.shape[0]
+        self.triangles = 6 * self.pyramids
+        return instances
+
+    def update(self, frame_time_ms):
+        """ Dostraja próg pikseli do zmierzonego czasu poprzedniej klatki """
+        if self.frame_time_ms is None:
+            self.frame_time_ms = frame_time_ms
+        else:
+            self.frame_time_ms += self.smoothing * (frame_time_ms - self.frame_time_ms)
+
+        if self.slow_frames > 0:
+            self.slow_frames -= 1
+            if self.slow_frames == 0:
+                self.slow_threshold = 0.0
+
+        if self.settle > 0:
+            self.settle -= 1
+            return
+
+        threshold = self.pixel_threshold
+        if self.frame_time_ms > self.frame_budget_ms:
+            # Ten próg był za wolny - przez retry_frames klatek nie wracamy do niego
+            self.slow_threshold = threshold
+            self.slow_frames = self.retry_frames
+            threshold = min(threshold * 1.25, self.max_threshold)
+        elif self.frame_time_ms < 0.75 * self.frame_budget_ms:
+            lower = max(threshold / 1.1, self.min_threshold)
+            if lower > self.slow_threshold:
+                threshold = lower
+
+        if threshold != self.pixel_threshold:
+            self.pixel_threshold = threshold
+            self.settle = self.settle_frames
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Symulacja ze stałym krokiem czasu, niezależna od rysowania.
+
+Wątek roboczy liczy stan ciał (pozycje (liczba ciał, 3)) w chwilach
+k * dt i zapisuje je do pierścienia migawek. render(time) nie czeka na
+symulację: bierze dwie migawki otaczające time i interpoluje między nimi
+liniowo. Symulacja wyprzedza ostatnio żądany czas o kilka kroków, więc
+zwykle obie migawki są gotowe.
+
+Odczyt nie używa blokad: każda komórka pierścienia ma numer kroku, który
+wątek roboczy ustawia na -1 przed zapisem i na k po zapisie. Czytelnik
+sprawdza numery przed i po interpolacji (jak seqlock) - jeśli komórkę
+w międzyczasie nadpisano, ponawia odczyt. Operacje NumPy na dużych
+tablicach zwalniają GIL, więc rachunki wątku roboczego idą na drugim rdzeniu.
+"""
+import math
+import threading
+
+import numpy as np
+
+
+class FixedStepSimulation:
+    """
+    Stan count ciał liczony funkcją step(time, out) w chwilach k * dt
+    w osobnym wątku. sample(time) zwraca stan interpolowany do chwili time;
+    gdy symulacja nie nadąża, stan może być opóźniony najwyżej o max_lag.
+    """
+
+    def __init__(self, step, count, dt=1.0 / 120.0, lookahead=4, max_lag=0.25, retries=3):
+        self.step = step
+        self.count = count
+        self.dt = dt
+        self.lookahead = lookahead
+        self.max_lag = max_lag
+        self.retries = retries
+
+        # Zapas komórek, żeby wątek roboczy wyprzedzający o lookahead kroków
+        # nie nadpisywał pary właśnie czytanej
+        self.slots = lookahead + 4
+        self.states = np.zeros((self.slots, count, 3), dtype=np.float32)
+        self.versions = [-1] * self.slots
+
+        self.latest = -1         # ostatni opublikowany krok
+        self.target = 0.0        # ostatni czas żądany przez render()
+        self.restart_step = 0    # krok, od którego wątek ma (ponownie) zacząć
+        self.restart_version = 0
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+        # Statystyka: odczyty z migawek i odczyty liczone od razu (brak migawek)
+        self.interpolated = 0
+        self.fallbacks = 0
+
+        # Stan policzony od razu w wątku wywołującym i chwila, której dotyczy -
+        # render() pyta o tę samą chwilę kilka razy (planety, pas planetoid)
+        self.fallback_state = np.empty((count, 3), dtype=np.float32)
+        self.fallback_time = None
+
+    def start(self, time=0.0):
+        self.restart(time)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def restart(self, time):
+        """ Zleca liczenie od kroku zawierającego time (np. po cofnięciu zegara) """
+        self.target = time
+        self.restart_step = max(int(math.floor(time / self.dt)), 0)
+        self.restart_version += 1
+        self.wake.set()
+
+    def run(self):
+        restart_version = None
+        step = 0
+
+        while self.running:
+            if restart_version != self.restart_version:
+                restart_version = self.restart_version
+                step = self.restart_step
+                self.latest = -1
+
+            # Stan zależy tylko od czasu, więc przy dużym skoku zegara
+            # pomijamy kroki, których nikt już nie odczyta
+            step = max(step, int(math.floor(self.target / self.dt)) - 1)
+
+            if step * self.dt > self.target + self.lookahead * self.dt:
+                self.wake.wait(self.dt)
+                self.wake.clear()
+                continue
+
+            slot = step % self.slots
+            self.versions[slot] = -1
+            self.step(step * self.dt, self.states[slot])
+            self.versions[slot] = step
+            self.latest = step
+            step += 1
+
+    def sample(self, time, out=None, rows=slice(None)):
+        """
+        Stan wierszy rows w chwili time, interpolowany między migawkami
+        k i k + 1 otaczającymi time. Jeśli migawki jeszcze nie ma (start,
+        cofnięcie zegara), stan jest liczony od razu w wątku wywołującym -
+        raz na chwilę time, kolejne odczyty innych wierszy go współdzielą.
+        """
+        self.target = time
+        self.wake.set()
+
+        k = int(math.floor(time / self.dt))
+        for _ in range(self.retries):
+            latest = self.latest
+            if latest < 1:
+                break
+
+            if k + 1 > latest:
+                if time - latest * self.dt > self.max_lag:
+                    # Skok zegara albo symulacja daleko w tyle - liczymy od razu
+                    break
+                # Symulacja nie nadąża - zostajemy na najnowszej parze (bez ekstrapolacji)
+                k = latest - 1
+
+            a, b = k % self.slots, (k + 1) % self.slots
+            if self.versions[a] != k or self.versions[b] != k + 1:
+                if k < latest - self.slots + 2:
+                    # Migawki sprzed cofnięcia zegara albo już nadpisane
+                    self.restart(time)
+                    break
+                continue
+
+            alpha = min(max(time / self.dt - k, 0.0), 1.0)
+            result = np.subtract(self.states[b, rows], self.states[a, rows], out=out)
+            result *= alpha
+            result += self.states[a, rows]
+
+            if self.versions[a] == k and self.versions[b] == k + 1:
+                self.interpolated += 1
+                return result
+
+        self.fallbacks += 1
+        if self.fallback_time != time:
+            self.step(time, self.fallback_state)
+            self.fallback_time = time
+        state = self.fallback_state[rows]
+        if out is None:
+            return state.copy()
+        out[...] = state
+        return out
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Silnik powierzchni parametrycznych f(u, v).
+
+Zamiast podwójnej pętli po siatce N x N (skalarne np.cos/np.sin i zapis
+VERTICES[i][j][k] element po elemencie) całą siatkę liczymy naraz:
+u ma kształt (N, 1), v ma kształt (1, N), a NumPy rozgłasza (broadcasting)
+wyniki bezpośrednio do prealokowanego bufora float32 o kształcie (N, N, 3).
+
+Uruchomienie modułu bezpośrednio porównuje starą pętlę z nowym silnikiem:
+    python surface.py 30 300 1000
+"""
+import sys
+import time
+
+import numpy as np
+
+
+def egg(u, v, out):
+    """ Równania parametryczne jajka, zapisywane do out[..., 0:3] """
+    pi = np.pi
+
+    u2 = u * u
+    u3 = u2 * u
+    u4 = u3 * u
+    u5 = u4 * u
+
+    # Wspólna część dla x i z (zależy tylko od u, kształt (N, 1))
+    P_u = (-90 * u5 + 225 * u4 - 270 * u3 + 180 * u2 - 45 * u)
+
+    np.multiply(P_u, np.cos(pi * v), out=out[..., 0])
+    out[..., 1] = 160 * u4 - 320 * u3 + 160 * u2 - 5.0
+    np.multiply(P_u, np.sin(pi * v), out=out[..., 2])
+
+
+def sphere(u, v, out, radius=1.0):
+    """ Sfera o promieniu radius (phi = u * pi, theta = v * 2pi) """
+    phi = u * np.pi
+    theta = v * 2 * np.pi
+
+    sin_phi = radius * np.sin(phi)
+
+    np.multiply(sin_phi, np.cos(theta), out=out[..., 0])
+    out[..., 1] = radius * np.cos(phi)
+    np.multiply(sin_phi, np.sin(theta), out=out[..., 2])
+
+
+def egg_normals(u, v, out):
+    """
+    Jednostkowe normalne jajka (skierowane na zewnątrz), zapisywane do out[..., 0:3].
+
+    Jajko jest bryłą obrotową: r(u, v) = (P(u) cos(pi v), Y(u), P(u) sin(pi v)).
+    Iloczyn wektorowy pochodnych cząstkowych dr/du x dr/dv to
+    pi P(u) (Y'(u) cos(pi v), -P'(u), Y'(u) sin(pi v)); czynnik pi P(u) zmienia
+    tylko długość i zwrot (P < 0 dla u < 0.5), więc normalna na zewnątrz to
+    (-Y' cos(pi v), P', -Y' sin(pi v)). Y' i P' nie zerują się jednocześnie,
+    więc wzór działa także na biegunach, gdzie siatka zapada się do punktu.
+    """
+    pi = np.pi
+
+    u2 = u * u
+    u3 = u2 * u
+    u4 = u3 * u
+
+    # Pochodne wielomianów P(u) i Y(u) z egg() (kształt (N, 1))
+    dP_u = -450 * u4 + 900 * u3 - 810 * u2 + 360 * u - 45
+    dY_u = 640 * u3 - 960 * u2 + 320 * u
+
+    # Długość zależy tylko od u (cos^2 + sin^2 = 1)
+    inverse_length = 1.0 / np.sqrt(dY_u * dY_u + dP_u * dP_u)
+
+    np.multiply(-dY_u * inverse_length, np.cos(pi * v), out=out[..., 0])
+    out[..., 1] = dP_u * inverse_length
+    np.multiply(-dY_u * inverse_length, np.sin(pi * v), out=out[..., 2])
+
+
+def sphere_normals(u, v, out, radius=1.0):
+    """ Normalne sfery - punkt sfery jednostkowej (promień nie ma znaczenia) """
+    sphere(u, v, out)
+
+
+# Powierzchnia -> funkcja jej normalnych (ta sama sygnatura i parametry)
+NORMALS = {
+    egg: egg_normals,
+    sphere: sphere_normals,
+}
+
+# Bryły obrotowe wokół osi Y: kąt obrotu odpowiadający v od 0 do 1
+# (pierścień jajka to półokrąg - drugą połowę daje u z przedziału [0.5, 1])
+REVOLUTION_SPAN = {
+    egg: np.pi,
+    sphere: 2 * np.pi,
+}
+
+
+def evaluate_surface(func, n, out=None, **params):
+    """
+    Oblicza wierzchołki powierzchni func(u, v, out, **params) na siatce n x n,
+    gdzie u i v przebiegają równomiernie przedział [0, 1].
+
+    Zwraca tablicę float32 o kształcie (n, n, 3); jeśli podano out,
+    wynik jest zapisywany do niej (bez alokacji nowej tablicy).
+    """
+    if out is None:
+        out = np.empty((n, n, 3), dtype=np.float32)
+    elif out.shape != (n, n, 3):
+        raise ValueError(f"Bufor out ma kształt {out.shape}, oczekiwano {(n, n, 3)}")
+
+    u_values = np.linspace(0.0, 1.0, n)[:, np.newaxis]
+    v_values = np.linspace(0.0, 1.0, n)[np.newaxis, :]
+
+    func(u_values, v_values, out, **params)
+    return out
+
+
+def evaluate_surface_normals(func, n, **params):
+    """
+    Wierzchołki i normalne powierzchni na siatce n x n, obie jako (n, n, 3)
+    float32. Normalne są liczone analitycznie z pochodnych cząstkowych
+    (NORMALS[func]) dla całej siatki naraz, bez iloczynów wektorowych
+    dla każdego trójkąta.
+    """
+    if func not in NORMALS:
+        raise ValueError(f"Brak wzoru na normalne powierzchni {func.__name__}")
+
+    vertices = evaluate_surface(func, n, **params)
+    normals = evaluate_surface(NORMALS[func], n, **params)
+    return vertices, normals
+
+
+def egg_loop(n):
+    """ Dotychczasowa wersja z podwójną pętlą (tylko do porównania) """
+    vertices = np.zeros((n, n, 3))
+
+    u_values = np.linspace(0.0, 1.0, n)
+    v_values = np.linspace(0.0, 1.0, n)
+    pi = np.pi
+
+    for i in range(n):
+        for j in range(n):
+            u = u_values[i]
+            v = v_values[j]
+
+            u2 = u * u
+            u3 = u2 * u
+            u4 = u3 * u
+            u5 = u4 * u
+
+            P_u = (-90 * u5 + 225 * u4 - 270 * u3 + 180 * u2 - 45 * u)
+
+            vertices[i][j][0] = P_u * np.cos(pi * v)
+            vertices[i][j][1] = 160 * u4 - 320 * u3 + 160 * u2 - 5.0
+            vertices[i][j][2] = P_u * np.sin(pi * v)
+
+    return vertices
+
+
+def benchmark(sizes, loop_limit=1000):
+    # Pętla jest mierzona tylko do loop_limit, powyżej trwałaby minuty
+    print(f"{'N':>6} {'pętla [s]':>12} {'silnik [s]':>12} {'przyspieszenie':>15}")
+    for n in sizes:
+        start = time.perf_counter()
+        fast = evaluate_surface(egg, n)
+        fast_time = time.perf_counter() - start
+
+        if n <= loop_limit:
+            start = time.perf_counter()
+            slow = egg_loop(n)
+            loop_time = time.perf_counter() - start
+            assert np.allclose(slow, fast, atol=1e-4)
+            print(f"{n:>6} {loop_time:>12.4f} {fast_time:>12.4f} {loop_time / fast_time:>14.1f}x")
+        else:
+            print(f"{n:>6} {'-':>12} {fast_time:>12.4f} {'-':>15}")
+
+
+if __name__ == '__main__':
+    benchmark([int(arg) for arg in sys.argv[1:]] or [30, 300, 1000, 4000])
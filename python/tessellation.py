@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Adaptacyjna siatka trójkątów dla brył obrotowych (jajko, sfera).
+
+Równomierna siatka np.linspace(0, 1, N) ma tyle samo wierzchołków na
+prawie płaskich bokach jajka co na mocno zakrzywionym czubku, a przy
+biegunach N wierzchołków zapada się do jednego punktu. Tutaj, dla
+zadanego błędu geometrycznego max_error:
+
+  - rzędy u (pierścienie) są rozmieszczane według krzywizny profilu
+    bryły - tak jak punkty orbit w orbits.adaptive_angles(),
+  - każdy pierścień ma tyle segmentów, ile wymaga jego promień (strzałka
+    cięciwy <= max_error), więc pierścienie przy biegunach są rzadkie,
+    a sam biegun to jeden wierzchołek,
+  - sąsiednie pierścienie o różnej liczbie wierzchołków są zszywane
+    trójkątami w kolejności parametru v. Każdy wierzchołek pierścienia
+    należy do obu sąsiednich pasów, więc siatka nie ma pęknięć ani
+    T-złączy.
+
+Błąd siatki to największa odległość punktu powierzchni f(u, v) od
+odpowiadającego mu punktu trójkąta (próbki wewnątrz trójkątów), czyli
+górne ograniczenie odległości geometrycznej. Raport porównuje liczbę
+trójkątów z najmniejszą siatką równomierną o nie większym błędzie:
+
+    python tessellation.py 0.05 0.01 0.002
+"""
+import sys
+
+import numpy as np
+
+from surface import NORMALS, REVOLUTION_SPAN, egg
+from topology import grid_triangles
+
+# Najwięcej przebudów siatki przy dopasowywaniu budżetu błędu
+REFINE_ATTEMPTS = 6
+
+# Próbki barycentryczne wewnątrz trójkąta: środek, środki krawędzi i trzy
+# punkty bliżej wierzchołków (w wierzchołkach błąd jest zerowy)
+ERROR_SAMPLES = np.array([
+    [1 / 3, 1 / 3, 1 / 3],
+    [0.5, 0.5, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5],
+    [2 / 3, 1 / 6, 1 / 6], [1 / 6, 2 / 3, 1 / 6], [1 / 6, 1 / 6, 2 / 3],
+])
+
+
+def evaluate_points(func, u, v, **params):
+    """ Punkty powierzchni dla tablic u i v tego samego kształtu (float64) """
+    out = np.empty(u.shape + (3,))
+    func(u, v, out, **params)
+    return out
+
+
+def profile(func, u, **params):
+    """ Profil bryły w płaszczyźnie v = 0: (x(u), y(u)); promień pierścienia to |x| """
+    points = evaluate_points(func, u, np.zeros_like(u), **params)
+    return points[:, 0], points[:, 1]
+
+
+def row_density(func, max_error, u, **params):
+    """
+    Liczba rzędów na jednostkę u, przy której interpolacja liniowa profilu
+    c(u) między rzędami odbiega od niego najwyżej o max_error: |c''| du^2 / 8.
+    Pełne |c''| (nie tylko składowa normalna) obejmuje też zmianę prędkości
+    parametryzacji, którą mierzy mesh_error().
+    """
+    x, y = profile(func, u, **params)
+    ddx = np.gradient(np.gradient(x, u), u)
+    ddy = np.gradient(np.gradient(y, u), u)
+    return np.sqrt(np.hypot(ddx, ddy) / (8.0 * max_error))
+
+
+def pole_rows(func, samples=4096, **params):
+    """ Wartości u, dla których pierścień zapada się do punktu (x(u, 0) = 0) """
+    u = np.linspace(0.0, 1.0, samples + 1)
+    x, _ = profile(func, u, **params)
+    scale = np.abs(x).max()
+
+    poles = list(u[np.abs(x) <= 1e-9 * scale])
+    # Zmiana znaku między próbkami - miejsce zerowe interpolowane liniowo
+    change = np.nonzero((x[:-1] * x[1:] < 0))[0]
+    poles += list(u[change] - x[change] * (u[change + 1] - u[change]) / (x[change + 1] - x[change]))
+    return np.array(sorted(poles))
+
+
+def adaptive_rows(func, max_error, min_rows=3, samples=4096, **params):
+    """ Rzędy u od 0 do 1 rozmieszczone według krzywizny profilu, z biegunami """
+    u = np.linspace(0.0, 1.0, samples + 1)
+    density = row_density(func, max_error, u, **params)
+
+    # Skumulowana "liczba rzędów" wzdłuż u (metoda trapezów)
+    cumulative = np.concatenate([[0.0], np.cumsum((density[1:] + density[:-1]) * 0.5 * (u[1] - u[0]))])
+
+    segments = max(min_rows - 1, int(np.ceil(cumulative[-1])))
+    rows = np.interp(np.arange(segments + 1) * (cumulative[-1] / segments), cumulative, u)
+    rows = np.union1d(rows, pole_rows(func, samples, **params))
+
+    # Bieguny dodane obok istniejących rzędów nie mogą tworzyć prawie pustych pasów
+    gaps = np.diff(rows)
+    keep = np.concatenate([[True], gaps > 1e-6])
+    return rows[keep]
+
+
+def ring_segments(func, rows, max_error, **params):
+    """
+    Liczba segmentów każdego pierścienia (0 - biegun, jeden wierzchołek).
+
+    Przekątne pasa łączą pierścienie o promieniach r i r + dr, więc dla
+    kroku kąta d błąd w pasie to w przybliżeniu r d^2 / 8 (strzałka cięciwy)
+    + |dr| d / 4 (przekątna). Liczy się największy promień i największa
+    różnica promieni z sąsiednich pasów; d to dodatni pierwiastek
+    r d^2 / 8 + |dr| d / 4 = max_error.
+    """
+    span = REVOLUTION_SPAN[func]
+    x, _ = profile(func, rows, **params)
+    radius = np.abs(x)
+    poles = radius <= 1e-9 * radius.max()
+
+    padded = np.concatenate([[0.0], radius, [0.0]])
+    reach = np.maximum(np.maximum(padded[:-2], padded[1:-1]), padded[2:])
+    change = np.abs(np.diff(radius))
+    slope = np.maximum(np.concatenate([[0.0], change]), np.concatenate([change, [0.0]]))
+
+    root = np.sqrt(slope ** 2 / 16.0 + reach * max_error / 2.0) - slope / 4.0
+    step = root / np.maximum(reach / 4.0, 1e-12)
+    min_segments = max(2, int(np.ceil(3 * span / (2 * np.pi))))
+    segments = np.maximum(np.ceil(span / np.maximum(step, 1e-12)), min_segments).astype(np.int64)
+    segments[poles] = 0
+    return segments
+
+
+def stitch_rings(starts, counts, ring_v):
+    """
+    Trójkąty między kolejnymi pierścieniami (wszystkie pasy naraz).
+
+    Wierzchołki pasu są scalane według v: każdy kolejny wierzchołek
+    pierścienia A daje trójkąt (a_i, b_j, a_i+1), a pierścienia B -
+    (a_i, b_j, b_j+1); kierunek obiegu jak w topology.grid_triangles().
+    Przy równych v pierwszy idzie wierzchołek A, więc dla pierścieni o tej
+    samej liczbie wierzchołków wynik jest identyczny z siatką równomierną.
+    """
+    rings = counts.shape[0]
+    ring_of_vertex = np.repeat(np.arange(rings), counts)
+    local = np.arange(ring_v.shape[0]) - starts[ring_of_vertex]
+
+    # Zdarzenia pasa p: wierzchołki k >= 1 pierścienia p (A) i p + 1 (B)
+    advancing = local >= 1
+    a_vertices = np.nonzero(advancing & (ring_of_vertex < rings - 1))[0]
+    b_vertices = np.nonzero(advancing & (ring_of_vertex > 0))[0]
+
+    strip = np.concatenate([ring_of_vertex[a_vertices], ring_of_vertex[b_vertices] - 1])
+    side = np.concatenate([np.zeros(a_vertices.shape[0], dtype=np.int64),
+                           np.ones(b_vertices.shape[0], dtype=np.int64)])
+    v = np.concatenate([ring_v[a_vertices], ring_v[b_vertices]])
+
+    order = np.lexsort((side, v, strip))
+    strip, side = strip[order], side[order]
+
+    # Liczba wcześniejszych zdarzeń A i B w tym samym pasie
+    is_a = (side == 0).astype(np.int64)
+    is_b = 1 - is_a
+    first = np.searchsorted(strip, strip, side='left')
+    a_before = np.cumsum(is_a) - is_a
+    b_before = np.cumsum(is_b) - is_b
+    a_before -= a_before[first]
+    b_before -= b_before[first]
+
+    a = starts[strip] + a_before
+    b = starts[strip + 1] + b_before
+    third = np.where(is_a == 1, a + 1, b + 1)
+    return np.stack([a, b, third], axis=1).astype(np.uint32)
+
+
+def build_grid(func, row_error, ring_error, **params):
+    """ Siatka (parametry (V, 2), trójkąty (T, 3) uint32) dla błędów profilu i pierścieni """
+    rows = adaptive_rows(func, row_error, **params)
+    segments = ring_segments(func, rows, ring_error, **params)
+
+    counts = segments + 1
+    counts[segments == 0] = 1
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    ring = np.repeat(np.arange(rows.shape[0]), counts)
+    local = np.arange(ring.shape[0]) - starts[ring]
+    v = np.where(segments[ring] > 0, local / np.maximum(segments[ring], 1), 0.5)
+
+    parameters = np.stack([rows[ring], v], axis=1)
+    return parameters, stitch_rings(starts, counts, v)
+
+
+def adaptive_grid(func, max_error, attempts=REFINE_ATTEMPTS, **params):
+    """
+    Adaptacyjna siatka w dziedzinie (u, v): zwraca (parametry (V, 2),
+    trójkąty (T, 3) uint32). Biegun ma jeden wierzchołek (v = 0.5).
+
+    Błędy cięciw profilu i pierścieni w środku trójkąta się sumują, więc
+    każdy dostaje połowę max_error; jeśli zmierzony błąd siatki nadal jest
+    większy, budżet jest zmniejszany proporcjonalnie (strzałka rośnie
+    liniowo z budżetem) i siatka budowana ponownie. Jeśli po attempts
+    przebudowach błąd nadal przekracza max_error, zgłasza RuntimeError -
+    zwrócona siatka zawsze mieści się w budżecie.
+    """
+    budget = 0.5 * max_error
+    for attempt in range(attempts):
+        parameters, triangles = build_grid(func, budget, budget, **params)
+        error = mesh_error(func, parameters, triangles, **params)
+        if error <= max_error:
+            return parameters, triangles
+        budget *= 0.95 * max_error / error
+    raise RuntimeError(f"Siatka adaptacyjna po {attempts} przebudowach ma błąd {error:.6g} > {max_error:.6g}")
+
+
+def uniform_grid(n):
+    """ Siatka równomierna n x n (jak w zad4.0.py) w tej samej postaci co adaptive_grid() """
+    u, v = np.meshgrid(np.linspace(0.0, 1.0, n), np.linspace(0.0, 1.0, n), indexing='ij')
+    return np.stack([u.reshape(-1), v.reshape(-1)], axis=1), grid_triangles(n)
+
+
+def surface_vertices(func, parameters, **params):
+    """ Wierzchołki i normalne (float32) w punktach parametrów (V, 2) """
+    u, v = parameters[:, 0], parameters[:, 1]
+    vertices = evaluate_points(func, u, v, **params).astype(np.float32)
+    normals = evaluate_points(NORMALS[func], u, v, **params).astype(np.float32)
+    return vertices, normals
+
+
+def adaptive_surface(func, max_error, **params):
+    """ Zwraca (wierzchołki (V, 3), normalne (V, 3), trójkąty (T, 3)) siatki adaptacyjnej """
+    parameters, triangles = adaptive_grid(func, max_error, **params)
+    vertices, normals = surface_vertices(func, parameters, **params)
+    return vertices, normals, triangles
+
+
+def mesh_error(func, parameters, triangles, chunk=200000, **params):
+    """
+    Największa odległość punktu powierzchni od trójkąta w próbkach
+    ERROR_SAMPLES. W biegunie v nie ma znaczenia, więc narożnik-biegun
+    dostaje średnie v pozostałych narożników trójkąta.
+    """
+    u, v = parameters[:, 0], parameters[:, 1]
+    points = evaluate_points(func, u, v, **params)
+    radius = np.abs(profile(func, u, **params)[0])
+    pole = radius <= 1e-9 * radius.max()
+
+    error = 0.0
+    for begin in range(0, triangles.shape[0], chunk):
+        corners = triangles[begin:begin + chunk].astype(np.int64)
+        corner_u, corner_v = u[corners], v[corners].copy()
+
+        corner_pole = pole[corners]
+        regular = (~corner_pole).sum(axis=1)
+        mean_v = np.where(corner_pole, 0.0, corner_v).sum(axis=1) / np.maximum(regular, 1)
+        corner_v = np.where(corner_pole & (regular[:, None] > 0), mean_v[:, None], corner_v)
+
+        sample_u = corner_u @ ERROR_SAMPLES.T
+        sample_v = corner_v @ ERROR_SAMPLES.T
+        exact = evaluate_points(func, sample_u, sample_v, **params)
+        linear = np.einsum('sk,tkc->tsc', ERROR_SAMPLES, points[corners])
+        error = max(error, float(np.sqrt(((exact - linear) ** 2).sum(axis=-1)).max()))
+    return error
+
+
+def matching_uniform(func, error, max_n=4096, **params):
+    """
+    Najmniejsze N siatki równomiernej, której błąd nie przekracza error:
+    podwajanie N do pierwszej wystarczającej siatki, potem bisekcja (bez
+    liczenia błędu ogromnych siatek).
+    """
+    low, high = 2, 4
+    while high < max_n and mesh_error(func, *uniform_grid(high), **params) > error:
+        low, high = high, min(2 * high, max_n)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if mesh_error(func, *uniform_grid(middle), **params) <= error:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def triangle_report(func, errors, **params):
+    """
+    Tabela: dla każdego dopuszczalnego błędu liczba trójkątów siatki
+    adaptacyjnej, zmierzony błąd i najmniejsza siatka równomierna o nie
+    większym błędzie.
+    """
+    lines = [f"{'max_error':>10} {'adapt. trójkąty':>16} {'błąd':>9} {'N równom.':>10} "
+             f"{'równom. trójkąty':>17} {'oszczędność':>12}"]
+    for max_error in errors:
+        parameters, triangles = adaptive_grid(func, max_error, **params)
+        error = mesh_error(func, parameters, triangles, **params)
+        n = matching_uniform(func, error, **params)
+        uniform = 2 * (n - 1) ** 2
+        saved = 1.0 - triangles.shape[0] / uniform
+        lines.append(f"{max_error:>10.4f} {triangles.shape[0]:>16} {error:>9.5f} {n:>10} "
+                     f"{uniform:>17} {saved:>11.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    print(triangle_report(egg, [float(arg) for arg in sys.argv[1:]] or [0.05, 0.01, 0.002]))
@@ -0,0 +1,66 @@
+"""
+Budżet startu scen: import + startup() + pierwsza klatka w kontekście
+headless (EGL), każda scena w osobnym procesie (benchmark.py --single),
+żeby import modułów był liczony od zera.
+
+    python -m pytest -q tests
+
+Budżet można zmienić zmienną STARTUP_BUDGET_MS (wolniejsze maszyny CI).
+Indeks nazw GL (runtime.gl) jest budowany raz przed testami, tak jak
+w benchmark.main() - jego budowa wczytuje pełne OpenGL.GL i nie może
+trafić do startu pierwszej sceny.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 250.0))
+
+# Sceny z shaderami wczytują pełne OpenGL.GL przez OpenGL.GL.shaders
+SHADER_SCENES = {'piramida.py': 2.0}
+
+SCENES = ['lab3.py', 'piramida.py', 'planety.py', 'planetyKolo.py', 'zad3.0.py',
+          'zad3.5.py', 'zad4.0.py', 'zad4.5.py', 'zad5.0.py']
+
+
+@pytest.fixture(scope='session', autouse=True)
+def gl_index():
+    """ Buduje indeks runtime.gl w osobnym procesie (jeśli nie ma go jeszcze w pamięci podręcznej) """
+    command = [sys.executable, '-c', "import headless; headless.configure('egl'); "
+                                     "from runtime.gl import load_index; load_index()"]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        if 'EGL' in completed.stderr:
+            pytest.skip(f"brak EGL: {completed.stderr.strip().splitlines()[-1]}")
+        pytest.fail(completed.stderr)
+
+
+def measure(scene):
+    """ Wynik benchmark.py dla jednej klatki sceny w nowym procesie """
+    command = [sys.executable, os.path.join(ROOT, 'benchmark.py'), scene, '--single',
+               '--frames', '1', '--warmup', '0', '--backend', 'egl']
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        if 'EGL' in completed.stderr:
+            pytest.skip(f"brak kontekstu EGL: {completed.stderr.strip().splitlines()[-1]}")
+        pytest.fail(completed.stderr)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('scene', SCENES)
+def test_first_frame_within_budget(scene):
+    result = measure(scene)
+    budget = STARTUP_BUDGET_MS * SHADER_SCENES.get(scene, 1.0)
+    assert result['first_frame_ms'] <= budget, (
+        f"{scene}: import {result['import_ms']:.1f} ms + startup {result['startup_ms']:.1f} ms"
+        f" + pierwsza klatka = {result['first_frame_ms']:.1f} ms > {budget:.0f} ms")
+
+
+@pytest.mark.parametrize('scene', sorted(set(SCENES) - set(SHADER_SCENES)))
+def test_scene_does_not_load_full_opengl(scene):
+    assert not measure(scene)['loaded']['OpenGL.GL'], f"{scene} wczytała pełne OpenGL.GL"
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Topologia siatki N x N: indeksy krawędzi i ścian liczone raz, wektorowo.
+
+Wierzchołek (i, j) siatki ma indeks i * N + j w spłaszczonej tablicy
+(N*N, 3). Jajko zapada się do jednego punktu dla u = 0 i u = 1, a szew
+v = 0 / v = 1 powtarza te same punkty, dlatego przed budową indeksów
+wierzchołki są spawane (weld) - bliskie punkty dostają wspólny indeks.
+"""
+import numpy as np
+
+
+def grid_indices(n):
+    """ Indeksy wierzchołków siatki n x n w kształcie (n, n) """
+    return np.arange(n * n, dtype=np.uint32).reshape(n, n)
+
+
+def sorted_unique(keys):
+    """
+    Unikalne wartości 1D przez sortowanie (odpowiednik np.unique z
+    return_index i return_inverse, wyraźnie szybszy dla dużych tablic).
+
+    Zwraca (unikalne klucze, indeks pierwszego wystąpienia, inverse).
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    starts = np.empty(sorted_keys.shape[0], dtype=bool)
+    starts[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=starts[1:])
+
+    inverse = np.empty(order.shape[0], dtype=np.int64)
+    inverse[order] = np.cumsum(starts) - 1
+    return sorted_keys[starts], order[starts], inverse
+
+
+def weld_vertices(vertices, tolerance=1e-5):
+    """
+    Łączy wierzchołki leżące w tej samej komórce kwantyzacji o boku
+    tolerance (współrzędne zaokrąglone do wielokrotności tolerance).
+    Dokładne kopie punktu (bieguny, szew siatki) zawsze trafiają do jednej
+    komórki. Dwa punkty bliższe niż tolerance, ale po dwóch stronach
+    granicy komórek, zostają osobno - spawanie nie porównuje par punktów.
+
+    Zwraca (unikalne wierzchołki, remap), gdzie remap[k] to nowy indeks
+    wierzchołka k z wejścia. Kolejność unikalnych wierzchołków odpowiada
+    kolejności ich pierwszego wystąpienia.
+    """
+    points = np.asarray(vertices).reshape(-1, 3)
+    cells = np.round(points.astype(np.float64) / tolerance).astype(np.int64)
+
+    # Komórka jako numer wiersza po sortowaniu leksykograficznym - bez
+    # pakowania trzech współrzędnych w jeden klucz, który przy dużym
+    # zakresie współrzędnych nie zmieściłby się w int64
+    order = np.lexsort(cells.T[::-1])
+    ordered = cells[order]
+    starts = np.ones(order.shape[0], dtype=bool)
+    starts[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    keys = np.empty(order.shape[0], dtype=np.int64)
+    keys[order] = np.cumsum(starts)
+
+    _, first, inverse = sorted_unique(keys)
+
+    # Numeracja w kolejności pierwszego wystąpienia (zachowuje lokalność siatki)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.shape[0])
+
+    remap = rank[inverse].astype(np.uint32)
+    return points[first[order]], remap
+
+
+def unique_edges(edges):
+    """ Usuwa krawędzie zerowej długości i duplikaty (a, b) / (b, a) """
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    edges = np.sort(edges, axis=1).astype(np.int64)
+
+    # Para (a, b) jako jeden klucz int64
+    stride = edges[:, 1].max() + 1 if edges.shape[0] else 1
+    keys = sorted_unique(edges[:, 0] * stride + edges[:, 1])[0]
+    return np.stack([keys // stride, keys % stride], axis=1).astype(np.uint32)
+
+
+def wireframe_edges(n, remap=None):
+    """ Krawędzie siatki n x n: (i, j)-(i+1, j) oraz (i, j)-(i, j+1), bez powtórzeń """
+    idx = grid_indices(n)
+
+    along_u = np.stack([idx[:-1, :], idx[1:, :]], axis=-1).reshape(-1, 2)
+    along_v = np.stack([idx[:, :-1], idx[:, 1:]], axis=-1).reshape(-1, 2)
+    edges = np.concatenate([along_u, along_v])
+
+    if remap is not None:
+        edges = remap[edges]
+
+    return unique_edges(edges)
+
+
+def build_wireframe(vertices, tolerance=1e-5):
+    """ Zwraca (unikalne wierzchołki, indeksy GL_LINES) dla siatki (N, N, 3) """
+    n = vertices.shape[0]
+    points, remap = weld_vertices(vertices, tolerance)
+    return points, wireframe_edges(n, remap)
+
+
+def grid_triangles(n):
+    """
+    Trójkąty siatki n x n, po dwa na każdy kwadrat (i, j):
+    (i, j) -> (i+1, j) -> (i, j+1) oraz (i+1, j) -> (i+1, j+1) -> (i, j+1).
+    Zwraca tablicę (2 * (n-1)^2, 3) uint32.
+    """
+    idx = grid_indices(n)
+
+    v1 = idx[:-1, :-1]
+    v2 = idx[1:, :-1]
+    v3 = idx[:-1, 1:]
+    v4 = idx[1:, 1:]
+
+    return np.stack([v1, v2, v3, v2, v4, v3], axis=-1).reshape(-1, 3)
+
+
+def grid_strip(n, restart_index=None):
+    """
+    Jeden GL_TRIANGLE_STRIP dla całej siatki n x n.
+
+    Rząd i to naprzemiennie (i, j) i (i+1, j) dla j = 0..n-1. Rzędy są
+    łączone znacznikiem restart_index (primitive restart, GL 3.1), a bez
+    niego zdegenerowanymi trójkątami: powtórzony ostatni indeks rzędu i
+    pierwszy indeks następnego. Każdy rząd ma parzystą liczbę indeksów,
+    więc kierunek obiegu (winding) trójkątów się nie zmienia.
+    """
+    idx = grid_indices(n)
+    rows = np.stack([idx[:-1, :], idx[1:, :]], axis=-1).reshape(n - 1, 2 * n)
+
+    if restart_index is not None:
+        separator = np.full((n - 1, 1), restart_index, dtype=np.uint32)
+        return np.concatenate([rows, separator], axis=1).reshape(-1)[:-1]
+
+    # [ostatni indeks rzędu, pierwszy indeks następnego rzędu]
+    bridges = np.stack([rows[:-1, -1], rows[1:, 0]], axis=1)
+    strip = np.concatenate([rows[:-1], bridges], axis=1).reshape(-1)
+    return np.concatenate([strip, rows[-1]])
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Kolejność trójkątów pod pamięć podręczną wierzchołków GPU (post-transform cache).
+
+GPU pamięta kilkadziesiąt ostatnio przetworzonych wierzchołków; indeks,
+którego nie ma w tej pamięci, oznacza ponowne uruchomienie przekształceń
+wierzchołka. Siatka grid_triangles() idzie rząd po rzędzie, więc przy
+rzędach dłuższych niż pamięć prawie każdy wierzchołek jest przetwarzany
+dwa razy.
+
+fan_order() to heurystyka pasów przeszukiwania wszerz - nie Tipsify
+(Sander, Nehab, Barczak, "Fast Triangle Reordering for Vertex Locality and
+Reduced Overdraw", 2007). Z Tipsify pochodzi tylko pomysł wachlarzy
+trójkątów wokół kolejnych wierzchołków; nie ma tu symulacji pamięci ani
+wyboru następnego wierzchołka według jego wieku w pamięci - kolejność
+wachlarzy jest liczona od razu dla wszystkich wierzchołków:
+
+  - przeszukiwanie wszerz (Cuthill-McKee) dzieli wierzchołki na poziomy -
+    dla jajka i sfery są to pierścienie od bieguna,
+  - każdy poziom jest cięty na pasy po band_width() wierzchołków (pozycja
+    w poziomie względem jego długości, więc pasy sąsiednich poziomów leżą
+    obok siebie), a pasy są przechodzone poziom po poziomie - w pamięci
+    mieszczą się dwa odcinki pasa,
+  - trójkąt należy do wachlarza swojego pierwszego wierzchołka w tej
+    kolejności; trójkąty są sortowane po (wachlarz, ostatni wierzchołek).
+
+Pętla Pythona przechodzi tylko po poziomach przeszukiwania (dla jajka N x N
+jest ich około N), reszta to sortowanie i indeksowanie tablic numpy.
+
+Jakość kolejności mierzą (dla modelu FIFO o CACHE_SIZE wpisach):
+  - ACMR - przetworzone wierzchołki na trójkąt (0.5 - ideał dla dużej
+    siatki, 3 - brak ponownego użycia),
+  - ATVR - przetworzone wierzchołki na wierzchołek siatki (1 - ideał).
+
+    python vertex_cache.py 30 300 1000
+"""
+import sys
+
+import numpy as np
+
+from topology import sorted_unique
+
+# Wielkość modelowanej pamięci podręcznej wierzchołków (FIFO)
+CACHE_SIZE = 32
+
+
+def vertex_triangles(triangles, vertex_count):
+    """ Sąsiedztwo wierzchołek -> trójkąty w postaci CSR: (początki (V + 1), trójkąty) """
+    flat = triangles.reshape(-1).astype(np.int64)
+    order = np.argsort(flat, kind='stable')
+    starts = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(flat, minlength=vertex_count), out=starts[1:])
+    return starts, order // 3
+
+
+def band_width(cache_size=CACHE_SIZE):
+    """ Szerokość pasa: dwa odcinki pasa i dwa wierzchołki zapasu mieszczą się w pamięci """
+    return max((cache_size - 4) // 2, 1)
+
+
+def sweep_levels(triangles, vertex_count):
+    """
+    Poziomy przeszukiwania wszerz po trójkątach, w kolejności Cuthill-McKee
+    (sąsiedzi w kolejności rodziców). Każda spójna składowa zaczyna się od
+    swojego wierzchołka o najmniejszym numerze. Zwraca (wierzchołki (V'),
+    poziom (V'), składowa (V')) - bez wierzchołków spoza trójkątów.
+    """
+    starts, adjacency = vertex_triangles(triangles, vertex_count)
+    corners = triangles.astype(np.int64)
+
+    visited = np.diff(starts) == 0
+    levels = []
+    components = []
+    component = -1
+    seed = 0
+    frontier = np.empty(0, dtype=np.int64)
+    while True:
+        if frontier.shape[0] == 0:
+            unvisited = np.flatnonzero(~visited[seed:])
+            if unvisited.shape[0] == 0:
+                break
+            seed += int(unvisited[0])
+            frontier = np.array([seed], dtype=np.int64)
+            visited[seed] = True
+            component += 1
+
+        levels.append(frontier)
+        components.append(component)
+
+        # Wierzchołki trójkątów wokół poziomu, pierwsze wystąpienie każdego nowego
+        lengths = starts[frontier + 1] - starts[frontier]
+        offsets = np.repeat(starts[frontier] - (np.cumsum(lengths) - lengths), lengths)
+        neighbours = corners[adjacency[offsets + np.arange(offsets.shape[0])]].reshape(-1)
+        neighbours = neighbours[~visited[neighbours]]
+        _, first, _ = sorted_unique(neighbours)
+        frontier = neighbours[np.sort(first)]
+        visited[frontier] = True
+
+    sizes = np.array([level.shape[0] for level in levels], dtype=np.int64)
+    vertices = np.concatenate(levels) if levels else np.empty(0, dtype=np.int64)
+    level = np.repeat(np.arange(sizes.shape[0]), sizes)
+    return vertices, level, np.repeat(np.array(components, dtype=np.int64), sizes)
+
+
+def fan_order(triangles, vertex_count=None, cache_size=CACHE_SIZE):
+    """
+    Trójkąty (T, 3) wachlarzami wzdłuż pasów przeszukiwania dla pamięci
+    o cache_size wpisach. Wierzchołki trójkątów (i kierunek obiegu) się
+    nie zmieniają.
+    """
+    triangles = np.asarray(triangles).reshape(-1, 3)
+    if vertex_count is None:
+        vertex_count = int(triangles.max()) + 1 if triangles.shape[0] else 0
+    if triangles.shape[0] == 0:
+        return triangles
+
+    vertices, level, component = sweep_levels(triangles, vertex_count)
+    sizes = np.bincount(level)
+    position = np.arange(vertices.shape[0]) - (np.cumsum(sizes) - sizes)[level]
+
+    # Tyle pasów, żeby najdłuższy poziom składowej miał ich po band_width()
+    longest = np.zeros(component[-1] + 1, dtype=np.int64)
+    np.maximum.at(longest, component, sizes[level])
+    bands = -(-longest // band_width(cache_size))
+    band = (position + 0.5) / sizes[level] * bands[component]
+
+    rank = np.zeros(vertex_count, dtype=np.int64)
+    rank[vertices[np.lexsort((position, level, band.astype(np.int64), component))]] = \
+        np.arange(vertices.shape[0])
+
+    ranks = rank[triangles.astype(np.int64)]
+    return triangles[np.lexsort((ranks.max(axis=1), ranks.min(axis=1)))]
+
+
+def cache_misses(indices, cache_size=CACHE_SIZE):
+    """
+    Liczba przetworzeń wierzchołków dla indeksów rysowanych przez pamięć
+    FIFO: wierzchołek wypada po cache_size kolejnych chybieniach, więc
+    wystarczy numer chybienia, przy którym trafił do pamięci.
+    """
+    flat = np.asarray(indices).reshape(-1).tolist()
+    inserted = [-cache_size - 1] * (max(flat) + 1 if flat else 0)
+    misses = 0
+    for vertex in flat:
+        if misses - inserted[vertex] > cache_size:
+            inserted[vertex] = misses
+            misses += 1
+    return misses
+
+
+def cache_stats(triangles, vertex_count=None, cache_size=CACHE_SIZE):
+    """ Trójkąty, przetworzenia wierzchołków, ACMR i ATVR listy trójkątów """
+    triangles = np.asarray(triangles).reshape(-1, 3)
+    if vertex_count is None:
+        vertex_count = np.unique(triangles).shape[0]
+    misses = cache_misses(triangles, cache_size)
+    return {
+        'triangles': triangles.shape[0],
+        'misses': misses,
+        'acmr': misses / max(triangles.shape[0], 1),
+        'atvr': misses / max(vertex_count, 1),
+        'cache_size': cache_size,
+    }
+
+
+def optimize_triangles(triangles, vertex_count=None, cache_size=CACHE_SIZE, limit=4_000_000):
+    """
+    Kolejność fan_order(), jeśli daje mniej przetworzeń wierzchołków niż
+    wejściowa (rzędy małej siatki mieszczą się w pamięci w całości).
+    Zwraca (trójkąty, (statystyki przed, statystyki po)) dla cache_report().
+    Siatki większe niż limit trójkątów zostają bez zmian i bez statystyk
+    (None, z komunikatem na stderr) - symulacja pamięci w cache_misses()
+    to pętla po indeksach.
+    """
+    triangles = np.asarray(triangles).reshape(-1, 3)
+    if triangles.shape[0] > limit:
+        print(f"optimize_triangles: {triangles.shape[0]} trójkątów > limit {limit} - "
+              f"kolejność bez zmian", file=sys.stderr)
+        return triangles, None
+    before = cache_stats(triangles, vertex_count, cache_size)
+    optimized = fan_order(triangles, vertex_count, cache_size)
+    after = cache_stats(optimized, vertex_count, cache_size)
+    if after['misses'] < before['misses']:
+        return optimized, (before, after)
+    return triangles, (before, before)
+
+
+def cache_report(stats, name='siatka'):
+    """ Tabela ACMR / ATVR przed i po zmianie kolejności trójkątów (z optimize_triangles()) """
+    if stats is None:
+        return f"{name}: kolejność bez zmian (siatka większa niż limit)"
+    before, after = stats
+    lines = [f"{name:<10} {'trójkąty':>9} {'ACMR':>7} {'ATVR':>7}   (FIFO {before['cache_size']})"]
+    for label, row in (('przed', before), ('po', after)):
+        lines.append(f"{label:<10} {row['triangles']:>9} {row['acmr']:>7.3f} {row['atvr']:>7.3f}")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    import time as timer
+
+    from surface import evaluate_surface_normals, egg
+    from gpu_buffers import interleave
+    from mesh_cleanup import clean_mesh
+    from topology import grid_triangles
+
+    for n in [int(arg) for arg in sys.argv[1:]] or [30, 300, 1000]:
+        vertices, normals = evaluate_surface_normals(egg, n)
+        welded, triangles, _, _ = clean_mesh(interleave(vertices, normal=normals), grid_triangles(n))
+        start = timer.perf_counter()
+        optimized = fan_order(triangles, welded.shape[0])
+        elapsed = timer.perf_counter() - start
+        before = cache_stats(triangles, welded.shape[0])
+        print(cache_report((before, cache_stats(optimized, welded.shape[0])), f"N = {n}"))
+        print(f"fan_order: {elapsed:.2f} s\n")
@@ -2,21 +2,28 @@
 import sys
 import numpy as np
 
-from glfw.GLFW import *
+from surface import evaluate_surface, egg
+from geometry_cache import cached_geometry
+from gpu_buffers import VertexBuffer
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from runtime import axes, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glColor3f, glEnable, glFlush, glLoadIdentity,
+                        glMatrixMode, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST,
+                        GL_MODELVIEW, GL_POINTS)
 
 # Ustawiamy rozdzielczość siatki (N x N)
 N = 30
 
 # Globalna tablica do przechowywania wierzchołków
-VERTICES = np.zeros((N, N, 3))
+VERTICES = np.zeros((N, N, 3), dtype=np.float32)
+
+# Bufor wierzchołków na GPU (tworzony w startup())
+VERTEX_BUFFER = None
 
 
 def startup():
     # Oblicza wierzchołki i włącza bufor głębi
-    global VERTICES, N
+    global VERTEX_BUFFER
 
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
@@ -24,61 +31,27 @@ def startup():
     # Włącz mechanizm bufora głębi
     glEnable(GL_DEPTH_TEST)
 
-    # Generowanie tablic dla u i v (od 0.0 do 1.0)
-    u_values = np.linspace(0.0, 1.0, N)
-    v_values = np.linspace(0.0, 1.0, N)
-
-    pi = np.pi
+    VERTEX_BUFFER = VertexBuffer()
+    set_resolution(N)
 
-    # Obliczanie współrzędnych x, y, z dla każdej pary (u, v)
-    for i in range(N):
-        for j in range(N):
-            u = u_values[i]
-            v = v_values[j]
 
-            # Równania parametryczne dla jajka
-            u2 = u * u
-            u3 = u2 * u
-            u4 = u3 * u
-            u5 = u4 * u
-
-            # Wspólna część dla x i z
-            P_u = (-90 * u5 + 225 * u4 - 270 * u3 + 180 * u2 - 45 * u)
+def set_resolution(n):
+    # Przelicza siatkę i wysyła ją na GPU; render() jedynie rysuje bufor
+    global VERTICES, N
 
-            x = P_u * np.cos(pi * v)
-            z = P_u * np.sin(pi * v)
-            y = 160 * u4 - 320 * u3 + 160 * u2 - 5.0
+    N = n
 
-            # Zapisanie wierzchołka w tablicy
-            VERTICES[i][j][0] = x
-            VERTICES[i][j][1] = y
-            VERTICES[i][j][2] = z
+    # Obliczanie współrzędnych x, y, z dla całej siatki (u, v) naraz
+    VERTICES = cached_geometry('egg', evaluate_surface, egg, N)
+    VERTEX_BUFFER.upload(VERTICES)
 
 
 def shutdown():
-    pass
-
+    global VERTEX_BUFFER
 
-def axes():
-    # Rysuje osie X (czerwona), Y (zielona), Z (niebieska)
-    glBegin(GL_LINES)
-
-    # X
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-5.0, 0.0, 0.0)
-    glVertex3f(5.0, 0.0, 0.0)
-
-    # Y
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -5.0, 0.0)
-    glVertex3f(0.0, 5.0, 0.0)
-
-    # Z
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -5.0)
-    glVertex3f(0.0, 0.0, 5.0)
-
-    glEnd()
+    if VERTEX_BUFFER is not None:
+        VERTEX_BUFFER.delete()
+        VERTEX_BUFFER = None
 
 
 def render(time):
@@ -88,71 +61,27 @@ def render(time):
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()  # Resetujemy macierz modelu
 
-    axes()
+    with profiled('osie'):
+        axes()
 
     # Rysowanie modelu jajka za pomocą punktów
-    glBegin(GL_POINTS)
     glColor3f(1.0, 1.0, 1.0)
 
-    # Wyświetlamy współrzędne obliczone w startup()
-    for i in range(N):
-        for j in range(N):
-            glVertex3f(VERTICES[i][j][0], VERTICES[i][j][1], VERTICES[i][j][2])
-
-    glEnd()
+    # Wszystkie N*N punktów z bufora na GPU jednym wywołaniem glDrawArrays
+    with profiled('siatka'):
+        VERTEX_BUFFER.draw(GL_POINTS)
 
     glFlush()
 
 
 def update_viewport(window, width, height):
     # Ustawia rzutnię 3D (ortogonalną)
-    if height == 0:
-        height = 1
-    if width == 0:
-        width = 1
-    aspect_ratio = width / height
-
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-
-    # Ustawiamy rzutnię ortogonalną na podstawie wskazówek
     # Zakresy [-7.5, 7.5] pasują do modelu (Y: -5 do 5, X/Z: ~-3.6 do 3.6)
-    if width <= height:
-        glOrtho(-7.5, 7.5, -7.5 / aspect_ratio, 7.5 / aspect_ratio, -10.0, 10.0)
-    else:
-        glOrtho(-7.5 * aspect_ratio, 7.5 * aspect_ratio, -7.5, 7.5, -10.0, 10.0)
-
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    ortho_viewport(width, height, 7.5, -10.0, 10.0)
 
 
 def main():
-    if not glfwInit():
-        sys.exit(-1)
-
-    window = glfwCreateWindow(400, 400, "Model Jajka (Punkty), 3.0", None, None)
-    if not window:
-        glfwTerminate()
-        sys.exit(-1)
-
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
-
-    # Wymuszenie aktualizacji rzutni przy starcie
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
-
-    startup()
-
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
-
-    shutdown()
-    glfwTerminate()
+    run(sys.modules[__name__], "Model Jajka (Punkty), 3.0")
 
 
 if __name__ == '__main__':
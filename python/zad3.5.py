@@ -3,69 +3,51 @@ import sys
 import numpy as np
 import math
 
-from glfw.GLFW import *
+from surface import evaluate_surface, egg
+from geometry_cache import cached_geometry
+from topology import build_wireframe
+from gpu_buffers import VertexBuffer, IndexBuffer
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from runtime import axes, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glColor3f, glEnable, glFlush, glLoadIdentity,
+                        glMatrixMode, glRotatef, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT,
+                        GL_DEPTH_TEST, GL_LINES, GL_MODELVIEW)
 
 N = 30
 
-VERTICES = np.zeros((N, N, 3))
+VERTICES = np.zeros((N, N, 3), dtype=np.float32)
+
+# Wspólny bufor wierzchołków i bufor indeksów krawędzi (GL_LINES)
+VERTEX_BUFFER = None
+EDGE_BUFFER = None
 
 
 def startup():
-    global VERTICES, N
+    global VERTICES, VERTEX_BUFFER, EDGE_BUFFER
 
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
 
     glEnable(GL_DEPTH_TEST)
 
-    u_values = np.linspace(0.0, 1.0, N)
-    v_values = np.linspace(0.0, 1.0, N)
-
-    pi = np.pi
-
-    for i in range(N):
-        for j in range(N):
-            u = u_values[i]
-            v = v_values[j]
+    VERTICES = cached_geometry('egg', evaluate_surface, egg, N)
 
-            u2 = u * u
-            u3 = u2 * u
-            u4 = u3 * u
-            u5 = u4 * u
+    # Krawędzie liczone raz: bez powtórzeń i bez krawędzi zerowej długości
+    # (biegun jajka dla u = 0 i u = 1 to jeden punkt, szew v = 0 / v = 1
+    # powtarza te same wierzchołki)
+    points, edges = cached_geometry('egg-wireframe', build_wireframe, VERTICES)
+    VERTEX_BUFFER = VertexBuffer(points)
+    EDGE_BUFFER = IndexBuffer(edges)
 
-            P_u = (-90 * u5 + 225 * u4 - 270 * u3 + 180 * u2 - 45 * u)
 
-            x = P_u * np.cos(pi * v)
-            z = P_u * np.sin(pi * v)
-            y = 160 * u4 - 320 * u3 + 160 * u2 - 5.0
-
-            VERTICES[i][j][0] = x
-            VERTICES[i][j][1] = y
-            VERTICES[i][j][2] = z
+def shutdown():
+    global VERTEX_BUFFER, EDGE_BUFFER
 
+    if EDGE_BUFFER is not None:
+        EDGE_BUFFER.delete()
+        VERTEX_BUFFER.delete()
+        EDGE_BUFFER = VERTEX_BUFFER = None
 
-def shutdown():
-    pass
-
-
-def axes():
-    glBegin(GL_LINES)
-    # X (Czerwona)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-5.0, 0.0, 0.0)
-    glVertex3f(5.0, 0.0, 0.0)
-    # Y (Zielona)
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -5.0, 0.0)
-    glVertex3f(0.0, 5.0, 0.0)
-    # Z (Niebieska)
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -5.0)
-    glVertex3f(0.0, 0.0, 5.0)
-    glEnd()
 
 def spin(angle):
     # Obraca scenę wokół osi X, Y i Z
@@ -82,79 +64,23 @@ def render(time):
     angle = time * 180 / math.pi
     spin(angle)
 
-    axes()
+    with profiled('osie'):
+        axes()
 
-    # Rysowanie liniami
-    glBegin(GL_LINES)
+    # Rysowanie liniami - cała siatka jednym glDrawElements
     glColor3f(1.0, 1.0, 1.0)
-
-    # Używamy pętli do N-1, aby uniknąć wyjścia poza zakres tablicy
-    # podczas łączenia z (i+1) lub (j+1)
-
-    # Rysowanie linii "pionowych" (wzdłuż osi u)
-    # Łączymy (i, j) z (i+1, j)
-    for i in range(N - 1):
-        for j in range(N):
-            glVertex3fv(VERTICES[i][j])
-            glVertex3fv(VERTICES[i + 1][j])
-
-    # Rysowanie linii "poziomych" (wzdłuż osi v)
-    # Łączymy (i, j) z (i, j+1)
-    for i in range(N):
-        for j in range(N - 1):
-            glVertex3fv(VERTICES[i][j])
-            glVertex3fv(VERTICES[i][j + 1])
-
-    glEnd()
+    with profiled('siatka'):
+        EDGE_BUFFER.draw(VERTEX_BUFFER, GL_LINES)
 
     glFlush()
 
 
 def update_viewport(window, width, height):
-    if height == 0:
-        height = 1
-    if width == 0:
-        width = 1
-    aspect_ratio = width / height
-
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-
-    if width <= height:
-        glOrtho(-7.5, 7.5, -7.5 / aspect_ratio, 7.5 / aspect_ratio, -10.0, 10.0)
-    else:
-        glOrtho(-7.5 * aspect_ratio, 7.5 * aspect_ratio, -7.5, 7.5, -10.0, 10.0)
-
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    ortho_viewport(width, height, 7.5, -10.0, 10.0)
 
 
 def main():
-    if not glfwInit():
-        sys.exit(-1)
-
-    window = glfwCreateWindow(400, 400, "Jajko 3D, 3.5", None, None)
-    if not window:
-        glfwTerminate()
-        sys.exit(-1)
-
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
-
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
-
-    startup()
-
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
-
-    shutdown()
-    glfwTerminate()
+    run(sys.modules[__name__], "Jajko 3D, 3.5")
 
 
 if __name__ == '__main__':
@@ -2,70 +2,119 @@
 import sys
 import numpy as np
 import math
-import random
+import time as timer
+
+from surface import evaluate_surface_normals, egg
+from color_schemes import SCHEMES, vertex_colors
+from geometry_cache import cached_geometry
+from mesh_cleanup import clean_mesh, cleanup_report
+from vertex_cache import cache_report, optimize_triangles
+from orbits import ortho_pixel_scale
+from tessellation import adaptive_surface
+from topology import grid_triangles
+from gpu_buffers import VertexBuffer, IndexBuffer, interleave
+
+from runtime import axes, lighting, ortho_viewport, profiled, run
+from runtime.gl import (glBegin, glClear, glClearColor, glColor4ubv, glDisable, glEnable, glEnd,
+                        glFinish, glFlush, glLoadIdentity, glMatrixMode, glRotatef, glVertex3fv,
+                        GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST, GL_LIGHTING,
+                        GL_MODELVIEW, GL_TRIANGLES)
 
-from glfw.GLFW import *
+N = 30
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+# Globalne tablice na współrzędne, normalne i kolory
+VERTICES = np.zeros((N, N, 3), dtype=np.float32)
+NORMALS = np.zeros((N, N, 3), dtype=np.float32)
+COLORS = np.zeros((N, N, 4), dtype=np.uint8)
 
-N = 30
+# Kolory wierzchołków: schemat z color_schemes.SCHEMES ('random', 'height',
+# 'normal') i ziarno generatora - te same kolory w każdym uruchomieniu
+COLOR_SCHEME = 'random'
+COLOR_SEED = 0
+
+# Siatka indeksowana: przeplatane pozycje, kolory i normalne (każdy
+# wierzchołek raz) oraz indeksy trójkątów liczone raz w startup()
+VERTEX_BUFFER = None
+TRIANGLE_BUFFER = None
+
+# True - stara ścieżka glBegin/glEnd (do porównania w trybie pomiaru)
+IMMEDIATE_MODE = False
+
+# Oświetlenie siatki (normalne są w buforze wierzchołków razem z pozycjami)
+LIGHTING = True
+
+# Dopuszczalny błąd siatki adaptacyjnej w pikselach ekranu (python zad4.0.py
+# --adaptive [piksele]); None - siatka równomierna N x N
+ADAPTIVE_PIXEL_ERROR = None
+ADAPTIVE_MAX_ERROR = None
 
-# Globalne tablice na współrzędne i kolory
-VERTICES = np.zeros((N, N, 3))
-COLORS = np.zeros((N, N, 3))
+# True - raport czyszczenia siatki i kolejności trójkątów po każdym jej zbudowaniu
+# (python zad4.0.py --report)
+MESH_REPORT = False
 
 
 def startup():
-    global VERTICES, COLORS, N
+    global VERTEX_BUFFER, TRIANGLE_BUFFER
 
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
     glEnable(GL_DEPTH_TEST)
+    lighting()
+
+    VERTEX_BUFFER = VertexBuffer()
+    TRIANGLE_BUFFER = IndexBuffer()
+    if ADAPTIVE_MAX_ERROR is not None:
+        build_adaptive_mesh(ADAPTIVE_MAX_ERROR)
+    else:
+        stats, order_stats = build_mesh(N)
+        if MESH_REPORT:
+            print(cleanup_report(stats, 'jajko'))
+            print(cache_report(order_stats, 'jajko'))
+
+
+def build_mesh(n):
+    global VERTICES, NORMALS, COLORS, N
+
+    N = n
+    # Wierzchołki i normalne analityczne (z pochodnych cząstkowych) dla całej siatki
+    VERTICES, NORMALS = cached_geometry('egg-normals', evaluate_surface_normals, egg, N)
 
-    u_values = np.linspace(0.0, 1.0, N)
-    v_values = np.linspace(0.0, 1.0, N)
-    pi = np.pi
+    # Kolor RGBA uint8 dla każdego wierzchołka (jednym przebiegiem, z ziarnem)
+    COLORS = vertex_colors(COLOR_SCHEME, VERTICES, NORMALS, COLOR_SEED)
 
-    for i in range(N):
-        for j in range(N):
-            u = u_values[i]
-            v = v_values[j]
+    # Bieguny i szew v = 0 / v = 1 powtarzają punkty: spawanie, bez trójkątów
+    # zdegenerowanych, indeksy uint16 dla N <= 256
+    vertices, rows, _, stats = clean_mesh(interleave(VERTICES, COLORS, NORMALS), grid_triangles(N))
 
-            # Równania parametryczne
-            u2, u3, u4, u5 = u * u, u * u * u, u * u * u * u, u * u * u * u * u
-            P_u = (-90 * u5 + 225 * u4 - 270 * u3 + 180 * u2 - 45 * u)
+    # Trójkąty w kolejności przyjaznej pamięci podręcznej wierzchołków GPU
+    triangles, order_stats = optimize_triangles(rows, vertices.shape[0])
+    VERTEX_BUFFER.upload(vertices)
+    TRIANGLE_BUFFER.upload(triangles)
+    return stats, order_stats
 
-            x = P_u * np.cos(pi * v)
-            z = P_u * np.sin(pi * v)
-            y = 160 * u4 - 320 * u3 + 160 * u2 - 5.0
 
-            VERTICES[i][j][0] = x
-            VERTICES[i][j][1] = y
-            VERTICES[i][j][2] = z
+def build_adaptive_mesh(max_error):
+    # Rzędy i pierścienie gęstsze tylko tam, gdzie wymaga tego krzywizna jajka
+    vertices, normals, triangles = adaptive_surface(egg, max_error)
+    colors = vertex_colors(COLOR_SCHEME, vertices, normals, COLOR_SEED)
 
-            # Losowy kolor dla każdego wierzchołka
-            COLORS[i][j][0] = random.random()  # R
-            COLORS[i][j][1] = random.random()  # G
-            COLORS[i][j][2] = random.random()  # B
+    # Siatka adaptacyjna nadal powtarza punkty szwu v = 0 / v = 1
+    vertices, rings, _, stats = clean_mesh(interleave(vertices, colors, normals), triangles)
+    triangles, order_stats = optimize_triangles(rings, vertices.shape[0])
+    VERTEX_BUFFER.upload(vertices)
+    TRIANGLE_BUFFER.upload(triangles)
+    if MESH_REPORT:
+        print(cleanup_report(stats, 'jajko'))
+        print(cache_report(order_stats, 'jajko'))
 
 
 def shutdown():
-    pass
-
-
-def axes():
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-5.0, 0.0, 0.0);
-    glVertex3f(5.0, 0.0, 0.0)
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -5.0, 0.0);
-    glVertex3f(0.0, 5.0, 0.0)
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -5.0);
-    glVertex3f(0.0, 0.0, 5.0)
-    glEnd()
+    global VERTEX_BUFFER, TRIANGLE_BUFFER
+
+    if VERTEX_BUFFER is not None:
+        VERTEX_BUFFER.delete()
+        TRIANGLE_BUFFER.delete()
+        VERTEX_BUFFER = TRIANGLE_BUFFER = None
 
 
 def spin(angle):
@@ -74,17 +123,8 @@ def spin(angle):
     glRotatef(angle, 0.0, 0.0, 1.0)
 
 
-def render(time):
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
-
-    angle = time * 180 / math.pi
-    spin(angle)
-
-    axes()
-
-    # Rysowanie trójkątami
+def draw_mesh_immediate():
+    # Dotychczasowa wersja: 12 wywołań glColor4ubv/glVertex3fv na kwadrat siatki
     glBegin(GL_TRIANGLES)
 
     for i in range(N - 1):  # Iterujemy do N-1, aby nie wyjść poza zakres
@@ -105,70 +145,150 @@ def render(time):
 
             # Trójkąt 1 (główny)
             # (i, j) -> (i+1, j) -> (i, j+1)
-            glColor3fv(c1);
+            glColor4ubv(c1);
             glVertex3fv(v1)
-            glColor3fv(c2);
+            glColor4ubv(c2);
             glVertex3fv(v2)
-            glColor3fv(c3);
+            glColor4ubv(c3);
             glVertex3fv(v3)
 
             # Trójkąt 2 (dopełniający)
             # (i+1, j) -> (i+1, j+1) -> (i, j+1)
-            glColor3fv(c2);
+            glColor4ubv(c2);
             glVertex3fv(v2)
-            glColor3fv(c4);
+            glColor4ubv(c4);
             glVertex3fv(v4)
-            glColor3fv(c3);
+            glColor4ubv(c3);
             glVertex3fv(v3)
 
     glEnd()
 
-    glFlush()
-
-
-def update_viewport(window, width, height):
-    if height == 0: height = 1
-    if width == 0: width = 1
-    aspect_ratio = width / height
 
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
+def render(time):
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
-    if width <= height:
-        glOrtho(-7.5, 7.5, -7.5 / aspect_ratio, 7.5 / aspect_ratio, -10.0, 10.0)
-    else:
-        glOrtho(-7.5 * aspect_ratio, 7.5 * aspect_ratio, -7.5, 7.5, -10.0, 10.0)
+    angle = time * 180 / math.pi
+    spin(angle)
 
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    with profiled('osie'):
+        axes()
 
+    # Rysowanie trójkątami
+    if LIGHTING:
+        glEnable(GL_LIGHTING)
+    with profiled('siatka'):
+        if IMMEDIATE_MODE:
+            draw_mesh_immediate()
+        else:
+            TRIANGLE_BUFFER.draw(VERTEX_BUFFER, GL_TRIANGLES)
+    glDisable(GL_LIGHTING)
+
+    glFlush()
 
-def main():
-    if not glfwInit():
-        sys.exit(-1)
 
-    window = glfwCreateWindow(400, 400, "Jajko 3D (Trójkąty), 4.0", None, None)
-    if not window:
-        glfwTerminate()
-        sys.exit(-1)
+def measure(sizes, frames=10, immediate_limit=1000):
+    """
+    Tryb pomiaru: dla każdego N porównuje starą ścieżkę glBegin/glEnd
+    z siatką indeksowaną: wierzchołki przetwarzane przez rysowanie (dla
+    siatki indeksowanej - liczba indeksów w glDrawElements), bajty
+    wysyłane z CPU na klatkę i czas klatki.
+
+    Stara ścieżka nie wysyła normalnych, więc na czas pomiaru oświetlenie
+    jest wyłączone w obu ścieżkach - obie rysują ten sam obraz.
+
+    Powyżej immediate_limit stara ścieżka trwałaby minuty na klatkę, więc
+    jej czas jest szacowany liniowo z czasu na kwadrat siatki (oznaczony ~).
+    """
+    global IMMEDIATE_MODE, LIGHTING
+
+    lit = LIGHTING
+    LIGHTING = False
+
+    print(f"{'N':>6} {'tryb':>12} {'wierzch./klatkę':>16} {'z CPU [B]':>12} {'wywołania GL':>13} "
+          f"{'czas [ms]':>11}")
+    time_per_quad = None
+
+    for n in sizes:
+        build_mesh(n)
+        quads = (n - 1) * (n - 1)
+
+        for immediate in (True, False):
+            IMMEDIATE_MODE = immediate
+            if immediate:
+                # 6 wierzchołków na kwadrat, każdy z glColor4ubv (4 B) i glVertex3fv (12 B)
+                processed, uploaded, calls = 6 * quads, 6 * quads * 16, 12 * quads + 2
+                mode = 'glBegin'
+            else:
+                # Wierzchołki są już na GPU, z CPU idzie tylko jedno glDrawElements;
+                # GPU pobiera po jednym wierzchołku na indeks
+                processed, uploaded, calls = TRIANGLE_BUFFER.count, 0, 1
+                mode = 'indeksowana'
+                render(0.0)
+                glFinish()
+
+            if immediate and n > immediate_limit and time_per_quad is not None:
+                print(f"{n:>6} {mode:>12} {processed:>16} {uploaded:>12} {calls:>13} "
+                      f"{'~':>1}{time_per_quad * quads:>10.2f}")
+                continue
+
+            count = frames if not immediate or n <= 300 else 1
+            start = timer.perf_counter()
+            for frame in range(count):
+                render(frame / 60.0)
+            glFinish()
+            frame_time = (timer.perf_counter() - start) / count * 1000.0
+
+            if immediate:
+                time_per_quad = frame_time / quads
+            print(f"{n:>6} {mode:>12} {processed:>16} {uploaded:>12} {calls:>13} {frame_time:>11.2f}")
+
+    IMMEDIATE_MODE = False
+    LIGHTING = lit
 
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
 
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
+def update_viewport(window, width, height):
+    global ADAPTIVE_MAX_ERROR
 
-    startup()
+    if ADAPTIVE_PIXEL_ERROR is not None:
+        max_error = ADAPTIVE_PIXEL_ERROR / ortho_pixel_scale(width, height, 7.5)
+        if max_error != ADAPTIVE_MAX_ERROR:
+            ADAPTIVE_MAX_ERROR = max_error
+            if VERTEX_BUFFER is not None:
+                build_adaptive_mesh(max_error)
+    ortho_viewport(width, height, 7.5, -10.0, 10.0)
 
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
 
-    shutdown()
-    glfwTerminate()
+def main():
+    global ADAPTIVE_PIXEL_ERROR, COLOR_SCHEME, MESH_REPORT
+
+    scene = sys.modules[__name__]
+    MESH_REPORT = '--report' in sys.argv
+
+    # python zad4.0.py --adaptive [piksele] - siatka adaptacyjna zamiast N x N
+    if '--adaptive' in sys.argv:
+        arguments = sys.argv[sys.argv.index('--adaptive') + 1:]
+        ADAPTIVE_PIXEL_ERROR = float(arguments[0]) if arguments and not arguments[0].startswith('--') else 0.5
+
+    # python zad4.0.py --colors height - schemat kolorów wierzchołków
+    if '--colors' in sys.argv:
+        arguments = sys.argv[sys.argv.index('--colors') + 1:]
+        if not arguments or arguments[0] not in SCHEMES:
+            print(f"Użycie: python zad4.0.py --colors {'|'.join(SCHEMES)}", file=sys.stderr)
+            sys.exit(2)
+        COLOR_SCHEME = arguments[0]
+
+    # python zad4.0.py --measure [N ...] - pomiar zamiast pętli okna
+    if '--measure' in sys.argv:
+        sizes = []
+        for arg in sys.argv[sys.argv.index('--measure') + 1:]:
+            if arg.startswith('--'):
+                break
+            sizes.append(int(arg))
+        run(scene, "Jajko 3D (Trójkąty), 4.0", task=lambda: measure(sizes or [30, 300, 3000]))
+    else:
+        run(scene, "Jajko 3D (Trójkąty), 4.0")
 
 
 if __name__ == '__main__':
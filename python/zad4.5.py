@@ -2,68 +2,81 @@
 import sys
 import numpy as np
 import math
-import random
 
-from glfw.GLFW import *
+from surface import evaluate_surface_normals, egg
+from color_schemes import SCHEMES, vertex_colors
+from geometry_cache import cached_geometry
+from mesh_cleanup import clean_mesh, cleanup_report
+from topology import grid_strip
+from gpu_buffers import VertexBuffer, IndexBuffer, interleave
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from runtime import axes, lighting, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glDisable, glEnable, glFlush, glLoadIdentity,
+                        glMatrixMode, glPrimitiveRestartIndex, glRotatef, GL_COLOR_BUFFER_BIT,
+                        GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST, GL_LIGHTING, GL_MODELVIEW,
+                        GL_TRIANGLE_STRIP)
 
 N = 30
 
-VERTICES = np.zeros((N, N, 3))
-COLORS = np.zeros((N, N, 3))
+VERTICES = np.zeros((N, N, 3), dtype=np.float32)
+NORMALS = np.zeros((N, N, 3), dtype=np.float32)
+COLORS = np.zeros((N, N, 4), dtype=np.uint8)
+
+# Kolory wierzchołków: schemat z color_schemes.SCHEMES ('random', 'height',
+# 'normal') i ziarno generatora - te same kolory w każdym uruchomieniu
+COLOR_SCHEME = 'random'
+COLOR_SEED = 0
+
+# Znacznik primitive restart (największa wartość indeksu uint32)
+RESTART_INDEX = 0xFFFFFFFF
+
+# Wierzchołki (pozycja + kolor + normalna) i jeden pasek łączący wszystkie rzędy
+VERTEX_BUFFER = None
+STRIP_BUFFER = None
+
+# Oświetlenie siatki (normalne są w buforze wierzchołków razem z pozycjami)
+LIGHTING = True
+
+# True - raport czyszczenia siatki w startup() (python zad4.5.py --report)
+MESH_REPORT = False
 
 
 def startup():
-    global VERTICES, COLORS, N
+    global VERTICES, NORMALS, COLORS, VERTEX_BUFFER, STRIP_BUFFER
 
     update_viewport(None, 400, 400)
     glClearColor(0.0, 0.0, 0.0, 1.0)
     glEnable(GL_DEPTH_TEST)
+    lighting()
 
-    u_values = np.linspace(0.0, 1.0, N)
-    v_values = np.linspace(0.0, 1.0, N)
-    pi = np.pi
+    # Wierzchołki i normalne analityczne (z pochodnych cząstkowych) dla całej siatki
+    VERTICES, NORMALS = cached_geometry('egg-normals', evaluate_surface_normals, egg, N)
 
-    for i in range(N):
-        for j in range(N):
-            u = u_values[i]
-            v = v_values[j]
+    # Kolor przypisany na stałe (bez migotania): RGBA uint8 z ziarnem
+    COLORS = vertex_colors(COLOR_SCHEME, VERTICES, NORMALS, COLOR_SEED)
 
-            u2, u3, u4, u5 = u * u, u * u * u, u * u * u * u, u * u * u * u * u
-            P_u = (-90 * u5 + 225 * u4 - 270 * u3 + 180 * u2 - 45 * u)
+    # Primitive restart wymaga OpenGL 3.1, inaczej łączymy rzędy
+    # zdegenerowanymi trójkątami
+    restart_index = RESTART_INDEX if bool(glPrimitiveRestartIndex) else None
 
-            x = P_u * np.cos(pi * v)
-            z = P_u * np.sin(pi * v)
-            y = 160 * u4 - 320 * u3 + 160 * u2 - 5.0
+    # Spawanie biegunów i szwu v = 0 / v = 1, indeksy uint16 (restart 0xFFFF)
+    vertices, strip, restart_index, stats = clean_mesh(interleave(VERTICES, COLORS, NORMALS),
+                                                       grid_strip(N, restart_index), strip=True,
+                                                       restart_index=restart_index)
+    if MESH_REPORT:
+        print(cleanup_report(stats, 'jajko'))
 
-            VERTICES[i][j][0] = x
-            VERTICES[i][j][1] = y
-            VERTICES[i][j][2] = z
-
-            # Kolor przypisany na stałe (bez migotania)
-            COLORS[i][j][0] = random.random()  # R
-            COLORS[i][j][1] = random.random()  # G
-            COLORS[i][j][2] = random.random()  # B
+    VERTEX_BUFFER = VertexBuffer(vertices)
+    STRIP_BUFFER = IndexBuffer(strip, restart_index=restart_index)
 
 
 def shutdown():
-    pass
-
+    global VERTEX_BUFFER, STRIP_BUFFER
 
-def axes():
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.0, 0.0)
-    glVertex3f(-5.0, 0.0, 0.0);
-    glVertex3f(5.0, 0.0, 0.0)
-    glColor3f(0.0, 1.0, 0.0)
-    glVertex3f(0.0, -5.0, 0.0);
-    glVertex3f(0.0, 5.0, 0.0)
-    glColor3f(0.0, 0.0, 1.0)
-    glVertex3f(0.0, 0.0, -5.0);
-    glVertex3f(0.0, 0.0, 5.0)
-    glEnd()
+    if VERTEX_BUFFER is not None:
+        VERTEX_BUFFER.delete()
+        STRIP_BUFFER.delete()
+        VERTEX_BUFFER = STRIP_BUFFER = None
 
 
 def spin(angle):
@@ -80,72 +93,38 @@ def render(time):
     angle = time * 180 / math.pi
     spin(angle)
 
-    axes()
+    with profiled('osie'):
+        axes()
 
     # Rysowanie paskami (GL_TRIANGLE_STRIP)
-    # Tworzymy N-1 pasków (warstw)
-    for i in range(N - 1):
-        glBegin(GL_TRIANGLE_STRIP)  # Rozpoczynamy nowy pasek
-
-        # Iterujemy N razy, aby dodać N*2 wierzchołków do paska
-        # (tworząc (N-1)*2 trójkąty)
-        for j in range(N):
-            # Wierzchołek z rzędu (i, j)
-            glColor3fv(COLORS[i][j])
-            glVertex3fv(VERTICES[i][j])
-
-            # Wierzchołek z rzędu (i+1, j)
-            glColor3fv(COLORS[i + 1][j])
-            glVertex3fv(VERTICES[i + 1][j])
-
-        glEnd()
+    # Wszystkie N-1 rzędów to jeden pasek - jedno wywołanie glDrawElements
+    if LIGHTING:
+        glEnable(GL_LIGHTING)
+    with profiled('siatka'):
+        STRIP_BUFFER.draw(VERTEX_BUFFER, GL_TRIANGLE_STRIP)
+    glDisable(GL_LIGHTING)
 
     glFlush()
 
 
 def update_viewport(window, width, height):
-    if height == 0: height = 1
-    if width == 0: width = 1
-    aspect_ratio = width / height
-
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-
-    if width <= height:
-        glOrtho(-7.5, 7.5, -7.5 / aspect_ratio, 7.5 / aspect_ratio, -10.0, 10.0)
-    else:
-        glOrtho(-7.5 * aspect_ratio, 7.5 * aspect_ratio, -7.5, 7.5, -10.0, 10.0)
-
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    ortho_viewport(width, height, 7.5, -10.0, 10.0)
 
 
 def main():
-    if not glfwInit():
-        sys.exit(-1)
-
-    window = glfwCreateWindow(400, 400, "Jajko 3D (Triangle Strip), 4.5", None, None)
-    if not window:
-        glfwTerminate()
-        sys.exit(-1)
-
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
-
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
+    global COLOR_SCHEME, MESH_REPORT
 
-    startup()
+    MESH_REPORT = '--report' in sys.argv
 
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
+    # python zad4.5.py --colors height - schemat kolorów wierzchołków
+    if '--colors' in sys.argv:
+        arguments = sys.argv[sys.argv.index('--colors') + 1:]
+        if not arguments or arguments[0] not in SCHEMES:
+            print(f"Użycie: python zad4.5.py --colors {'|'.join(SCHEMES)}", file=sys.stderr)
+            sys.exit(2)
+        COLOR_SCHEME = arguments[0]
 
-    shutdown()
-    glfwTerminate()
+    run(sys.modules[__name__], "Jajko 3D (Triangle Strip), 4.5")
 
 
 if __name__ == '__main__':
@@ -3,13 +3,19 @@ import sys
 import numpy as np
 import math
 
-from glfw.GLFW import *
+from kepler import kepler_positions
+from orbits import OrbitCache, ortho_pixel_scale, segment_report
+from meshes import sphere_mesh, release_meshes
+from belt import AsteroidBelt, frame_time_report
+from simulation import FixedStepSimulation
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from runtime import axes, ortho_viewport, profiled, run
+from runtime.gl import (glClear, glClearColor, glColor3f, glEnable, glFlush, glLoadIdentity,
+                        glMatrixMode, glPopMatrix, glPushMatrix, glRotatef, glScalef, glTranslatef,
+                        GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, GL_DEPTH_TEST, GL_MODELVIEW)
 
 N = 20
-VERTICES = np.zeros((N, N, 3))
+SPHERE_MESH = None  # współdzielona sfera na GPU (Słońce i planety)
 
 # STAŁE FIZYCZNE I GEOMETRYCZNE (Dla Praw Keplera)
 G_GRAV = 1.0;
@@ -25,43 +31,57 @@ FOCAL_DIST_2 = A2 * E2
 ORBIT_SPEED_FAC_1 = math.sqrt(G_GRAV * M_SUN / (A1 ** 3))
 ORBIT_SPEED_FAC_2 = math.sqrt(G_GRAV * M_SUN / (A2 ** 3))
 
+ORBIT_CACHE = None  # bufory orbit na GPU
+ORTHO_EXTENT = 12.0  # glOrtho +-ORTHO_EXTENT, także skala błędu w pikselach
+ORBIT_REPORT = False  # opis liczby segmentów orbit po zmianie rozmiaru okna (--report)
+ORBIT_PIXEL_ERROR = 0.5  # dopuszczalny błąd łamanej orbity w pikselach
+ORBIT_MAX_ERROR = 0.05  # to samo w jednostkach sceny (z update_viewport)
+BELT_SIZE = 0  # pas planetoid (python zad5.0.py --belt 100000 / --belt-report)
+BELT = None
+THREADED_SIMULATION = False  # pozycje ze stałym krokiem w osobnym wątku, render() interpoluje (--threaded)
+SIMULATION_DT = 1.0 / 120.0
+SIMULATION = None
+SIMULATION_BELT = None  # pas, dla którego uruchomiono symulację
+
 
 def startup():
-    global VERTICES, N
+    global SPHERE_MESH, ORBIT_CACHE, BELT
     update_viewport(None, 400, 400);
     glClearColor(0.0, 0.0, 0.0, 1.0);
     glEnable(GL_DEPTH_TEST)
-    u_values = np.linspace(0.0, 1.0, N);
-    v_values = np.linspace(0.0, 1.0, N)
-    pi = np.pi;
-    radius = 1.0
-    for i in range(N):
-        for j in range(N):
-            phi = u_values[i] * pi;
-            theta = v_values[j] * 2 * pi
-            x = radius * math.sin(phi) * math.cos(theta)
-            y = radius * math.cos(phi)
-            z = radius * math.sin(phi) * math.sin(theta)
-            VERTICES[i][j][0] = x;
-            VERTICES[i][j][1] = y;
-            VERTICES[i][j][2] = z
-
-
-def shutdown(): pass
-
-
-def axes():
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.0, 0.0);
-    glVertex3f(-12.0, 0.0, 0.0);
-    glVertex3f(12.0, 0.0, 0.0)
-    glColor3f(0.0, 1.0, 0.0);
-    glVertex3f(0.0, -12.0, 0.0);
-    glVertex3f(0.0, 12.0, 0.0)
-    glColor3f(0.0, 0.0, 1.0);
-    glVertex3f(0.0, 0.0, -12.0);
-    glVertex3f(0.0, 0.0, 12.0)
-    glEnd()
+    SPHERE_MESH = sphere_mesh(N)
+    ORBIT_CACHE = OrbitCache()
+    if BELT_SIZE > 0: BELT = AsteroidBelt(BELT_SIZE)
+
+
+def shutdown():
+    stop_simulation()
+    if ORBIT_CACHE is not None: ORBIT_CACHE.clear()
+    if BELT is not None: BELT.delete()
+    release_meshes()
+
+
+def simulate(time, out, belt):
+    # Wiersze 0-1: planety, dalej pas planetoid
+    kepler_positions([A1, A2], [E1, E2], time, [ORBIT_SPEED_FAC_1, ORBIT_SPEED_FAC_2], out=out[:2])
+    if belt is not None: belt.positions(time, out[2:])
+
+
+def start_simulation(time):
+    global SIMULATION, SIMULATION_BELT
+    stop_simulation()
+    belt = BELT
+    count = 2 + (belt.count if belt is not None else 0)
+    SIMULATION = FixedStepSimulation(lambda step_time, out: simulate(step_time, out, belt), count, SIMULATION_DT)
+    SIMULATION_BELT = belt
+    SIMULATION.start(time)
+
+
+def stop_simulation():
+    global SIMULATION
+    if SIMULATION is not None:
+        SIMULATION.stop()
+        SIMULATION = None
 
 
 # Nowa funkcja obracająca całą scenę (nie tylko kamerę)
@@ -71,39 +91,13 @@ def rotate_system(angle):
 
 
 def draw_sphere_model():
-    global VERTICES, N
-    for i in range(N - 1):
-        glBegin(GL_TRIANGLE_STRIP)
-        for j in range(N):
-            glVertex3fv(VERTICES[i][j]);
-            glVertex3fv(VERTICES[i + 1][j])
-        glEnd()
-
-
-# ... (draw_orbit i get_kepler_position bez zmian)
-
-def get_kepler_position(A, E, time, orbit_speed_fac):
-    M = time * orbit_speed_fac
-    E_anomaly = M
-    for _ in range(5):
-        E_anomaly = E_anomaly - (E_anomaly - E * math.sin(E_anomaly) - M) / (1 - E * math.cos(E_anomaly))
-    x_pos = A * (math.cos(E_anomaly) - E)
-    z_pos = A * math.sqrt(1 - E ** 2) * math.sin(E_anomaly)
-    return x_pos, z_pos
+    # Sfera jest już na GPU - ciało zmienia tylko macierz i kolor przed wywołaniem
+    SPHERE_MESH.draw()
 
 
 def draw_orbit(A, B, FOCAL_DIST):
-    glBegin(GL_LINE_LOOP);
     glColor3f(0.5, 0.5, 0.5);
-    segments = 150
-    for i in range(segments):
-        angle = (i / segments) * 2 * math.pi
-        x_ellip = A * math.cos(angle);
-        z_ellip = B * math.sin(angle)
-        x = x_ellip + FOCAL_DIST;
-        z = z_ellip
-        glVertex3f(x, 0.0, z)
-    glEnd()
+    ORBIT_CACHE.draw(A, B, FOCAL_DIST, max_error=ORBIT_MAX_ERROR)
 
 
 # ... (Koniec draw_orbit)
@@ -121,21 +115,31 @@ def render(time):
     rotate_system(angle)  # Obrót sceny
     # ---------------------------------------------
 
-    axes()
+    with profiled('osie'):
+        axes(12.0)
 
     # 1. Rysujemy Słońce (znajduje się w ognisku: 0,0,0)
     glPushMatrix()
     glColor3f(1.0, 1.0, 0.0);
     glScalef(1.5, 1.5, 1.5)
-    draw_sphere_model()
+    with profiled('Słońce'):
+        draw_sphere_model()
     glPopMatrix()
 
+    # Pozycje obu planet: z symulacji w tle albo jednym wywołaniem tutaj
+    if THREADED_SIMULATION:
+        if SIMULATION is None or SIMULATION_BELT is not BELT: start_simulation(time)
+        positions = SIMULATION.sample(time, rows=slice(0, 2))
+    else:
+        positions = kepler_positions([A1, A2], [E1, E2], time, [ORBIT_SPEED_FAC_1, ORBIT_SPEED_FAC_2])
+
     # === PLANETA 1 (Niebieska) ===
-    planet_x_1, planet_z_1 = get_kepler_position(A1, E1, time, ORBIT_SPEED_FAC_1)
+    planet_x_1, _, planet_z_1 = positions[0]
 
     # Rysujemy Orbitę 1
     glPushMatrix()
-    draw_orbit(A1, B1, FOCAL_DIST_1)
+    with profiled('orbita 1'):
+        draw_orbit(A1, B1, FOCAL_DIST_1)
     glPopMatrix()
 
     # Przesunięcie i Rysowanie Planety 1
@@ -143,15 +147,17 @@ def render(time):
     glTranslatef(planet_x_1, 0.0, planet_z_1)  # PRZESUNIĘCIE W NIE-OBRÓCONEJ PŁASZCZYŹNIE!
     glRotatef(time * 100.0, 0.0, 1.0, 0.0)
     glColor3f(0.2, 0.5, 1.0)
-    draw_sphere_model()
+    with profiled('planeta 1'):
+        draw_sphere_model()
     glPopMatrix()
 
     # === PLANETA 2 (Czerwona) ===
-    planet_x_2, planet_z_2 = get_kepler_position(A2, E2, time, ORBIT_SPEED_FAC_2)
+    planet_x_2, _, planet_z_2 = positions[1]
 
     # Rysujemy Orbitę 2
     glPushMatrix()
-    draw_orbit(A2, B2, FOCAL_DIST_2)
+    with profiled('orbita 2'):
+        draw_orbit(A2, B2, FOCAL_DIST_2)
     glPopMatrix()
 
     # Przesunięcie i Rysowanie Planety 2
@@ -160,43 +166,39 @@ def render(time):
     glRotatef(time * 50.0, 0.0, 1.0, 0.0)
     glColor3f(1.0, 0.3, 0.2)
     glScalef(0.7, 0.7, 0.7)
-    draw_sphere_model()
+    with profiled('planeta 2'):
+        draw_sphere_model()
     glPopMatrix()
 
+    # === PAS PLANETOID (jedno wywołanie instancyjne) ===
+    if BELT is not None:
+        with profiled('pas planetoid'):
+            BELT.draw(time, SIMULATION, slice(2, None))
+
     glFlush()
 
 
 def update_viewport(window, width, height):
-    if height == 0: height = 1
-    if width == 0: width = 1
-    aspect_ratio = width / height
-    glMatrixMode(GL_PROJECTION)
-    glViewport(0, 0, width, height)
-    glLoadIdentity()
-    if width <= height:
-        glOrtho(-12.0, 12.0, -12.0 / aspect_ratio, 12.0 / aspect_ratio, -20.0, 20.0)
-    else:
-        glOrtho(-12.0 * aspect_ratio, 12.0 * aspect_ratio, -12.0, 12.0, -20.0, 20.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    global ORBIT_MAX_ERROR
+    max_error = ORBIT_PIXEL_ERROR / ortho_pixel_scale(width, height, ORTHO_EXTENT)
+    if max_error != ORBIT_MAX_ERROR:
+        ORBIT_MAX_ERROR = max_error
+        if ORBIT_REPORT:
+            print(segment_report([(A1, B1), (A2, B2)], ORBIT_MAX_ERROR, fixed_segments=150))
+    ortho_viewport(width, height, ORTHO_EXTENT, -20.0, 20.0)
 
 
 def main():
-    if not glfwInit(): sys.exit(-1)
-    window = glfwCreateWindow(400, 400, "Lab 3: Symulacja (PEŁNY KEPLER POPRAWIONY)", None, None)
-    if not window: glfwTerminate(); sys.exit(-1)
-    glfwMakeContextCurrent(window)
-    glfwSetFramebufferSizeCallback(window, update_viewport)
-    glfwSwapInterval(1)
-    width, height = glfwGetFramebufferSize(window)
-    update_viewport(window, width, height)
-    startup()
-    while not glfwWindowShouldClose(window):
-        render(glfwGetTime())
-        glfwSwapBuffers(window)
-        glfwPollEvents()
-    shutdown()
-    glfwTerminate()
+    global BELT_SIZE, ORBIT_REPORT, THREADED_SIMULATION
+    ORBIT_REPORT = '--report' in sys.argv
+    THREADED_SIMULATION = '--threaded' in sys.argv
+    if '--belt' in sys.argv: BELT_SIZE = int(sys.argv[sys.argv.index('--belt') + 1])
+    scene = sys.modules[__name__]
+    if '--belt-report' in sys.argv:
+        run(scene, "Lab 3: Symulacja (PEŁNY KEPLER POPRAWIONY)", swap_interval=0,
+            task=lambda: frame_time_report(scene))
+    else:
+        run(scene, "Lab 3: Symulacja (PEŁNY KEPLER POPRAWIONY)")
 
 
 if __name__ == '__main__':